@@ -0,0 +1,411 @@
+# archive_runner.py
+
+import contextlib
+import io
+import os
+import posixpath
+import shutil
+import tarfile
+import time
+import zipfile
+
+from ass_document import iter_ass_events
+from ass_parser import iter_dialogue_text_from_ass
+from ass_replacer import parse_translation_lines
+from batch_runner import DEFAULT_TRANSLATION_SUFFIX
+from pipeline import iter_pipeline_ass_lines, iter_pipeline_srt_lines
+from profiling import stage
+from results import InvalidInputError, MissingFileError, ProcessingError, ProcessResult, SubtitleToolError, UnsupportedFileError
+from rtl_fixer import RTL_EXTENSIONS, iter_rtl_fixed_lines
+from srt_parser import iter_dialogue_text_from_srt, iter_srt_blocks
+from subtitle_io import SNIFF_SIZE, output_encoding, sniff_encoding, write_joined_lines
+
+SUBTITLE_EXTENSIONS = ('.ass', '.ssa', '.srt')
+
+# Archive extension -> tarfile write mode. Output archives keep the input's format.
+TAR_WRITE_MODES = {
+    '.tar': 'w',
+    '.tar.gz': 'w:gz', '.tgz': 'w:gz',
+    '.tar.bz2': 'w:bz2', '.tbz2': 'w:bz2',
+    '.tar.xz': 'w:xz', '.txz': 'w:xz',
+}
+
+COPY_BUFFER_SIZE = 1 << 20
+
+def split_archive_name(archive_path):
+    """Splits 'release.tar.gz' into ('release', '.tar.gz'); other names like os.path.splitext."""
+    lowered = archive_path.lower()
+    for extension in sorted(TAR_WRITE_MODES, key=len, reverse=True):
+        if lowered.endswith(extension):
+            return archive_path[:-len(extension)], archive_path[-len(extension):]
+    return os.path.splitext(archive_path)
+
+class ZipMembers:
+    """Read access to the files of a ZIP archive, in archive order."""
+
+    def __init__(self, archive_path):
+        self._archive = zipfile.ZipFile(archive_path)
+
+    def names(self):
+        return [info.filename for info in self._archive.infolist() if not info.is_dir()]
+
+    def open(self, name):
+        return self._archive.open(name)
+
+    def close(self):
+        self._archive.close()
+
+class TarMembers:
+    """
+    Read access to the regular files of a (compressed) tar archive, in
+    archive order. Members are read front to back, so a compressed archive
+    is decompressed about once per pass.
+    """
+
+    def __init__(self, archive_path):
+        self._archive = tarfile.open(archive_path, 'r:*')
+        self._members = {member.name: member for member in self._archive.getmembers() if member.isfile()}
+
+    def names(self):
+        return list(self._members)
+
+    def open(self, name):
+        return self._archive.extractfile(self._members[name])
+
+    def close(self):
+        self._archive.close()
+
+class DirectoryMembers:
+    """Read access to the files below a folder, named like archive members ('sub/dir/name')."""
+
+    def __init__(self, directory):
+        self._directory = directory
+
+    def names(self):
+        found = []
+        for root, _, files in os.walk(self._directory):
+            for file_name in files:
+                relative = os.path.relpath(os.path.join(root, file_name), self._directory)
+                found.append(relative.replace(os.sep, '/'))
+        return sorted(found)
+
+    def open(self, name):
+        return open(os.path.join(self._directory, *name.split('/')), 'rb')
+
+    def close(self):
+        pass
+
+class ZipWriter:
+    """Writes the members of a new ZIP archive one after the other, streamed."""
+
+    def __init__(self, archive_path):
+        self._archive = zipfile.ZipFile(archive_path, 'w', compression=zipfile.ZIP_DEFLATED)
+
+    @contextlib.contextmanager
+    def open(self, name):
+        with self._archive.open(name, 'w', force_zip64=True) as stream:
+            yield stream
+
+    def close(self):
+        self._archive.close()
+
+class TarWriter:
+    """
+    Writes the members of a new tar archive. A tar header holds the size of
+    its member, so every member is assembled in memory (never on disk)
+    before it is appended.
+    """
+
+    def __init__(self, archive_path, mode):
+        self._archive = tarfile.open(archive_path, mode)
+
+    @contextlib.contextmanager
+    def open(self, name):
+        buffer = io.BytesIO()
+        yield buffer
+        info = tarfile.TarInfo(name)
+        info.size = buffer.tell()
+        info.mtime = int(time.time())
+        buffer.seek(0)
+        self._archive.addfile(info, buffer)
+
+    def close(self):
+        self._archive.close()
+
+def open_members(path):
+    """
+    Opens an archive (ZIP or tar, optionally compressed) or a folder for
+    reading its members.
+
+    Raises:
+        MissingFileError: If the path does not exist.
+        UnsupportedFileError: If it is neither a folder nor a ZIP or tar archive.
+    """
+    if os.path.isdir(path):
+        return DirectoryMembers(path)
+    if not os.path.exists(path):
+        raise MissingFileError(f"Archive not found at {path}")
+    if zipfile.is_zipfile(path):
+        return ZipMembers(path)
+    if tarfile.is_tarfile(path):
+        return TarMembers(path)
+    raise UnsupportedFileError(f"Unsupported archive: {path}. Only ZIP and tar (.tar, .tar.gz, .tar.bz2, .tar.xz) are supported.")
+
+def _open_writer(archive_path, source_path):
+    """Opens the output archive in the format of the source archive."""
+    if zipfile.is_zipfile(source_path):
+        return ZipWriter(archive_path)
+    return TarWriter(archive_path, TAR_WRITE_MODES.get(split_archive_name(archive_path)[1].lower(), 'w'))
+
+class PrefixedStream(io.RawIOBase):
+    """
+    A binary stream that returns `prefix` and then the rest of `stream`.
+
+    Used to read a member again from its start after its first bytes were
+    sniffed, without seeking back: seeking backwards in a compressed tar
+    member decompresses the archive again from the beginning.
+    """
+
+    def __init__(self, prefix, stream):
+        self._prefix = memoryview(prefix)
+        self._stream = stream
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self._prefix:
+            count = min(len(buffer), len(self._prefix))
+            buffer[:count] = self._prefix[:count]
+            self._prefix = self._prefix[count:]
+            return count
+        data = self._stream.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def close(self):
+        if not self.closed:
+            self._stream.close()
+        super().close()
+
+def open_member_text(stream):
+    """
+    Wraps a binary member stream for reading text in its detected encoding.
+    The returned wrapper's `encoding` attribute holds the encoding used.
+    The stream is read once, front to back (see PrefixedStream).
+    """
+    sample = stream.read(SNIFF_SIZE)
+    encoding = sniff_encoding(sample, complete=len(sample) < SNIFF_SIZE)
+    return io.TextIOWrapper(io.BufferedReader(PrefixedStream(sample, stream)), encoding=encoding)
+
+@contextlib.contextmanager
+def open_member_output(writer, name, encoding='utf-8'):
+    """Opens a new member of an output archive for writing text."""
+    with writer.open(name) as stream:
+        text = io.TextIOWrapper(stream, encoding=encoding)
+        try:
+            yield text
+        finally:
+            # The member stream is closed by the archive writer.
+            text.flush()
+            text.detach()
+
+def _merge_result(total, member_result, name):
+    """Adds the counters and warnings of one member to the archive's result."""
+    for counter in ProcessResult.COUNTERS:
+        setattr(total, counter, getattr(total, counter) + getattr(member_result, counter))
+    for warning in member_result.warnings:
+        total.warn(f"{name}: {warning}")
+
+def _run_archive(archive_path, output_suffix, process_members):
+    """
+    Opens the input archive and the '<archive><suffix>' output archive and
+    lets `process_members(reader, writer, result)` fill it in one pass. The
+    output archive is removed if processing fails.
+    """
+    reader = open_members(archive_path)
+    if isinstance(reader, DirectoryMembers):
+        raise UnsupportedFileError(f"Expected an archive, got the folder {archive_path}.")
+
+    base_name, extension = split_archive_name(archive_path)
+    output_path = base_name + output_suffix + extension
+    result = ProcessResult(archive_path, output_path)
+    result.files = []
+    writer = None
+    try:
+        writer = _open_writer(output_path, archive_path)
+        process_members(reader, writer, result)
+        writer.close()
+        return result
+    except Exception as e:
+        if writer is not None:
+            with contextlib.suppress(Exception):
+                writer.close()
+            with contextlib.suppress(OSError):
+                os.remove(output_path)
+        if isinstance(e, SubtitleToolError):
+            raise
+        raise ProcessingError(f"An error occurred while processing archive {archive_path}: {e}") from e
+    finally:
+        reader.close()
+
+def _members_with_extensions(reader, extensions, archive_path):
+    """Returns the member names with one of `extensions`, or raises InvalidInputError if there is none."""
+    names = [name for name in reader.names() if posixpath.splitext(name)[1].lower() in extensions]
+    if not names:
+        raise InvalidInputError(f"No {'/'.join(extensions)} files found in archive {archive_path}.")
+    return names
+
+def extract_archive(archive_path, add_prefix=False):
+    """
+    Extracts the dialogue of every ASS/SSA/SRT file of an archive into a new
+    archive of '<name>_extracted.txt' files, without unpacking it to disk.
+
+    Args:
+        archive_path (str): A ZIP or (compressed) tar archive.
+        add_prefix (bool): If True, prepends '1-', '2-', ... to every line.
+
+    Returns:
+        ProcessResult: `output_path` is '<archive>_extracted.<ext>', `files` the
+                       members written; counters and warnings are summed over
+                       the subtitle files (warnings start with the member name).
+
+    Raises:
+        MissingFileError: If the archive does not exist.
+        UnsupportedFileError: If it is not a ZIP or tar archive.
+        InvalidInputError: If it contains no subtitle file.
+        ProcessingError: If a member cannot be read or the archive cannot be written.
+    """
+    def process_members(reader, writer, result):
+        for name in _members_with_extensions(reader, SUBTITLE_EXTENSIONS, archive_path):
+            member_result = ProcessResult(name)
+            output_name = posixpath.splitext(name)[0] + "_extracted.txt"
+            with open_member_text(reader.open(name)) as infile, \
+                 open_member_output(writer, output_name) as outfile:
+                if name.lower().endswith('.srt'):
+                    lines = iter_dialogue_text_from_srt(infile, add_prefix, member_result)
+                else:
+                    lines = iter_dialogue_text_from_ass(stage('parse', iter_ass_events(infile)), add_prefix,
+                                                        result=member_result)
+                write_joined_lines(outfile, lines)
+            _merge_result(result, member_result, name)
+            result.files.append(output_name)
+
+    return _run_archive(archive_path, "_extracted", process_members)
+
+def rtl_fix_archive(archive_path, fix_words_flag=False):
+    """
+    Applies the RLE fix to every TXT, SRT and ASS file of an archive and
+    writes the '<name>_RLE_fixed' files into a new archive, without
+    unpacking it to disk.
+
+    Args:
+        archive_path (str): A ZIP or (compressed) tar archive.
+        fix_words_flag (bool): Also fix the word order (see rtl_fixer).
+
+    Returns:
+        ProcessResult: `output_path` is '<archive>_RLE_fixed.<ext>' and `files`
+                       the members written; `events_read` counts the lines.
+
+    Raises:
+        MissingFileError, UnsupportedFileError, InvalidInputError, ProcessingError:
+            As for extract_archive.
+    """
+    def process_members(reader, writer, result):
+        for name in _members_with_extensions(reader, RTL_EXTENSIONS, archive_path):
+            base_name, extension = posixpath.splitext(name)
+            output_name = base_name + "_RLE_fixed" + extension
+            with open_member_text(reader.open(name)) as infile, \
+                 open_member_output(writer, output_name, output_encoding(infile.encoding)) as outfile:
+                for line in stage('rtl', iter_rtl_fixed_lines(infile, extension, fix_words_flag)):
+                    outfile.write(line + '\n')
+                    result.events_read += 1
+            result.files.append(output_name)
+
+    return _run_archive(archive_path, "_RLE_fixed", process_members)
+
+def _load_archive_translations(source, subtitle_names, translation_suffix):
+    """
+    Reads the translation file of every subtitle member from `source`, in
+    the source's own member order (a single forward pass over a tar archive).
+
+    Returns:
+        dict: Subtitle member name -> (translations dict, ProcessResult with
+              the warnings of the translation file).
+    """
+    wanted = {posixpath.splitext(name)[0] + translation_suffix: name for name in subtitle_names}
+    loaded = {}
+    for translation_name in source.names():
+        subtitle_name = wanted.get(translation_name)
+        if subtitle_name is None:
+            continue
+        member_result = ProcessResult(subtitle_name)
+        with open_member_text(source.open(translation_name)) as f:
+            loaded[subtitle_name] = (parse_translation_lines(f, result=member_result), member_result)
+    return loaded
+
+def pipeline_archive(archive_path, translations_path=None, translation_suffix=DEFAULT_TRANSLATION_SUFFIX):
+    """
+    Replaces the dialogue of every ASS/SSA/SRT file of a release archive with
+    its translation and applies the RLE fix, writing a new release archive in
+    one pass, without unpacking anything to disk.
+
+    The translation of '<dir>/<name>.ass' is the '<dir>/<name>_translated.txt'
+    member of the same archive, or of `translations_path` (another archive or
+    a folder with the same layout). Every subtitle with a translation becomes
+    '<name>_Persian_RLE_fixed.<ext>'. Subtitles without one and the other
+    members (fonts, chapters, ...) are copied unchanged; the translation files
+    themselves are left out.
+
+    Args:
+        archive_path (str): The release, a ZIP or (compressed) tar archive.
+        translations_path (str): Optional archive or folder with the translations.
+        translation_suffix (str): Name suffix of the translation files.
+
+    Returns:
+        ProcessResult: `output_path` is '<archive>_Persian_RLE_fixed.<ext>' and
+                       `files` the members written; counters and warnings are
+                       summed over the subtitle files.
+
+    Raises:
+        MissingFileError, UnsupportedFileError, InvalidInputError, ProcessingError:
+            As for extract_archive (also for the translations archive).
+    """
+    def process_members(reader, writer, result):
+        subtitle_names = _members_with_extensions(reader, SUBTITLE_EXTENSIONS, archive_path)
+        source = reader if translations_path is None else open_members(translations_path)
+        try:
+            loaded = _load_archive_translations(source, subtitle_names, translation_suffix)
+        finally:
+            if source is not reader:
+                source.close()
+        translation_names = {posixpath.splitext(name)[0] + translation_suffix for name in subtitle_names}
+
+        for name in reader.names():
+            if translations_path is None and name in translation_names:
+                continue
+            if name not in loaded:
+                if name in subtitle_names:
+                    result.warn(f"{name}: No translation file found. Copied unchanged.")
+                with reader.open(name) as source_stream, writer.open(name) as output_stream:
+                    shutil.copyfileobj(source_stream, output_stream, COPY_BUFFER_SIZE)
+                result.files.append(name)
+                continue
+
+            translations, member_result = loaded[name]
+            base_name, extension = posixpath.splitext(name)
+            output_name = base_name + "_Persian_RLE_fixed" + extension
+            with open_member_text(reader.open(name)) as infile, \
+                 open_member_output(writer, output_name, output_encoding(infile.encoding)) as outfile:
+                if extension.lower() == '.srt':
+                    lines = iter_pipeline_srt_lines(stage('parse', iter_srt_blocks(infile)), translations,
+                                                    member_result)
+                else:
+                    lines = iter_pipeline_ass_lines(stage('parse', iter_ass_events(infile)), translations,
+                                                    result=member_result)
+                for line in stage('pipeline', lines):
+                    outfile.write(line + '\n')
+            _merge_result(result, member_result, name)
+            result.files.append(output_name)
+
+    return _run_archive(archive_path, "_Persian_RLE_fixed", process_members)
@@ -0,0 +1,222 @@
+# ass_document.py
+
+from ass_tokenizer import (EVENT_TEXT, classify_text, has_drawing_mode, leading_override_block,
+                           split_override_blocks, text_pieces_outside_drawings)
+from profiling import timed_call
+from subtitle_io import open_subtitle
+
+# Default [Events] layout used when the file has no 'Format:' line.
+DEFAULT_EVENT_FORMAT = ('Layer', 'Start', 'End', 'Style', 'Name',
+                        'MarginL', 'MarginR', 'MarginV', 'Effect', 'Text')
+
+DIALOGUE_PREFIX = 'Dialogue:'
+
+
+class Dialogue:
+    """
+    A single parsed 'Dialogue:' line of an ASS/SSA file.
+
+    The record keeps the original line and only stores offsets into it, so
+    building it is cheap and the untouched parts of the line can be written
+    back without being re-joined field by field. The Text field is tokenized
+    on first use, once, and the pieces are kept on the record.
+
+    Attributes:
+        line (str): The original line (without the trailing newline).
+        number (int): 1-based position of the event among all Dialogue lines.
+        offsets (tuple): Start offset of every field inside `line`. The last
+                         entry is the start of the Text field.
+    """
+
+    __slots__ = ('line', 'number', 'offsets', '_pieces', '_kind')
+
+    def __init__(self, line, number, offsets):
+        self.line = line
+        self.number = number
+        self.offsets = offsets
+        self._pieces = None
+        self._kind = None
+
+    @classmethod
+    def from_line(cls, line, number=0, field_count=len(DEFAULT_EVENT_FORMAT)):
+        """
+        Builds a Dialogue record from a raw line.
+
+        Args:
+            line (str): The line without its trailing newline.
+            number (int): The event number to store on the record.
+            field_count (int): Number of fields declared by the 'Format:' line.
+
+        Returns:
+            Dialogue or None: None if the line is not a complete Dialogue line.
+        """
+        start = len(line) - len(line.lstrip())
+        if not line.startswith(DIALOGUE_PREFIX, start):
+            return None
+
+        # Record where every field starts. The Text field is always last and
+        # may contain commas, so only the first (field_count - 1) commas count.
+        parts = line.split(',', field_count - 1)
+        if len(parts) < field_count:
+            return None
+
+        offsets = [start + len(DIALOGUE_PREFIX)]
+        position = len(parts[0]) + 1
+        for part in parts[1:]:
+            offsets.append(position)
+            position += len(part) + 1
+
+        return cls(line, number, tuple(offsets))
+
+    @property
+    def text_start(self):
+        """Offset of the Text field inside the line."""
+        return self.offsets[-1]
+
+    @property
+    def text(self):
+        """The raw Text field, including override tags."""
+        return self.line[self.offsets[-1]:]
+
+    @property
+    def header(self):
+        """Everything before the Text field, including the trailing comma."""
+        return self.line[:self.offsets[-1]]
+
+    def field(self, index):
+        """Returns the stripped value of the field at `index`."""
+        offsets = self.offsets
+        if index == len(offsets) - 1:
+            return self.text.strip()
+        return self.line[offsets[index]:offsets[index + 1] - 1].strip()
+
+    def pieces(self):
+        """
+        Returns the Text field split into alternating plain-text and override
+        block pieces (see `ass_tokenizer.split_override_blocks`).
+        """
+        if self._pieces is None:
+            self._pieces = timed_call('tokenize', split_override_blocks, self.text)
+        return self._pieces
+
+    def tags(self):
+        """Returns the list of override blocks found in the Text field."""
+        return self.pieces()[1::2]
+
+    def leading_tag(self):
+        """Returns the override block the Text field starts with, or ''."""
+        if self._pieces is None:
+            # No need to tokenize the whole text for its first block.
+            return timed_call('tokenize', leading_override_block, self.line, self.offsets[-1])
+        pieces = self._pieces
+        if len(pieces) > 1 and not pieces[0]:
+            return pieces[1]
+        return ''
+
+    def clean_text(self):
+        """
+        Returns the Text field with every override block removed. Vector
+        drawing commands (text in \\p1 drawing mode) are removed as well.
+        """
+        pieces = self.pieces()
+        if len(pieces) == 1:
+            return pieces[0].strip()
+        if has_drawing_mode(self.text):
+            return ''.join(text_pieces_outside_drawings(pieces)).strip()
+        return ''.join(pieces[0::2]).strip()
+
+    def effect(self):
+        """Returns the Effect field: the field before Text in ASS and SSA layouts."""
+        offsets = self.offsets
+        if len(offsets) < 2:
+            return ''
+        return self.line[offsets[-2]:offsets[-1] - 1].strip()
+
+    def kind(self):
+        """
+        Returns what the event shows (see `ass_tokenizer.classify_text`):
+        EVENT_TEXT for dialogue, otherwise EVENT_DRAWING, EVENT_KARAOKE,
+        EVENT_EFFECT or EVENT_EMPTY.
+        """
+        kind = self._kind
+        if kind is None:
+            offsets = self.offsets
+            # Most events have an empty Effect field, which needs no slicing.
+            effect = self.effect() if len(offsets) > 1 and offsets[-1] - offsets[-2] > 1 else ''
+            kind = self._kind = classify_text(self.line[offsets[-1]:], effect)
+        return kind
+
+    def is_translatable(self):
+        """
+        True if the event carries dialogue text that should be translated.
+        Drawings, empty karaoke syllable carriers, templater effects and
+        events with only tags, comments or line breaks are not.
+        """
+        return (self._kind or self.kind()) == EVENT_TEXT
+
+    def with_text(self, new_text):
+        """Returns the original line with the Text field replaced."""
+        return self.line[:self.offsets[-1]] + new_text
+
+
+def parse_format_line(line):
+    """
+    Parses a 'Format:' line of the [Events] section.
+
+    Returns:
+        tuple: The field names in declaration order.
+    """
+    _, _, fields = line.partition(':')
+    return tuple(name.strip() for name in fields.split(','))
+
+
+def iter_ass_events(lines):
+    """
+    Streams an ASS/SSA file as a sequence of Dialogue records and raw lines.
+
+    The file is read exactly once. Every line is yielded in order: Dialogue
+    lines as `Dialogue` records and everything else (section headers, styles,
+    comments, malformed events) as plain strings without the trailing newline.
+    The field layout is taken from the 'Format:' line of the [Events] section.
+
+    Args:
+        lines (iterable): Any iterable of lines, e.g. an open file object.
+
+    Yields:
+        Dialogue or str: One item per input line.
+    """
+    field_count = len(DEFAULT_EVENT_FORMAT)
+    in_events = False
+    number = 0
+
+    for line in lines:
+        line = line.rstrip('\r\n')
+        stripped = line.lstrip()
+
+        if stripped.startswith('['):
+            in_events = stripped.lower().startswith('[events]')
+        elif in_events and stripped.startswith('Format:'):
+            field_count = len(parse_format_line(stripped))
+        elif stripped.startswith(DIALOGUE_PREFIX):
+            number += 1
+            event = Dialogue.from_line(line, number, field_count)
+            if event is not None:
+                yield event
+                continue
+
+        yield line
+
+
+def read_ass_events(ass_file_path):
+    """
+    Opens an ASS/SSA file in its detected encoding and streams it through
+    `iter_ass_events`.
+
+    Args:
+        ass_file_path (str): The full path to the ASS file.
+
+    Yields:
+        Dialogue or str: One item per line of the file.
+    """
+    with open_subtitle(ass_file_path) as f:
+        yield from iter_ass_events(f)
\ No newline at end of file
@@ -0,0 +1,305 @@
+# ass_event_index.py
+
+import json
+import mmap
+import os
+import re
+import shutil
+import tempfile
+from array import array
+
+from ass_document import DEFAULT_EVENT_FORMAT, Dialogue, parse_format_line
+from results import InvalidInputError
+from subtitle_io import detect_encoding
+
+INDEX_VERSION = 2
+
+# Text start recorded for a malformed Dialogue line, which has no Text field.
+NO_TEXT = -1
+
+_EVENTS_SECTION_PATTERN = re.compile(rb'^[ \t]*\[events\]', re.MULTILINE | re.IGNORECASE)
+_SECTION_PATTERN = re.compile(rb'^[ \t]*\[', re.MULTILINE)
+_FORMAT_PATTERN = re.compile(rb'^[ \t]*Format:[^\r\n]*', re.MULTILINE)
+_DIALOGUE_PATTERN = re.compile(rb'^[ \t]*Dialogue:', re.MULTILINE)
+
+def default_event_index_path(ass_file_path):
+    """Returns the cache path of the event index of an ASS file."""
+    return ass_file_path + ".evidx"
+
+class EventIndex:
+    """
+    Byte offsets of the Dialogue events of an ASS file, for random access.
+
+    For event number n (1-based, in file order) the index stores where its
+    line starts, where its Text field starts (NO_TEXT for a malformed line)
+    and where the line ends (before the line break). Offsets are in bytes of
+    the UTF-8 encoded file.
+
+    Attributes:
+        path (str): The indexed ASS file.
+        size (int), mtime_ns (int): The file state the offsets are valid for.
+        events_offset (int): Byte offset of the [Events] header (-1 if absent).
+        offsets (array): Flat array of (line start, text start, line end) triples.
+    """
+
+    def __init__(self, path, size, mtime_ns, events_offset, offsets):
+        self.path = path
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.events_offset = events_offset
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) // 3
+
+    def span(self, number):
+        """
+        Returns (line start, text start, line end) of event `number`.
+
+        Raises:
+            IndexError: If there is no such event.
+        """
+        if not 1 <= number <= len(self):
+            raise IndexError(f"Event {number} does not exist (the file has {len(self)} Dialogue events).")
+        position = (number - 1) * 3
+        return self.offsets[position], self.offsets[position + 1], self.offsets[position + 2]
+
+    def is_current(self):
+        """True if the indexed file has not changed since the index was built."""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return False
+        return stat.st_size == self.size and stat.st_mtime_ns == self.mtime_ns
+
+    def save(self, index_path):
+        """Writes the index: one JSON header line followed by the raw offsets."""
+        header = {
+            "version": INDEX_VERSION,
+            "size": self.size,
+            "mtime_ns": self.mtime_ns,
+            "events_offset": self.events_offset,
+            "count": len(self),
+            "itemsize": self.offsets.itemsize,
+        }
+        with open(index_path, 'wb') as f:
+            f.write(json.dumps(header).encode('utf-8') + b'\n')
+            self.offsets.tofile(f)
+
+    @classmethod
+    def load(cls, ass_file_path, index_path):
+        """
+        Reads a saved index.
+
+        Raises:
+            ValueError: If the file is not a compatible index.
+        """
+        with open(index_path, 'rb') as f:
+            header = json.loads(f.readline())
+            if header.get("version") != INDEX_VERSION:
+                raise ValueError(f"Unsupported event index: {index_path}")
+            offsets = array('q')
+            if header["itemsize"] != offsets.itemsize:
+                raise ValueError(f"Unsupported event index: {index_path}")
+            offsets.fromfile(f, header["count"] * 3)
+        return cls(ass_file_path, header["size"], header["mtime_ns"], header["events_offset"], offsets)
+
+def build_event_index(ass_file_path):
+    """
+    Scans an ASS file through mmap and records the byte offsets of its
+    [Events] section, of every Dialogue line and of its Text field.
+
+    Args:
+        ass_file_path (str): The full path to the (UTF-8) ASS file.
+
+    Returns:
+        EventIndex: The new index.
+
+    Raises:
+        ValueError: If the file is not UTF-8 encoded.
+    """
+    # Byte offsets and in-place rewrites assume UTF-8 (a BOM is just skipped bytes).
+    encoding = detect_encoding(ass_file_path)
+    if encoding not in ('utf-8', 'utf-8-sig'):
+        raise ValueError(f"The event index requires a UTF-8 file, detected {encoding}")
+
+    stat = os.stat(ass_file_path)
+    offsets = array('q')
+    events_offset = -1
+
+    if stat.st_size == 0:
+        return EventIndex(ass_file_path, stat.st_size, stat.st_mtime_ns, events_offset, offsets)
+
+    with open(ass_file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        match = _EVENTS_SECTION_PATTERN.search(mm)
+        if match is None:
+            return EventIndex(ass_file_path, stat.st_size, stat.st_mtime_ns, events_offset, offsets)
+        events_offset = match.start()
+
+        # The [Events] section ends at the next section header.
+        section_end = len(mm)
+        next_section = _SECTION_PATTERN.search(mm, match.end())
+        if next_section is not None:
+            section_end = next_section.start()
+
+        field_count = len(DEFAULT_EVENT_FORMAT)
+        format_match = _FORMAT_PATTERN.search(mm, match.end(), section_end)
+        if format_match is not None:
+            field_count = len(parse_format_line(format_match.group().decode('utf-8').strip()))
+
+        for dialogue in _DIALOGUE_PATTERN.finditer(mm, match.end(), section_end):
+            line_start = dialogue.start()
+            line_end = mm.find(b'\n', line_start)
+            if line_end == -1:
+                line_end = len(mm)
+            if line_end > line_start and mm[line_end - 1:line_end] == b'\r':
+                line_end -= 1
+
+            # The Text field starts after the (field_count - 1)th comma.
+            text_start = dialogue.end()
+            for _ in range(field_count - 1):
+                text_start = mm.find(b',', text_start, line_end)
+                if text_start == -1:
+                    break
+                text_start += 1
+            if text_start == -1:
+                # Malformed event: the whole line is kept, with no Text field.
+                text_start = NO_TEXT
+
+            offsets.extend((line_start, text_start, line_end))
+
+    return EventIndex(ass_file_path, stat.st_size, stat.st_mtime_ns, events_offset, offsets)
+
+def load_event_index(ass_file_path, index_path=None):
+    """
+    Returns the event index of an ASS file, from the cache when it is still
+    valid (same size and mtime), otherwise rebuilt and saved.
+
+    Args:
+        ass_file_path (str): The full path to the ASS file.
+        index_path (str): Optional cache path (default: '<file>.evidx').
+
+    Returns:
+        EventIndex: The index.
+    """
+    index_path = index_path or default_event_index_path(ass_file_path)
+    if os.path.exists(index_path):
+        try:
+            index = EventIndex.load(ass_file_path, index_path)
+            if index.is_current():
+                return index
+        except (ValueError, KeyError, EOFError, OSError):
+            pass
+
+    index = build_event_index(ass_file_path)
+    try:
+        index.save(index_path)
+    except OSError:
+        # The cache is an optimization; a read-only directory is not an error.
+        pass
+    return index
+
+def read_event(ass_file_path, number, index_path=None):
+    """
+    Reads one Dialogue event by number without parsing the rest of the file.
+
+    Args:
+        ass_file_path (str): The full path to the ASS file.
+        number (int): The 1-based event number.
+
+    Returns:
+        Dialogue: The parsed event (None if the line is malformed).
+    """
+    index = load_event_index(ass_file_path, index_path)
+    line_start, _, line_end = index.span(number)
+    with open(ass_file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        line = mm[line_start:line_end].decode('utf-8')
+    return Dialogue.from_line(line, number)
+
+def _splice_file(file_path, start, end, new_bytes):
+    """
+    Replaces the bytes [start, end) of a file with `new_bytes` through a
+    temporary file in the same directory and os.replace().
+    """
+    directory = os.path.dirname(os.path.abspath(file_path))
+    fd, temp_path = tempfile.mkstemp(prefix='.' + os.path.basename(file_path) + '.', suffix='.tmp', dir=directory)
+    try:
+        with open(file_path, 'rb') as source, os.fdopen(fd, 'wb') as temp:
+            remaining = start
+            while remaining:
+                chunk = source.read(min(remaining, 1 << 20))
+                if not chunk:
+                    break
+                temp.write(chunk)
+                remaining -= len(chunk)
+            temp.write(new_bytes)
+            source.seek(end)
+            shutil.copyfileobj(source, temp, 1 << 20)
+        shutil.copymode(file_path, temp_path)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+def rewrite_event_text(ass_file_path, number, new_text, index_path=None):
+    """
+    Replaces the Text field of one Dialogue event.
+
+    If the new text has the same encoded length it is written over the old
+    one in place. Otherwise the file is copied to a temporary file next to
+    it with the new text spliced in, which then replaces the original, so an
+    interrupted write never loses the rest of the file. The cached index is
+    updated, not rebuilt.
+
+    Args:
+        ass_file_path (str): The full path to the ASS file.
+        number (int): The 1-based event number.
+        new_text (str): The new Text field (override tags included). Line
+                        breaks inside it must be written as '\\N'.
+
+    Returns:
+        EventIndex: The updated index.
+
+    Raises:
+        InvalidInputError: If `new_text` contains a real line break, which
+                           would split the event and corrupt the file, or if
+                           the event is malformed and has no Text field.
+    """
+    if '\n' in new_text or '\r' in new_text:
+        raise InvalidInputError("The new text must not contain line breaks (use \\N for a new line in ASS).")
+
+    index_path = index_path or default_event_index_path(ass_file_path)
+    index = load_event_index(ass_file_path, index_path)
+    _, text_start, line_end = index.span(number)
+    if text_start == NO_TEXT:
+        raise InvalidInputError(f"Event {number} is malformed (too few fields) and has no Text field to replace.")
+    new_bytes = new_text.encode('utf-8')
+    delta = len(new_bytes) - (line_end - text_start)
+
+    if delta == 0:
+        with open(ass_file_path, 'r+b') as f:
+            f.seek(text_start)
+            f.write(new_bytes)
+    else:
+        _splice_file(ass_file_path, text_start, line_end, new_bytes)
+
+    # Shift the offsets of this event's end and of every following event.
+    offsets = index.offsets
+    position = (number - 1) * 3
+    offsets[position + 2] += delta
+    if delta:
+        for i in range(position + 3, len(offsets)):
+            if offsets[i] != NO_TEXT:
+                offsets[i] += delta
+
+    stat = os.stat(ass_file_path)
+    index.size = stat.st_size
+    index.mtime_ns = stat.st_mtime_ns
+    try:
+        index.save(index_path)
+    except OSError:
+        pass
+    return index
\ No newline at end of file
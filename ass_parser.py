@@ -1,54 +1,186 @@
 # ass_parser.py
 
-import re
+from ass_document import Dialogue, iter_ass_events, read_ass_events
+from dedupe_index import write_dedupe_index
+from event_manifest import content_hash, read_manifest, write_manifest
+from profiling import stage
+from results import MissingFileError, ProcessingError, ProcessResult
+from subtitle_io import read_subtitle_data
+from translation_memory import TranslationMemory, normalize_source_text
 
-def extract_dialogue_text_from_ass(ass_file_path, add_prefix=False):
+def iter_dialogue_text_from_ass(events, add_prefix=False, memory=None, event_ids=None, hashes=None,
+                                previous_hashes=None, result=None):
     """
-    Extracts dialogue texts from an ASS/SSA file and returns them as a list.
+    Yields the clean dialogue lines of a parsed ASS stream, in order.
+
+    Args:
+        events (iterable): Items produced by `ass_document.iter_ass_events`.
+        add_prefix (bool): If True, prepends the line ID followed by '-'.
+        memory (TranslationMemory): Optional translation memory. Lines that
+                                    already have a stored translation are not
+                                    emitted, but still consume their line ID.
+        event_ids (list): Optional list that receives, for every translatable
+                          event, the ID of its unique line. When given, every
+                          unique clean text is emitted only once.
+        hashes (list): Optional list that receives the content hash of every line ID.
+        previous_hashes (set): Optional content hashes of a previous release.
+                               Lines found in it are not emitted.
+        result (ProcessResult): Optional result that receives the counters.
+
+    Yields:
+        str: The extracted lines.
+    """
+    if result is None:
+        result = ProcessResult()
+    if previous_hashes is not None and hashes is None:
+        hashes = []
+    line_counter = 0 # <--- Initialize the line counter here
+    unique_ids = {}  # normalized text -> unique line ID (deduplicated mode)
+
+    for event in events:
+        if not isinstance(event, Dialogue):
+            continue
+        result.events_read += 1
+
+        # ASS formatting tags (e.g., {\an5}, {\b1}) are split off by the
+        # tokenizer in a single scan of the Text field. Drawings, empty
+        # karaoke carriers and templater effects are skipped here and in the
+        # replacers alike, so the line IDs stay aligned.
+        if event.is_translatable():
+            clean_text = event.clean_text()
+
+            # Duplicate layers (glow, shadow, karaoke copies) only point
+            # to the unique line they repeat.
+            if event_ids is not None:
+                key = normalize_source_text(clean_text)
+                if key in unique_ids:
+                    event_ids.append(unique_ids[key])
+                    continue
+                unique_ids[key] = line_counter + 1
+                event_ids.append(line_counter + 1)
+
+            # 1. Increase counter for every valid dialogue line found.
+            # Every line consumes its ID, even when it is not emitted below,
+            # so the IDs do not depend on the translation memory's content.
+            line_counter += 1 # <--- Increment the counter
+
+            if hashes is not None:
+                line_hash = content_hash(clean_text)
+                hashes.append(line_hash)
+                # Unchanged lines reuse the previous release's translation.
+                if previous_hashes is not None and line_hash in previous_hashes:
+                    continue
+
+            # Lines already known to the translation memory are filled in
+            # from the cache by replace_ass_dialogues.
+            if memory is not None and clean_text in memory:
+                result.from_memory += 1
+                continue
+            
+            # 2. Apply the optional prefix logic here
+            if add_prefix: 
+                # Use the counter value in the prefix
+                prefix = f"{line_counter}-" # <--- Use f-string to create sequential prefix
+                yield prefix + clean_text
+            else:
+                yield clean_text
+        else:
+            result.skipped += 1
+
+def extract_dialogue_text_from_ass(ass_file_path, add_prefix=False, memory_path=None, index_path=None,
+                                   manifest_path=None, previous_manifest_path=None):
+    """
+    Extracts dialogue texts from an ASS/SSA file.
 
     Args:
         ass_file_path (str): The full path to the ASS file.
         add_prefix (bool): If True, prepends the line number followed by '-' 
                            (e.g., '1-', '2-') to every extracted line.
+        memory_path (str): Optional path to a translation memory database.
+                           Lines that already have a stored translation are
+                           not emitted; they still consume their ID, and the
+                           '<ID>-' prefixes are always written, so the IDs do
+                           not depend on what the memory holds.
+        index_path (str): Optional path of a sidecar index. When given, every
+                          unique clean text is emitted only once and the index
+                          maps each Dialogue event to the ID of its unique line.
+        manifest_path (str): Optional path of a manifest recording the content
+                             hash of every extracted line, by line ID.
+        previous_manifest_path (str): Optional manifest of a previous release.
+                             Only the lines whose content hash is not in it are
+                             emitted; they always keep their '<ID>-' prefix so
+                             the translations can be merged by replace_ass_dialogues.
 
     Returns:
-        list: A list of strings, where each string is a clean dialogue line.
+        ProcessResult: `lines` holds the clean dialogue lines; the counters
+                       tell how many events were read, skipped (no text) or
+                       already known to the translation memory.
+
+    Raises:
+        MissingFileError: If the ASS file (or the previous manifest) does not exist.
+        ProcessingError: If the file cannot be processed.
     """
-    dialogue_texts = []
-    line_counter = 0 # <--- Initialize the line counter here
+    result = ProcessResult(ass_file_path, lines=[])
+    event_ids = [] if index_path else None
+    hashes = [] if manifest_path else None
     
+    memory = None
+    try:
+        previous_hashes = None
+        if previous_manifest_path:
+            previous_hashes = set(read_manifest(previous_manifest_path))
+            hashes = [] if hashes is None else hashes
+            # Only some IDs are emitted, so they must stay visible.
+            add_prefix = True
+
+        if memory_path:
+            memory = TranslationMemory(memory_path)
+            add_prefix = True
+
+        # The shared streaming parser reads the file once and locates the
+        # Text field using the 'Format:' line of the [Events] section.
+        events = stage('parse', read_ass_events(ass_file_path))
+        result.lines.extend(iter_dialogue_text_from_ass(events, add_prefix, memory, event_ids, hashes,
+                                                        previous_hashes, result))
+
+        if index_path:
+            write_dedupe_index(index_path, event_ids, ass_file_path)
+        if manifest_path:
+            write_manifest(manifest_path, hashes, ass_file_path)
+
+        return result
+
+    except FileNotFoundError as e:
+        raise MissingFileError(f"File not found at {e.filename or ass_file_path}") from e
+    except Exception as e:
+        raise ProcessingError(f"Error processing file {ass_file_path}: {e}") from e
+    finally:
+        if memory is not None:
+            memory.close()
+
+def extract_dialogue_text_from_ass_data(ass_data, add_prefix=False):
+    """
+    Extracts dialogue texts from in-memory ASS/SSA content, without touching
+    the disk (e.g. for an upload that is already in memory).
+
+    Args:
+        ass_data (str, bytes or iterable): The ASS content as text, raw bytes
+                           (the encoding is detected as for files) or lines.
+        add_prefix (bool): If True, prepends the line number followed by '-'.
+
+    Returns:
+        ProcessResult: `lines` holds the clean dialogue lines, as returned
+                       by extract_dialogue_text_from_ass.
+
+    Raises:
+        InvalidInputError: If the bytes cannot be decoded.
+        ProcessingError: If the content cannot be processed.
+    """
+    result = ProcessResult(lines=[])
+    lines, _ = read_subtitle_data(ass_data)
     try:
-        # Open the file with UTF-8 encoding
-        with open(ass_file_path, 'r', encoding='utf-8') as f:
-            for line in f:
-                line = line.strip()
-                if line.startswith('Dialogue:'):
-                    # Standard ASS/SSA format: text is the 10th part (index 9)
-                    # after splitting by comma, allowing commas in the text itself.
-                    parts = line.split(',', 9)
-                    
-                    if len(parts) == 10:
-                        raw_text = parts[9].strip()
-                        
-                        # Remove ASS formatting tags (e.g., {\an5}, {\b1})
-                        # which are enclosed in curly braces {}.
-                        clean_text = re.sub(r'\{[^}]*\}', '', raw_text)
-                        
-                        if clean_text:
-                            # 1. Increase counter for every valid dialogue line found
-                            line_counter += 1 # <--- Increment the counter
-                            
-                            # 2. Apply the optional prefix logic here
-                            if add_prefix: 
-                                # Use the counter value in the prefix
-                                prefix = f"{line_counter}-" # <--- Use f-string to create sequential prefix
-                                dialogue_texts.append(prefix + clean_text)
-                            else:
-                                dialogue_texts.append(clean_text)
-        
-        return dialogue_texts
-
-    except FileNotFoundError:
-        return [f"ERROR: File not found at {ass_file_path}"]
+        events = stage('parse', iter_ass_events(lines))
+        result.lines.extend(iter_dialogue_text_from_ass(events, add_prefix, result=result))
     except Exception as e:
-        return [f"ERROR processing file: {e}"]
\ No newline at end of file
+        raise ProcessingError(f"Error processing ASS content: {e}") from e
+    return result
@@ -1,9 +1,288 @@
 # ass_replacer.py
 
 import os
-import re
 
-def replace_ass_dialogues(ass_file_path, translation_file_path):
+from ass_document import Dialogue, iter_ass_events
+from dedupe_index import read_dedupe_index
+from event_manifest import content_hash, map_translations_by_hash, read_manifest
+from profiling import stage
+from results import InvalidInputError, MissingFileError, ProcessingError, ProcessResult
+from subtitle_io import (format_output_data, open_output, open_subtitle, output_encoding, read_subtitle_data,
+                         write_joined_lines)
+from prefix_remover import split_line_prefix
+from translation_memory import TranslationMemory
+
+def parse_translation_lines(lines, report_gaps=True, result=None, require_ids=False):
+    """
+    Builds the ID -> translation mapping used by the replacers.
+
+    If most non-empty lines carry a sequential prefix (e.g., '12-' as written
+    by extract_dialogue_text_from_ass(add_prefix=True)), the prefixes are used
+    as IDs, so a missing or reordered line cannot shift the following ones.
+    Gaps, duplicates and out-of-order IDs are reported; lines without a prefix
+    (e.g. edited by hand) are reported with their line number and not used.
+    Otherwise the non-empty lines are numbered by position, as before; a
+    prefix is only removed when its number is the line's own position, so
+    a translation that starts with e.g. '2-3' keeps its text.
+
+    Args:
+        lines (iterable): The lines of the translation file.
+        report_gaps (bool): If False, missing IDs are not reported (used when
+                            the file only holds the lines of an incremental run).
+        result (ProcessResult): Optional result that collects the warnings.
+        require_ids (bool): If True, a file that would be matched by position
+                            is refused (used when the extraction left lines out,
+                            so positions no longer match the events).
+
+    Returns:
+        dict: 1-based line ID -> translated text.
+
+    Raises:
+        InvalidInputError: If `require_ids` is set and most lines have no ID prefix.
+    """
+    if result is None:
+        result = ProcessResult()
+    # (translation file line number, line ID or None, text, whole line) of every non-empty line.
+    keyed = [(line_number,) + split_line_prefix(line.strip()) + (line.strip(),)
+             for line_number, line in enumerate(lines, 1) if line.strip()]
+    unprefixed = [line_number for line_number, line_id, _, _ in keyed if line_id is None]
+
+    if not keyed or len(unprefixed) * 2 >= len(keyed):
+        if require_ids and keyed:
+            raise InvalidInputError(f"{len(unprefixed)} of {len(keyed)} translation line(s) have no '<ID>-' prefix. "
+                                    "The extraction left some lines out, so the translations cannot be "
+                                    "matched by position; keep the prefixes written by extract_ass.")
+        # Only a prefix that is the line's own ID is one; '2-3 روز' on line 5 is text.
+        translations = {position: text if line_id == position else line
+                        for position, (_, line_id, text, line) in enumerate(keyed, 1)}
+        removed = sum(1 for position, (_, line_id, _, _) in enumerate(keyed, 1) if line_id == position)
+        if removed:
+            result.warn(f"{removed} translation line(s) start with their ID prefix although most lines do not. "
+                        "Lines are matched by position and these prefixes are removed.")
+        return translations
+
+    if unprefixed:
+        shown = ", ".join(str(line_number) for line_number in unprefixed[:20])
+        more = f" (and {len(unprefixed) - 20} more)" if len(unprefixed) > 20 else ""
+        result.warn(f"Translation file line(s) {shown}{more} have no ID prefix and were ignored.")
+
+    translations = {}
+    previous_id = 0
+    for line_number, line_id, text, _ in keyed:
+        if line_id is None:
+            continue
+        if line_id in translations:
+            result.warn(f"Duplicate translation for line {line_id} (translation file line {line_number}). Keeping the first one.")
+            continue
+        if line_id < previous_id:
+            result.warn(f"Translation for line {line_id} is out of order (after line {previous_id}).")
+        previous_id = line_id
+        if not text.strip():
+            result.warn(f"Translation for line {line_id} is empty.")
+            continue
+        translations[line_id] = text
+
+    gaps = [line_id for line_id in range(1, max(translations, default=0)) if line_id not in translations]
+    if gaps and report_gaps:
+        shown = ", ".join(str(line_id) for line_id in gaps[:20])
+        more = f" (and {len(gaps) - 20} more)" if len(gaps) > 20 else ""
+        result.warn(f"No translation for line ID(s) {shown}{more}.")
+
+    return translations
+
+def iter_replaced_events(events, translations, memory=None, event_ids=None, previous=None, merged=None,
+                         result=None):
+    """
+    Matches the translatable Dialogue events of a parsed ASS stream with
+    `translations`, in order.
+
+    Events without any dialogue text (the ones `extract_dialogue_text_from_ass`
+    skips) do not consume a translation, so the two stay aligned.
+
+    Args:
+        events (iterable): Items produced by `ass_document.iter_ass_events`.
+        translations (dict): 1-based line ID -> translated line, as returned by
+            `parse_translation_lines`. A list is accepted and numbered by position.
+        memory (TranslationMemory): Optional translation memory. It only fills
+            the events whose ID has no line in `translations`; every event
+            consumes its ID either way. The pairs matched by ID in
+            `translations` are recorded once the stream has been fully
+            consumed; a source the memory already translates differently
+            keeps its stored translation and is reported.
+        event_ids (list): Optional line-to-unique-ID index written by a
+            deduplicated extraction. When given, `translations` holds one line
+            per unique text and every event is expanded through the index.
+        previous (dict): Optional content hash -> translation mapping of a
+            previous release (see `event_manifest`). Lines missing from
+            `translations` fall back to it when their text did not change.
+        merged (dict): Optional dict that receives the line ID -> translation
+            mapping actually used, so it can be saved for the next release.
+        result (ProcessResult): Optional result that receives the counters
+            and the warnings (missing and extra translations).
+
+    Yields:
+        tuple: (item, tags, translated_text) for every input item. For lines
+               that are not replaced (non-dialogue lines, events without text
+               or without a translation) `tags` and `translated_text` are None;
+               otherwise `tags` holds the original override blocks, which are
+               placed at the beginning of the new text.
+    """
+    if not isinstance(translations, dict):
+        translations = dict(enumerate(translations, 1))
+    if result is None:
+        result = ProcessResult()
+
+    translation_index = 0
+    used_ids = set()
+    # New pairs are only written at the end, so a line repeated inside this
+    # file still consumes its own translation, exactly as it was extracted.
+    new_pairs = []
+
+    for event in events:
+        if not isinstance(event, Dialogue):
+            # Preserve non-dialogue lines (e.g., [Script Info], [V4+ Styles], etc.).
+            yield event, None, None
+            continue
+        result.events_read += 1
+
+        if not event.is_translatable():
+            result.skipped += 1
+            yield event, None, None
+            continue
+
+        if event_ids is None:
+            translation_id = translation_index + 1
+        elif translation_index < len(event_ids):
+            translation_id = event_ids[translation_index]
+        else:
+            translation_id = None
+        translation_index += 1
+
+        # The TXT translation of the ID comes first; the previous release and
+        # the translation memory only fill the IDs it does not have.
+        translated_text = translations.get(translation_id)
+        from_memory = False
+        if translated_text is None and previous:
+            translated_text = previous.get(content_hash(event.clean_text()))
+        if translated_text is None and memory is not None:
+            translated_text = memory.lookup(event.clean_text())
+            from_memory = translated_text is not None
+        if translated_text is not None:
+            if merged is not None:
+                merged[translation_id] = translated_text
+            result.replaced += 1
+            yield event, "".join(event.tags()), translated_text
+            if from_memory:
+                result.from_memory += 1
+            if translation_id in translations:
+                used_ids.add(translation_id)
+                if memory is not None:
+                    stored = memory.lookup(event.clean_text())
+                    if stored is None:
+                        new_pairs.append((event.clean_text(), translated_text))
+                    elif stored != translated_text:
+                        result.warn(f"The translation memory already holds a different translation of line "
+                                    f"{translation_id}. The stored one was kept.")
+        else:
+            # If the number of translations is less than the dialogues, keep the original line.
+            result.missing += 1
+            result.warn(f"Missing translation for dialogue line {event.number} (ID {translation_id}). Keeping original text.")
+            yield event, None, None
+
+    if len(used_ids) < len(translations):
+        result.extra += len(translations) - len(used_ids)
+        result.warn(f"{len(translations) - len(used_ids)} extra translation line(s) were ignored.")
+
+    if new_pairs:
+        memory.record_many(new_pairs)
+
+def iter_replaced_lines(events, translations, memory=None, event_ids=None, previous=None, merged=None,
+                        result=None):
+    """
+    Replaces the text of the translatable Dialogue events of a parsed ASS
+    stream with `translations`. See `iter_replaced_events` for the arguments.
+
+    Yields:
+        str: The output lines, without trailing newlines.
+    """
+    for event, tags, translated_text in iter_replaced_events(events, translations, memory, event_ids,
+                                                             previous, merged, result):
+        if translated_text is not None:
+            # The original formatting tags are placed at the beginning of the
+            # new text. This ensures that styling is preserved.
+            yield event.header + tags + translated_text
+        elif isinstance(event, Dialogue):
+            yield event.line
+        else:
+            yield event
+
+def load_replacement_inputs(translation_file_path, index_path=None, report_gaps=True, result=None,
+                            source_path=None, require_ids=False):
+    """
+    Reads the translation file and the optional deduplication index. When
+    `source_path` is given, the index must have been built from that file.
+    See `parse_translation_lines` for `report_gaps` and `require_ids`.
+
+    Returns:
+        tuple: (translations dict, event IDs or None).
+
+    Raises:
+        MissingFileError: If the translation file or the index does not exist.
+        InvalidInputError: If one of them cannot be read, or if `require_ids`
+                           is set and the translations have no ID prefixes.
+    """
+    try:
+        with open_subtitle(translation_file_path) as f:
+            translations = parse_translation_lines(f, report_gaps, result, require_ids)
+    except FileNotFoundError as e:
+        raise MissingFileError(f"Translation file not found at {translation_file_path}") from e
+    except InvalidInputError as e:
+        raise InvalidInputError(f"Translation file {translation_file_path}: {e}") from e
+    except Exception as e:
+        raise InvalidInputError(f"Could not read translation file {translation_file_path}: {e}") from e
+
+    event_ids = None
+    if index_path:
+        try:
+            event_ids = read_dedupe_index(index_path, source_path)
+        except FileNotFoundError as e:
+            raise MissingFileError(f"Index file not found at {index_path}") from e
+        except Exception as e:
+            raise InvalidInputError(f"Could not read index file {index_path}: {e}") from e
+
+    return translations, event_ids
+
+def load_previous_translations(previous_manifest_path, previous_translation_path):
+    """
+    Loads the translations of a previous release keyed by source content hash.
+
+    Returns:
+        dict: content hash -> translation.
+
+    Raises:
+        MissingFileError: If the manifest or the translation file does not exist.
+        InvalidInputError: If one of them cannot be read.
+    """
+    try:
+        hashes = read_manifest(previous_manifest_path)
+    except FileNotFoundError as e:
+        raise MissingFileError(f"Manifest file not found at {previous_manifest_path}") from e
+    except Exception as e:
+        raise InvalidInputError(f"Could not read manifest file {previous_manifest_path}: {e}") from e
+
+    translations, _ = load_replacement_inputs(previous_translation_path, report_gaps=False)
+    return map_translations_by_hash(hashes, translations)
+
+def write_merged_translations(output_file_path, merged):
+    """
+    Saves the merged ID -> translation mapping of an incremental run as a
+    prefixed TXT file, ready to be the 'previous translations' of the next one.
+    """
+    with open_output(output_file_path) as outfile:
+        write_joined_lines(outfile, (f"{line_id}-{text}" for line_id, text in sorted(merged.items())))
+
+def replace_ass_dialogues(ass_file_path, translation_file_path, memory_path=None, index_path=None,
+                          previous_manifest_path=None, previous_translation_path=None):
     """
     Reads Persian translations from a TXT file and replaces the dialogue text 
     in the ASS file, preserving all formatting and timing information.
@@ -11,85 +290,116 @@ def replace_ass_dialogues(ass_file_path, translation_file_path):
     Args:
         ass_file_path (str): The full path to the original ASS file.
         translation_file_path (str): The full path to the TXT file containing the translations (one dialogue per line).
+                                     Lines may keep their '1-', '2-', ... prefixes, which
+                                     are then used to match each event by ID.
+        memory_path (str): Optional path to a translation memory database. Lines
+                           whose ID is missing from the TXT file are filled from
+                           it, and the new source -> translation pairs are
+                           recorded in it. The TXT file must keep its '<ID>-'
+                           prefixes.
+        index_path (str): Optional sidecar index written by a deduplicated
+                          extraction. The TXT file then holds one translation per
+                          unique line, which is expanded to every matching event.
+        previous_manifest_path (str): Optional manifest of the previous release,
+                          together with `previous_translation_path` (its translation
+                          file). The TXT file then only needs the lines emitted by an
+                          incremental extraction, with their '<ID>-' prefixes; unchanged
+                          lines reuse the previous translations. The merged translations are saved as
+                          '<name>_translated_merged.txt' for the next release.
 
     Returns:
-        str: Path to the newly created ASS file or an error message.
+        ProcessResult: `output_path` is the newly created ASS file; the
+                       counters and warnings describe the replacement.
+
+    Raises:
+        MissingFileError: If an input file does not exist.
+        InvalidInputError: If an input file cannot be read, or if a translation
+                           memory or a previous release is used and the TXT
+                           file has no ID prefixes.
+        ProcessingError: If the ASS file cannot be processed or written.
     """
     
+    incremental = bool(previous_manifest_path and previous_translation_path)
+    result = ProcessResult(ass_file_path)
+
     # 1. Read Translation Texts (Persian)
-    try:
-        with open(translation_file_path, 'r', encoding='utf-8') as f:
-            translations = [line.strip() for line in f if line.strip()]
-    except FileNotFoundError:
-        return f"ERROR: Translation file not found at {translation_file_path}"
-    except Exception as e:
-        return f"ERROR reading translation file: {e}"
+    # With a memory, the IDs it fills are expected to be missing from the TXT
+    # file; the lines neither of them has are reported as missing below.
+    translations, event_ids = load_replacement_inputs(translation_file_path, index_path,
+                                                      report_gaps=not (incremental or memory_path), result=result,
+                                                      source_path=ass_file_path, require_ids=incremental or bool(memory_path))
 
-    # 2. Process ASS File and Replace Dialogues
-    output_lines = []
-    translation_index = 0
-    dialogue_counter = 0
+    previous = merged = None
+    if incremental:
+        previous = load_previous_translations(previous_manifest_path, previous_translation_path)
+        merged = {}
 
+    # 2. Process ASS File and Replace Dialogues
+    memory = None
     try:
-        with open(ass_file_path, 'r', encoding='utf-8') as f:
-            for line in f:
-                line = line.strip('\n') # Preserve line breaks for output consistency
-                
-                if line.startswith('Dialogue:'):
-                    dialogue_counter += 1
-                    
-                    # Split the line into 10 parts (the dialogue text is at index 9)
-                    parts = line.split(',', 9)
-                    
-                    if len(parts) == 10:
-                        # Dialogue information section (before the text content)
-                        dialogue_info = parts[0:9]
-                        
-                        # The original (English) text content
-                        english_text = parts[9].strip()
-                        
-                        # Extract ASS formatting tags from the original text
-                        # (e.g., {\an5} or color tags) to be placed in the new translated text.
-                        # This ensures that styling is preserved.
-                        format_tags = re.findall(r'\{[^}]*\}', english_text)
-                        
-                        
-                        if translation_index < len(translations):
-                            persian_text = translations[translation_index]
-                            
-                            # Add the extracted tags to the beginning of the new Persian text
-                            # This assumes the tags should remain at the start of the text.
-                            new_text = "".join(format_tags) + persian_text
-                            
-                            # Reconstruct the new dialogue line
-                            new_line = ",".join(dialogue_info) + "," + new_text
-                            output_lines.append(new_line)
-                            
-                            translation_index += 1
-                        else:
-                            # If the number of translations is less than the dialogues, keep the original line.
-                            output_lines.append(line)
-                            print(f"Warning: Missing translation for dialogue line {dialogue_counter}. Keeping original text.")
-                    else:
-                        # If the dialogue line does not have the standard structure, keep it unchanged.
-                        output_lines.append(line)
-                else:
-                    # Preserve non-dialogue lines (e.g., [Script Info], [V4+ Styles], etc.).
-                    output_lines.append(line)
-        
-        if translation_index < len(translations):
-             print(f"Warning: {len(translations) - translation_index} extra translation line(s) were ignored.")
-
-        # 3. Save the new ASS file
+        if memory_path:
+            memory = TranslationMemory(memory_path)
+
         base_name, ext = os.path.splitext(ass_file_path)
         output_file_path = base_name + "_Persian" + ext
-        
-        with open(output_file_path, 'w', encoding='utf-8') as outfile:
-            outfile.write('\n'.join(output_lines))
-            
-        return output_file_path
-
-    except FileNotFoundError:
-        return f"ERROR: Original ASS file not found at {ass_file_path}"
+
+        # 3. Stream the new ASS file: every line is written as soon as it is
+        # replaced, so memory use does not depend on the size of the file.
+        # The input is opened first, so a missing file creates no output.
+        # Unicode encodings (e.g. UTF-16 with BOM) are written back unchanged.
+        with open_subtitle(ass_file_path) as infile, \
+             open_output(output_file_path, output_encoding(infile.encoding)) as outfile:
+            events = stage('parse', iter_ass_events(infile))
+            write_joined_lines(outfile, stage('replace', iter_replaced_lines(events, translations, memory, event_ids,
+                                                                             previous, merged, result)))
+
+        if incremental:
+            write_merged_translations(base_name + "_translated_merged.txt", merged)
+
+        result.output_path = output_file_path
+        return result
+
+    except FileNotFoundError as e:
+        raise MissingFileError(f"Original ASS file not found at {ass_file_path}") from e
+    except Exception as e:
+        raise ProcessingError(f"An unexpected error occurred during processing: {e}") from e
+    finally:
+        if memory is not None:
+            memory.close()
+
+def replace_ass_dialogues_data(ass_data, translations):
+    """
+    Replaces the dialogue of in-memory ASS/SSA content with translations,
+    without touching the disk. Formatting and timing are preserved as by
+    replace_ass_dialogues.
+
+    Args:
+        ass_data (str, bytes or iterable): The original ASS content as text,
+                           raw bytes (the encoding is detected as for files) or lines.
+        translations (str, bytes, iterable or dict): The content of a translation
+                           file (one dialogue per line, '1-', '2-', ... prefixes are
+                           used as IDs), or an ID -> translation dict.
+
+    Returns:
+        ProcessResult: `output` holds the new ASS content in the shape of
+                       `ass_data`: str, bytes (in the encoding a file would be
+                       written in) or a lazy iterator of lines, whose counters
+                       and warnings are only complete once it is consumed.
+
+    Raises:
+        InvalidInputError: If the bytes cannot be decoded.
+        ProcessingError: If the content cannot be processed.
+    """
+    result = ProcessResult()
+    if not isinstance(translations, dict):
+        translation_lines, _ = read_subtitle_data(translations)
+        translations = parse_translation_lines(translation_lines, result=result)
+
+    lines, encoding = read_subtitle_data(ass_data)
+    try:
+        events = stage('parse', iter_ass_events(lines))
+        result.output = format_output_data(stage('replace', iter_replaced_lines(events, translations, result=result)),
+                                           ass_data, encoding)
     except Exception as e:
-        return f"An unexpected error occurred during processing: {e}"
\ No newline at end of file
+        raise ProcessingError(f"An unexpected error occurred during processing: {e}") from e
+    return result
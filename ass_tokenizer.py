@@ -0,0 +1,144 @@
+# ass_tokenizer.py
+
+import re
+
+# Token kinds produced by `iter_tokens`.
+TAG = 'tag'      # An override block, e.g. {\an8\pos(10,20)}
+BREAK = 'break'  # A hard (\N) or soft (\n) line break, or a hard space (\h)
+TEXT = 'text'    # Plain dialogue text between the other tokens
+
+LINE_BREAK = r'\N'
+
+# One precompiled pattern for everything the tools care about inside a Text
+# field. The text is scanned left to right exactly once per call.
+TOKEN_PATTERN = re.compile(r'\{[^}]*\}|\\[Nnh]')
+
+# Capturing split on override blocks only: returns the alternating
+# [text, tag, text, tag, ..., text] pieces in a single C-level scan.
+_OVERRIDE_SPLIT_PATTERN = re.compile(r'(\{[^}]*\})')
+
+def iter_tokens(text):
+    """
+    Tokenizes the Text field of an ASS Dialogue line in one left-to-right scan.
+
+    Args:
+        text (str): The raw Text field.
+
+    Yields:
+        tuple: (kind, value) where kind is TAG, BREAK or TEXT. Concatenating
+               the values gives back the original text.
+    """
+    position = 0
+    for match in TOKEN_PATTERN.finditer(text):
+        start = match.start()
+        if start > position:
+            yield TEXT, text[position:start]
+        value = match.group()
+        yield (TAG if value[0] == '{' else BREAK), value
+        position = match.end()
+    if position < len(text):
+        yield TEXT, text[position:]
+
+def split_override_blocks(text):
+    """
+    Splits a Text field into plain-text and override-block pieces.
+
+    This is the fast path used by the parser: pieces at even positions are
+    plain text (line breaks included) and pieces at odd positions are
+    override blocks. The first piece is '' when the text starts with a block.
+
+    Args:
+        text (str): The raw Text field.
+
+    Returns:
+        list: The alternating pieces.
+    """
+    return _OVERRIDE_SPLIT_PATTERN.split(text)
+
+# Kinds of Dialogue events, see `classify_text`.
+EVENT_TEXT = 'text'          # Carries dialogue text
+EVENT_EMPTY = 'empty'        # Only override blocks, comments, line breaks or spaces
+EVENT_DRAWING = 'drawing'    # Only vector drawing commands (\p1 and above)
+EVENT_KARAOKE = 'karaoke'    # Karaoke timing tags (\k, \kf, \ko, \K) over empty syllables
+EVENT_EFFECT = 'effect'      # A line generated by a karaoke templater (Effect 'fx', ...)
+
+# Effect field values of lines that hold generated effects rather than text.
+NON_TEXT_EFFECTS = ('fx', 'template', 'code')
+
+# \p<scale> switches drawing mode on (1 and above) or off (0). \pos and
+# \pbo do not match, as a digit must follow the 'p'.
+_DRAWING_MODE_PATTERN = re.compile(r'\\p(\d+)')
+_DRAWING_ON_PATTERN = re.compile(r'\\p0*[1-9]')
+_KARAOKE_PATTERN = re.compile(r'\{[^}]*\\(?:k[fo]?|K)\d')
+# Matches a whole text that shows nothing: override blocks, line breaks,
+# hard spaces and whitespace. It stops at the first visible character.
+_BLANK_TEXT_PATTERN = re.compile(r'(?:\{[^}]*\}|\\[Nnh]|\s)*')
+
+def has_drawing_mode(text):
+    """True if an override block of `text` switches drawing mode on."""
+    # The substring test rules out most lines before the regex runs.
+    return '\\p' in text and _DRAWING_ON_PATTERN.search(text) is not None
+
+def text_pieces_outside_drawings(pieces):
+    """
+    Returns the plain-text pieces of `split_override_blocks` output that are
+    not vector drawing commands. Drawing mode starts at an override block
+    with \\p1 (or any other non-zero scale) and ends at \\p0.
+    """
+    texts = [pieces[0]]
+    drawing = False
+    for index in range(1, len(pieces), 2):
+        scales = _DRAWING_MODE_PATTERN.findall(pieces[index])
+        if scales:
+            drawing = int(scales[-1]) != 0
+        if not drawing:
+            texts.append(pieces[index + 1])
+    return texts
+
+def classify_text(text, effect=''):
+    """
+    Classifies a Dialogue event from the tag stream of its Text field.
+
+    Plain dialogue costs a scan up to its first visible character plus a
+    search for drawing tags; the text is only tokenized when it contains
+    a drawing.
+
+    Args:
+        text (str): The raw Text field.
+        effect (str): The Effect field of the event.
+
+    Returns:
+        str: EVENT_TEXT, or why the event has no text to translate:
+             EVENT_EFFECT, EVENT_DRAWING, EVENT_KARAOKE or EVENT_EMPTY.
+    """
+    if effect:
+        words = effect.split(';', 1)[0].split()
+        if words and words[0].lower() in NON_TEXT_EFFECTS:
+            return EVENT_EFFECT
+    if '\\p' in text and _DRAWING_ON_PATTERN.search(text) is not None:
+        visible = ''.join(text_pieces_outside_drawings(split_override_blocks(text)))
+        return EVENT_TEXT if _BLANK_TEXT_PATTERN.fullmatch(visible) is None else EVENT_DRAWING
+    if _BLANK_TEXT_PATTERN.fullmatch(text) is None:
+        return EVENT_TEXT
+    if _KARAOKE_PATTERN.search(text):
+        return EVENT_KARAOKE
+    return EVENT_EMPTY
+
+def leading_override_block(text, start=0):
+    """
+    Returns the override block that `text[start:]` begins with, or ''.
+
+    Args:
+        text (str): A Text field, or a whole Dialogue line with `start`
+                    pointing at its Text field.
+        start (int): Where the scan starts.
+
+    Returns:
+        str: The leading block (e.g., '{\\an8}'), or '' if there is none.
+    """
+    if not text.startswith('{', start):
+        return ''
+    end = text.find('}', start)
+    if end == -1:
+        return ''
+    return text[start:end + 1]
\ No newline at end of file
@@ -0,0 +1,208 @@
+# batch_runner.py
+
+import argparse
+import glob
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from ass_parser import extract_dialogue_text_from_ass
+from srt_parser import save_dialogue_text_from_srt
+from ass_replacer import replace_ass_dialogues
+from srt_replacer import replace_srt_dialogues
+from rtl_fixer import process_rtl_file
+from prefix_remover import remove_line_prefixes
+from dedupe_index import default_index_path
+from event_export import EXPORT_FORMATS, export_ass_events
+from pipeline import run_pipeline
+from profiling import profile_command
+from results import SubtitleToolError
+from subtitle_io import is_tool_output, save_extracted_texts, set_normalize_to_utf8
+
+# File extensions picked up from directories for every batch command.
+BATCH_EXTENSIONS = {
+    'extract_ass': ('.ass', '.ssa'),
+    'extract_srt': ('.srt',),
+    'replace_ass': ('.ass', '.ssa'),
+    'replace_srt': ('.srt',),
+    'pipeline': ('.ass', '.ssa', '.srt'),
+    'RTL': ('.txt', '.srt', '.ass'),
+    'remove_prefix': ('.txt',),
+    'export_events': ('.ass', '.ssa'),
+}
+
+DEFAULT_TRANSLATION_SUFFIX = "_translated.txt"
+
+def collect_files(targets, extensions, recursive=False):
+    """
+    Expands directories and glob patterns into a sorted list of files.
+    Files written by the tool itself ('*_Persian.ass', '*_extracted.txt', ...,
+    see `subtitle_io.OUTPUT_SUFFIXES`) are skipped there, so running the same
+    batch twice does not pick up the first run's output. Files named
+    explicitly are always kept.
+
+    Args:
+        targets (list): Files, directories or glob patterns.
+        extensions (tuple): Lower-case extensions kept when scanning directories.
+        recursive (bool): If True, directories are scanned recursively.
+
+    Returns:
+        list: Unique file paths in a stable order.
+    """
+    found = []
+    for target in targets:
+        if os.path.isdir(target):
+            if recursive:
+                candidates = [os.path.join(root, name)
+                              for root, _, names in os.walk(target) for name in names]
+            else:
+                candidates = [os.path.join(target, name) for name in os.listdir(target)]
+            found.extend(path for path in candidates
+                         if os.path.isfile(path) and os.path.splitext(path)[1].lower() in extensions
+                         and not is_tool_output(path))
+        elif os.path.isfile(target):
+            found.append(target)
+        else:
+            found.extend(path for path in glob.glob(target, recursive=recursive)
+                         if os.path.isfile(path) and not is_tool_output(path))
+    return sorted(set(found))
+
+def run_batch_job(command, path, options):
+    """
+    Runs one batch command on one file. Executed inside a worker process.
+
+    Args:
+        command (str): One of the keys of BATCH_EXTENSIONS.
+        path (str): The file to process.
+        options (dict): The parsed command-line options.
+
+    Returns:
+        tuple: (path, success flag, output path or error message,
+                ProcessResult or None on failure)
+    """
+    with profile_command(command, [path]):
+        return _run_batch_job(command, path, options)
+
+def _run_batch_job(command, path, options):
+    try:
+        index_path = default_index_path(path) if options['dedupe'] else None
+
+        if command in ('extract_ass', 'extract_srt'):
+            if command == 'extract_ass':
+                result = extract_dialogue_text_from_ass(path, options['prefix'], options['memory'], index_path)
+                result.output_path = save_extracted_texts(result.lines, path)
+            else:
+                # Streamed into the output file, in constant memory.
+                result = save_dialogue_text_from_srt(path, options['prefix'])
+            return path, True, result.output_path, result
+
+        if command in ('replace_ass', 'replace_srt', 'pipeline'):
+            translation_path = os.path.splitext(path)[0] + options['translation_suffix']
+            if command == 'replace_ass':
+                result = replace_ass_dialogues(path, translation_path, options['memory'], index_path)
+            elif command == 'replace_srt':
+                result = replace_srt_dialogues(path, translation_path)
+            else:
+                result = run_pipeline(path, translation_path, options['memory'], index_path)
+        elif command == 'RTL':
+            result = process_rtl_file(path, fix_words_flag=options['fix_words'])
+        elif command == 'export_events':
+            result = export_ass_events(path, options['export_format'])
+        else:
+            result = remove_line_prefixes(path)
+
+        return path, True, result.output_path, result
+
+    except SubtitleToolError as e:
+        return path, False, f"ERROR: {e}", None
+    except Exception as e:
+        return path, False, f"ERROR processing file: {e}", None
+
+def build_batch_parser():
+    """Builds the argument parser of the 'batch' command."""
+    parser = argparse.ArgumentParser(
+        prog="cli_tool.py batch",
+        description="Runs a subtitle command over many files in parallel.")
+    parser.add_argument('command', choices=sorted(BATCH_EXTENSIONS))
+    parser.add_argument('targets', nargs='+', help="Files, directories or glob patterns.")
+    parser.add_argument('--jobs', '-j', type=int, default=os.cpu_count() or 1,
+                        help="Number of worker processes (default: all cores).")
+    parser.add_argument('--recursive', '-r', action='store_true',
+                        help="Scan directories and '**' globs recursively.")
+    parser.add_argument('--prefix', action='store_true',
+                        help="extract_ass/extract_srt: prepend '1-', '2-', ... to all lines.")
+    parser.add_argument('--memory', default=None,
+                        help="extract_ass/replace_ass/pipeline: path to a translation memory database.")
+    parser.add_argument('--dedupe', action='store_true',
+                        help="extract_ass/replace_ass/pipeline: extract unique lines once and expand them "
+                             "through the '<name>_extracted_index.json' sidecar index.")
+    parser.add_argument('--fix-words', action='store_true',
+                        help="RTL: enable word order reversal.")
+    parser.add_argument('--translation-suffix', default=DEFAULT_TRANSLATION_SUFFIX,
+                        help="replace_ass/replace_srt/pipeline: translation file name suffix next to each subtitle file "
+                             f"(default: '{DEFAULT_TRANSLATION_SUFFIX}').")
+    parser.add_argument('--format', dest='export_format', choices=EXPORT_FORMATS, default='jsonl',
+                        help="export_events: write '<name>_events.jsonl' (default) or '<name>_events.csv'.")
+    parser.add_argument('--utf8', action='store_true',
+                        help="Write every output as UTF-8 instead of keeping the input's Unicode encoding.")
+    parser.add_argument('--report', default=None,
+                        help="Write the result of every file (counters, warnings, errors) to this JSON file.")
+    return parser
+
+def run_batch(argv):
+    """
+    Entry point of 'python cli_tool.py batch ...'.
+
+    Args:
+        argv (list): The arguments following 'batch'.
+
+    Returns:
+        int: The process exit code (0 if every file succeeded, 1 otherwise).
+    """
+    args = build_batch_parser().parse_args(argv)
+    files = collect_files(args.targets, BATCH_EXTENSIONS[args.command], args.recursive)
+
+    if not files:
+        print("ERROR: No matching files found.")
+        return 1
+
+    options = {
+        'prefix': args.prefix,
+        'memory': args.memory,
+        'dedupe': args.dedupe,
+        'fix_words': args.fix_words,
+        'translation_suffix': args.translation_suffix,
+        'export_format': args.export_format,
+    }
+    if args.utf8:
+        # Set through the environment, so the worker processes inherit it.
+        set_normalize_to_utf8(True)
+    jobs = max(1, min(args.jobs, len(files)))
+    print(f"Running {args.command} on {len(files)} file(s) with {jobs} worker(s)...")
+
+    results = []
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(run_batch_job, args.command, path, options) for path in files]
+        for future in as_completed(futures):
+            path, ok, message, result = future.result()
+            results.append((path, ok, message, result))
+            if ok:
+                print(f"✅ {path} -> {message}")
+                for warning in result.warnings:
+                    print(f"   Warning: {warning}")
+            else:
+                print(f"❌ {path}: {message}")
+
+    failed = sum(1 for _, ok, _, _ in results if not ok)
+    warnings = sum(len(result.warnings) for _, ok, _, result in results if ok)
+    missing = sum(result.missing for _, ok, _, result in results if ok)
+    print(f"\nSummary: {len(results) - failed} succeeded, {failed} failed, {len(results)} total "
+          f"({warnings} warning(s), {missing} missing translation(s)).")
+
+    if args.report:
+        report = [result.to_dict() if ok else {'source_path': path, 'error': message}
+                  for path, ok, message, result in sorted(results, key=lambda item: item[0])]
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Report written to: {args.report}")
+    return 1 if failed else 0
\ No newline at end of file
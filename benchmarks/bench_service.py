@@ -0,0 +1,204 @@
+# benchmarks/bench_service.py
+
+"""
+Measures the throughput of the local HTTP service ('python cli_tool.py
+serve') under parallel clients: for every endpoint and number of clients,
+the requests per second and the latency percentiles. The service runs in
+its own process, the clients are threads of this one. Writes a JSON
+report that can be compared between revisions.
+
+Usage:
+    python benchmarks/bench_service.py [--events 3000] [--clients 1 4 16] [--requests 20]
+                                       [--jobs N] [--output service_report.json]
+                                       [--compare old_service_report.json]
+"""
+
+import argparse
+import http.client
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARK_DIR)
+CLI_TOOL = os.path.join(REPO_DIR, 'cli_tool.py')
+sys.path.insert(0, REPO_DIR)
+
+import corpus  # noqa: E402
+from ass_parser import extract_dialogue_text_from_ass  # noqa: E402
+from ass_replacer import replace_ass_dialogues  # noqa: E402
+from run_benchmarks import git_revision  # noqa: E402
+
+DEFAULT_CLIENTS = (1, 4, 16)
+
+def build_requests(work_dir, events, seed):
+    """
+    Generates an episode and returns the request of every endpoint.
+
+    Returns:
+        list: (name, path, encoded JSON body) tuples.
+    """
+    ass_path = os.path.join(work_dir, "episode.ass")
+    corpus.generate_ass(ass_path, events, seed)
+    translation_path = os.path.join(work_dir, "episode_translated.txt")
+    corpus.generate_translations(translation_path, len(extract_dialogue_text_from_ass(ass_path, True).lines), seed)
+    persian_path = replace_ass_dialogues(ass_path, translation_path).output_path
+
+    def read(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    ass, translations, persian = read(ass_path), read(translation_path), read(persian_path)
+    bodies = [
+        ("extract_ass", "/extract_ass", {'subtitle': ass, 'add_prefix': True}),
+        ("replace_ass", "/replace_ass", {'subtitle': ass, 'translations': translations}),
+        ("rtl[ass]", "/rtl", {'subtitle': persian, 'type': 'ass'}),
+        ("remove_prefix", "/remove_prefix", {'subtitle': translations}),
+    ]
+    return [(name, path, json.dumps(body, ensure_ascii=False).encode('utf-8')) for name, path, body in bodies]
+
+def start_service(jobs):
+    """Starts the service on a free port and returns (process, port)."""
+    command = [sys.executable, CLI_TOOL, 'serve', '--port', '0', '--quiet']
+    if jobs:
+        command += ['--jobs', str(jobs)]
+    process = subprocess.Popen(command, cwd=REPO_DIR, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                               text=True)
+    # First line: 'Serving on http://127.0.0.1:<port> (...)'.
+    line = process.stdout.readline()
+    try:
+        port = int(line.split('http://', 1)[1].split()[0].rsplit(':', 1)[1])
+    except (IndexError, ValueError):
+        process.kill()
+        raise RuntimeError(f"The service did not start: {line!r}")
+    return process, port
+
+def post(port, path, body):
+    """Sends one request and returns its latency in seconds."""
+    start = time.perf_counter()
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=300)
+    try:
+        connection.request('POST', path, body, {'Content-Type': 'application/json'})
+        response = connection.getresponse()
+        response.read()
+        if response.status != 200:
+            raise RuntimeError(f"{path} answered {response.status}")
+    finally:
+        connection.close()
+    return time.perf_counter() - start
+
+def run_clients(port, path, body, clients, requests_per_client):
+    """
+    Runs `clients` threads that each send `requests_per_client` requests,
+    all starting together.
+
+    Returns:
+        tuple: (wall time in seconds, sorted latencies).
+    """
+    barrier = threading.Barrier(clients + 1)
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def client():
+        barrier.wait()
+        try:
+            timings = [post(port, path, body) for _ in range(requests_per_client)]
+        except Exception as e:
+            errors.append(e)
+            return
+        with lock:
+            latencies.extend(timings)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+    if errors:
+        raise errors[0]
+    return wall, sorted(latencies)
+
+def percentile(values, fraction):
+    """Returns the value below which `fraction` of the sorted `values` lie."""
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def compare_reports(old_report, new_report):
+    """Prints the throughput ratio of every case present in both reports."""
+    print(f"\nComparison with {old_report.get('revision')}:")
+    old_results = {(r["case"], r["clients"]): r for r in old_report["results"]}
+    for result in new_report["results"]:
+        old = old_results.get((result["case"], result["clients"]))
+        if old is not None and old["requests_per_s"]:
+            ratio = result["requests_per_s"] / old["requests_per_s"]
+            print(f"  {result['case']:<16} {result['clients']:>3} clients  throughput x{ratio:.2f}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks the local HTTP service under parallel clients.")
+    parser.add_argument('--events', type=int, default=3000, help="Dialogue events of the episode sent.")
+    parser.add_argument('--clients', type=int, nargs='+', default=list(DEFAULT_CLIENTS))
+    parser.add_argument('--requests', type=int, default=20, help="Requests per client and case.")
+    parser.add_argument('--jobs', type=int, default=None, help="Worker threads of the service (default: all cores).")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default="service_report.json")
+    parser.add_argument('--compare', help="A previous report to compare against.")
+    args = parser.parse_args(argv)
+
+    report = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "events": args.events,
+        "jobs": args.jobs,
+        "results": [],
+    }
+
+    work_dir = tempfile.mkdtemp(prefix="subtool_service_")
+    try:
+        requests = build_requests(work_dir, args.events, args.seed)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    process, port = start_service(args.jobs)
+    try:
+        for name, path, body in requests:
+            post(port, path, body)  # Warm-up
+            for clients in args.clients:
+                wall, latencies = run_clients(port, path, body, clients, args.requests)
+                result = {
+                    "case": name,
+                    "clients": clients,
+                    "requests": len(latencies),
+                    "request_bytes": len(body),
+                    "requests_per_s": len(latencies) / wall,
+                    "p50_s": percentile(latencies, 0.5),
+                    "p95_s": percentile(latencies, 0.95),
+                }
+                report["results"].append(result)
+                print(f"{name:<16} {clients:>3} clients  {result['requests_per_s']:8.1f} req/s  "
+                      f"p50 {result['p50_s'] * 1000:8.1f} ms  p95 {result['p95_s'] * 1000:8.1f} ms")
+    finally:
+        process.terminate()
+        process.wait()
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nReport written to: {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            compare_reports(json.load(f), report)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
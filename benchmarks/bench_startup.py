@@ -0,0 +1,158 @@
+# benchmarks/bench_startup.py
+
+"""
+Measures the startup cost of the command line tool: the wall time of
+one-shot 'python cli_tool.py <command> ...' processes on a short subtitle
+file, and the import time of cli_tool and of every command module
+(from 'python -X importtime'). Writes a JSON report that can be compared
+between revisions.
+
+Usage:
+    python benchmarks/bench_startup.py [--repeat 10] [--output startup_report.json]
+                                       [--compare old_startup_report.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARK_DIR)
+CLI_TOOL = os.path.join(REPO_DIR, 'cli_tool.py')
+
+import corpus  # noqa: E402
+from run_benchmarks import git_revision  # noqa: E402
+
+# Modules whose import time is reported on their own, besides cli_tool.
+COMMAND_MODULES = ('ass_parser', 'srt_parser', 'ass_replacer', 'srt_replacer', 'rtl_fixer',
+                   'prefix_remover', 'pipeline', 'translator', 'batch_runner', 'watch_folder',
+                   'event_export', 'archive_runner', 'subtitle_service')
+
+# A short episode: one process per file is the case being measured.
+SHORT_EVENTS = 300
+
+def build_cases(work_dir, seed):
+    """
+    Generates a short ASS and SRT file and returns the one-shot commands to time.
+
+    Returns:
+        list: (name, argv) tuples. The first one is the bare interpreter.
+    """
+    ass_path = os.path.join(work_dir, "short.ass")
+    srt_path = os.path.join(work_dir, "short.srt")
+    ass_lines = corpus.generate_ass(ass_path, SHORT_EVENTS, seed)
+    srt_lines = corpus.generate_srt(srt_path, SHORT_EVENTS, seed)
+    ass_translations = os.path.join(work_dir, "short_ass_translated.txt")
+    srt_translations = os.path.join(work_dir, "short_srt_translated.txt")
+    corpus.generate_translations(ass_translations, ass_lines, seed)
+    corpus.generate_translations(srt_translations, srt_lines, seed)
+
+    python = sys.executable
+    return [
+        ("python -c pass", [python, "-c", "pass"]),
+        ("import cli_tool", [python, "-c", "import cli_tool"]),
+        ("help", [python, CLI_TOOL, "help"]),
+        ("extract_srt", [python, CLI_TOOL, "extract_srt", srt_path, "Y"]),
+        ("extract_ass", [python, CLI_TOOL, "extract_ass", ass_path, "Y"]),
+        ("replace_srt", [python, CLI_TOOL, "replace_srt", srt_translations, srt_path]),
+        ("replace_ass", [python, CLI_TOOL, "replace_ass", ass_translations, ass_path]),
+        ("RTL", [python, CLI_TOOL, "RTL", srt_translations]),
+        ("pipeline", [python, CLI_TOOL, "pipeline", ass_translations, ass_path]),
+    ]
+
+def time_process(argv, repeat):
+    """Runs `argv` `repeat` times and returns the best wall time in seconds."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(argv, cwd=REPO_DIR, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL, check=True)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def import_times(module, repeat):
+    """
+    Returns the cumulative import time of `module` in seconds (best of
+    `repeat` fresh interpreters) and the modules it pulled in.
+    """
+    best = None
+    modules = []
+    for _ in range(repeat):
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=REPO_DIR, capture_output=True, text=True, check=True,
+        )
+        # Lines look like 'import time:   self [us] | cumulative | <indent>name'.
+        entries = []
+        for line in completed.stderr.splitlines():
+            if not line.startswith("import time:") or "[us]" in line:
+                continue
+            _, cumulative, name = line[len("import time:"):].split("|")
+            entries.append((name.strip(), int(cumulative)))
+        total = next(cumulative for name, cumulative in entries if name == module) / 1e6
+        if best is None or total < best:
+            best = total
+            modules = sorted(name for name, _ in entries)
+    return best, modules
+
+def compare_reports(old_report, new_report):
+    """Prints the time ratio of every process and import present in both reports."""
+    print(f"\nComparison with {old_report.get('revision')}:")
+    for section in ("processes", "imports"):
+        old_results = {r["case"]: r for r in old_report[section]}
+        for result in new_report[section]:
+            old = old_results.get(result["case"])
+            if old is not None and old["seconds"]:
+                print(f"  {result['case']:<24} time x{result['seconds'] / old['seconds']:.2f}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks the startup time of the command line tool.")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=10, help="Runs per case; the best one is kept.")
+    parser.add_argument('--output', default="startup_report.json")
+    parser.add_argument('--compare', help="A previous report to compare against.")
+    args = parser.parse_args(argv)
+
+    report = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "events": SHORT_EVENTS,
+        "processes": [],
+        "imports": [],
+    }
+
+    work_dir = tempfile.mkdtemp(prefix="subtool_startup_")
+    try:
+        print("One-shot processes:")
+        for name, command in build_cases(work_dir, args.seed):
+            seconds = time_process(command, args.repeat)
+            report["processes"].append({"case": name, "seconds": seconds})
+            print(f"  {name:<24} {seconds * 1000:8.1f} ms")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print("\nImport time:")
+    for module in ('cli_tool',) + COMMAND_MODULES:
+        seconds, modules = import_times(module, args.repeat)
+        report["imports"].append({"case": module, "seconds": seconds, "modules": modules})
+        print(f"  {module:<24} {seconds * 1000:8.1f} ms  {len(modules):4} modules")
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nReport written to: {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            compare_reports(json.load(f), report)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,133 @@
+# benchmarks/corpus.py
+
+"""
+Deterministic generator of realistic ASS/SRT files for the benchmarks.
+
+The same (events, seed) pair always produces byte-identical files, so reports
+from different revisions can be compared.
+"""
+
+import random
+
+WORDS = (
+    "hello", "there", "what", "yeah", "no", "I", "you", "we", "know", "think",
+    "can't", "believe", "this", "is", "happening", "again", "wait", "for", "me",
+    "captain", "the", "ship", "is", "sinking", "run", "now", "tomorrow", "maybe",
+)
+
+PERSIAN_WORDS = (
+    "سلام", "آره", "نه", "من", "تو", "ما", "می‌دانم", "فکر", "می‌کنم", "این",
+    "دوباره", "صبر", "کن", "کاپیتان", "کشتی", "غرق", "می‌شود", "فردا", "شاید",
+)
+
+STYLES = ("Default", "Italics", "Top", "Sign", "Karaoke")
+
+ASS_HEADER = """[Script Info]
+ScriptType: v4.00+
+PlayResX: 1920
+PlayResY: 1080
+WrapStyle: 0
+
+[V4+ Styles]
+Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding
+""" + "".join(
+    f"Style: {name},Arial,48,&H00FFFFFF,&H000000FF,&H00000000,&H00000000,0,0,0,0,100,100,0,0,1,2,1,2,10,10,10,1\n"
+    for name in STYLES
+) + """
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+"""
+
+def _sentence(rng, words=WORDS):
+    text = " ".join(rng.choice(words) for _ in range(rng.randint(2, 9)))
+    if rng.random() < 0.3:
+        # Commas inside the Text field must not break the field split.
+        text = text.replace(" ", ", ", 1)
+    return text[:1].upper() + text[1:] + rng.choice((".", "?", "!", "..."))
+
+def _ass_time(centiseconds):
+    hours, rest = divmod(centiseconds, 360000)
+    minutes, rest = divmod(rest, 6000)
+    seconds, centis = divmod(rest, 100)
+    return f"{hours}:{minutes:02d}:{seconds:02d}.{centis:02d}"
+
+def _srt_time(milliseconds):
+    hours, rest = divmod(milliseconds, 3600000)
+    minutes, rest = divmod(rest, 60000)
+    seconds, millis = divmod(rest, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d},{millis:03d}"
+
+def _ass_text(rng):
+    kind = rng.random()
+    if kind < 0.55:
+        # Plain dialogue, sometimes italic or on two lines.
+        text = _sentence(rng)
+        if rng.random() < 0.3:
+            text += r"\N" + _sentence(rng)
+        if rng.random() < 0.2:
+            text = r"{\i1}" + text + r"{\i0}"
+        return text
+    if kind < 0.75:
+        # Typeset sign with heavy override tags.
+        tags = (r"{\an7\pos(%d,%d)\fad(200,200)\blur0.6\bord3\c&H%06X&\3c&H%06X&\frz%.1f}"
+                % (rng.randint(0, 1920), rng.randint(0, 1080), rng.randrange(1 << 24),
+                   rng.randrange(1 << 24), rng.uniform(-10, 10)))
+        return tags + _sentence(rng).upper()
+    if kind < 0.9:
+        # Karaoke line: one \k tag per syllable.
+        return "".join(r"{\k%d}%s " % (rng.randint(5, 60), rng.choice(WORDS)) for _ in range(rng.randint(4, 12)))
+    # Vector drawing.
+    points = " ".join(f"{rng.randint(0, 1920)} {rng.randint(0, 1080)}" for _ in range(rng.randint(10, 80)))
+    return r"{\an7\pos(0,0)\c&H000000&\p1}m 0 0 l " + points + r"{\p0}"
+
+def generate_ass(path, events, seed=0):
+    """
+    Writes a synthetic typeset ASS file with `events` Dialogue lines.
+
+    Roughly half of the events are plain dialogue; the rest are signs with
+    heavy override tags (some duplicated on a glow layer), karaoke lines and
+    vector drawings.
+
+    Returns:
+        int: The number of Dialogue lines written.
+    """
+    rng = random.Random(seed)
+    written = 0
+    with open(path, 'w', encoding='utf-8', newline='\n') as f:
+        f.write(ASS_HEADER)
+        while written < events:
+            start = written * 150
+            end = start + rng.randint(80, 400)
+            text = _ass_text(rng)
+            style = rng.choice(STYLES)
+            layers = (0, 1) if text.startswith(r"{\an7\pos") and rng.random() < 0.5 else (rng.randint(0, 2),)
+            for layer in layers[:events - written]:
+                f.write(f"Dialogue: {layer},{_ass_time(start)},{_ass_time(end)},{style},,0,0,0,,{text}\n")
+                written += 1
+    return written
+
+def generate_srt(path, events, seed=0):
+    """
+    Writes a synthetic SRT file with `events` cues of one or two lines.
+
+    Returns:
+        int: The number of dialogue lines written.
+    """
+    rng = random.Random(seed)
+    lines = 0
+    with open(path, 'w', encoding='utf-8', newline='\n') as f:
+        for number in range(1, events + 1):
+            start = number * 1500
+            cue_lines = [_sentence(rng) for _ in range(rng.choice((1, 1, 2)))]
+            lines += len(cue_lines)
+            f.write(f"{number}\n{_srt_time(start)} --> {_srt_time(start + rng.randint(800, 4000))}\n")
+            f.write("\n".join(cue_lines) + "\n\n")
+    return lines
+
+def generate_translations(path, lines, seed=0, add_prefix=True):
+    """Writes a synthetic Persian translation file with `lines` lines."""
+    rng = random.Random(seed + 1)
+    with open(path, 'w', encoding='utf-8', newline='\n') as f:
+        for number in range(1, lines + 1):
+            text = " ".join(rng.choice(PERSIAN_WORDS) for _ in range(rng.randint(2, 9)))
+            f.write(f"{number}-{text}\n" if add_prefix else text + "\n")
@@ -0,0 +1,203 @@
+# benchmarks/run_benchmarks.py
+
+"""
+Times and memory-profiles the public functions of the tool on a synthetic
+corpus and writes a JSON report that can be compared between revisions.
+
+Usage:
+    python benchmarks/run_benchmarks.py [--sizes 1000 10000 100000] [--output report.json]
+                                        [--compare old_report.json] [--no-memory]
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+
+import corpus  # noqa: E402
+from archive_runner import pipeline_archive  # noqa: E402
+from ass_parser import extract_dialogue_text_from_ass  # noqa: E402
+from ass_replacer import replace_ass_dialogues  # noqa: E402
+from event_export import export_ass_events  # noqa: E402
+from pipeline import run_pipeline  # noqa: E402
+from prefix_remover import remove_line_prefixes  # noqa: E402
+from rtl_fixer import process_rtl_file  # noqa: E402
+from srt_parser import extract_dialogue_text_from_srt  # noqa: E402
+from srt_replacer import replace_srt_dialogues  # noqa: E402
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+
+def build_cases(work_dir, events, seed):
+    """
+    Generates the corpus for one size and returns the benchmark cases.
+
+    Returns:
+        list: (name, input path, callable) tuples.
+    """
+    ass_path = os.path.join(work_dir, f"corpus_{events}.ass")
+    srt_path = os.path.join(work_dir, f"corpus_{events}.srt")
+    corpus.generate_ass(ass_path, events, seed)
+    srt_lines = corpus.generate_srt(srt_path, events, seed)
+
+    ass_lines = len(extract_dialogue_text_from_ass(ass_path).lines)
+    ass_translations = os.path.join(work_dir, f"corpus_{events}_ass_translated.txt")
+    srt_translations = os.path.join(work_dir, f"corpus_{events}_srt_translated.txt")
+    corpus.generate_translations(ass_translations, ass_lines, seed)
+    corpus.generate_translations(srt_translations, srt_lines, seed)
+    # Word order fixing is measured on Persian text, as it is used in practice.
+    persian_ass = replace_ass_dialogues(ass_path, ass_translations).output_path
+    # A release archive with both subtitles and their '<name>_translated.txt'.
+    archive_path = os.path.join(work_dir, f"corpus_{events}.zip")
+    with zipfile.ZipFile(archive_path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.write(ass_path, "episode.ass")
+        archive.write(ass_translations, "episode_translated.txt")
+        archive.write(srt_path, "episode_srt.srt")
+        archive.write(srt_translations, "episode_srt_translated.txt")
+
+    return [
+        ("extract_dialogue_text_from_ass", ass_path,
+         lambda: extract_dialogue_text_from_ass(ass_path, True)),
+        ("extract_dialogue_text_from_srt", srt_path,
+         lambda: extract_dialogue_text_from_srt(srt_path, True)),
+        ("export_ass_events[jsonl]", ass_path,
+         lambda: export_ass_events(ass_path, 'jsonl')),
+        ("export_ass_events[csv]", ass_path,
+         lambda: export_ass_events(ass_path, 'csv')),
+        ("replace_ass_dialogues", ass_path,
+         lambda: replace_ass_dialogues(ass_path, ass_translations)),
+        ("replace_srt_dialogues", srt_path,
+         lambda: replace_srt_dialogues(srt_path, srt_translations)),
+        ("process_rtl_file[ass]", ass_path,
+         lambda: process_rtl_file(ass_path)),
+        ("process_rtl_file[srt]", srt_path,
+         lambda: process_rtl_file(srt_path)),
+        ("process_rtl_file[txt]", ass_translations,
+         lambda: process_rtl_file(ass_translations)),
+        ("process_rtl_file[ass,fix_words]", persian_ass,
+         lambda: process_rtl_file(persian_ass, fix_words_flag=True)),
+        ("process_rtl_file[txt,fix_words]", ass_translations,
+         lambda: process_rtl_file(ass_translations, fix_words_flag=True)),
+        ("remove_line_prefixes", ass_translations,
+         lambda: remove_line_prefixes(ass_translations)),
+        ("run_pipeline[ass]", ass_path,
+         lambda: run_pipeline(ass_path, ass_translations)),
+        ("run_pipeline[srt]", srt_path,
+         lambda: run_pipeline(srt_path, srt_translations)),
+        ("pipeline_archive[zip]", archive_path,
+         lambda: pipeline_archive(archive_path)),
+    ]
+
+def measure(function, repeat, with_memory):
+    """
+    Runs `function` and returns its best wall time and its peak traced memory.
+
+    Warnings printed by the functions are not part of the measurement, so
+    stdout is silenced while they run.
+    """
+    best = None
+    with open(os.devnull, 'w') as devnull:
+        stdout = sys.stdout
+        sys.stdout = devnull
+        try:
+            for _ in range(repeat):
+                start = time.perf_counter()
+                function()
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+
+            peak = None
+            if with_memory:
+                # Measured in a separate run: tracing slows the code down.
+                tracemalloc.start()
+                function()
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+        finally:
+            sys.stdout = stdout
+    return best, peak
+
+def git_revision():
+    """Returns the current git revision of the repository, if available."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(BENCHMARK_DIR),
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare_reports(old_report, new_report):
+    """Prints the time and memory ratio of every case present in both reports."""
+    old_results = {(r["case"], r["events"]): r for r in old_report["results"]}
+    print(f"\nComparison with {old_report.get('revision')}:")
+    for result in new_report["results"]:
+        old = old_results.get((result["case"], result["events"]))
+        if old is None:
+            continue
+        line = f"  {result['case']:<34} {result['events']:>8}  time x{result['seconds'] / old['seconds']:.2f}"
+        if result.get("peak_bytes") and old.get("peak_bytes"):
+            line += f"  memory x{result['peak_bytes'] / old['peak_bytes']:.2f}"
+        print(line)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks the subtitle tool on a synthetic corpus.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES),
+                        help="Number of events per generated file (1K to 1M).")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3, help="Timed runs per case; the best one is kept.")
+    parser.add_argument('--only', nargs='+', help="Only run the cases whose name starts with one of these.")
+    parser.add_argument('--no-memory', action='store_true', help="Skip the tracemalloc run.")
+    parser.add_argument('--output', default="benchmark_report.json")
+    parser.add_argument('--compare', help="A previous report to compare against.")
+    args = parser.parse_args(argv)
+
+    report = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "results": [],
+    }
+
+    work_dir = tempfile.mkdtemp(prefix="subtool_bench_")
+    try:
+        for events in args.sizes:
+            for name, input_path, function in build_cases(work_dir, events, args.seed):
+                if args.only and not name.startswith(tuple(args.only)):
+                    continue
+                seconds, peak = measure(function, args.repeat, not args.no_memory)
+                input_bytes = os.path.getsize(input_path)
+                report["results"].append({
+                    "case": name,
+                    "events": events,
+                    "input_bytes": input_bytes,
+                    "seconds": seconds,
+                    "mb_per_second": input_bytes / seconds / 1e6 if seconds else None,
+                    "peak_bytes": peak,
+                })
+                peak_text = f"{peak / 1e6:8.1f} MB peak" if peak is not None else ""
+                print(f"{name:<34} {events:>8} events  {seconds * 1000:10.1f} ms  {peak_text}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nReport written to: {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            compare_reports(json.load(f), report)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,270 @@
+# bidi_reorder.py
+
+import functools
+import re
+import unicodedata
+
+from ass_tokenizer import BREAK, TEXT, iter_tokens
+
+# Character classes used for reordering, one ASCII letter per character:
+#   R  Persian/Arabic/Hebrew letters     L  Latin and other LTR letters
+#   D  digits                            E  number signs (%, $, °) that stick to digits
+#   M  combining marks (follow their base)
+#   W  whitespace                        X  explicit direction marks (RLE, RLM, ...)
+#   N  everything else (punctuation, symbols)
+_BIDI_CLASSES = {
+    'R': 'R', 'AL': 'R',
+    'L': 'L',
+    'EN': 'D', 'AN': 'D', 'ET': 'E',
+    'NSM': 'M',
+    'WS': 'W', 'S': 'W', 'B': 'W',
+    'LRE': 'X', 'RLE': 'X', 'PDF': 'X', 'LRO': 'X', 'RLO': 'X',
+    'LRI': 'X', 'RLI': 'X', 'FSI': 'X', 'PDI': 'X',
+}
+
+# Paired punctuation is drawn mirrored inside right-to-left text.
+_MIRRORED = {
+    '(': ')', ')': '(', '[': ']', ']': '[', '{': '}', '}': '{',
+    '<': '>', '>': '<', '«': '»', '»': '«', '‹': '›', '›': '‹',
+}
+
+# Arabic-script punctuation is a strong RTL character for Unicode, but it is
+# moved around like any other punctuation mark.
+_RTL_PUNCTUATION = '؛؟٭۔'
+
+# Stands in for the ASS hard space (\h) while a segment is reordered.
+_HARD_SPACE = '\ue000'
+
+# One unit is kept in its original order: an LTR run (letters and numbers,
+# with the spaces and punctuation between them), an RTL word, or a single
+# neutral character.
+_UNIT_PATTERN = re.compile(r'E*[LD][LDEM]*(?:[WNE]+[LD][LDEM]*)*|R[RM]*|.', re.DOTALL)
+
+@functools.lru_cache(maxsize=None)
+def _class_table():
+    """
+    Builds the class of every BMP character once, as a str indexed by code
+    point, so a whole line is classified by a single `str.translate` call.
+    Characters outside the BMP are left untranslated and count as neutral.
+    """
+    table = [_BIDI_CLASSES.get(unicodedata.bidirectional(chr(code)), 'N') for code in range(0x10000)]
+    for char in _RTL_PUNCTUATION:
+        table[ord(char)] = 'N'
+    table[ord(_HARD_SPACE)] = 'W'
+    return ''.join(table)
+
+def classify(text):
+    """Returns the class string of `text` (same length, one class letter per character)."""
+    return text.translate(_class_table())
+
+def _visual_units(text):
+    """
+    Splits a line into the units of `reorder_words`, in visual order.
+
+    Returns:
+        tuple: (length of the leading direction marks, which stay first,
+                list of (start, end, replacement) units, where `replacement`
+                is the mirrored bracket of a neutral character or None).
+    """
+    classes = classify(text)
+    start = len(classes) - len(classes.lstrip('X'))
+    units = []
+    for match in _UNIT_PATTERN.finditer(classes, start):
+        unit_start, unit_end = match.span()
+        replacement = None
+        if unit_end - unit_start == 1 and classes[unit_start] in 'NWE':
+            replacement = _MIRRORED.get(text[unit_start], text[unit_start])
+        units.append((unit_start, unit_end, replacement))
+    units.reverse()
+    return start, units
+
+def reorder_words(text):
+    """
+    Rewrites a right-to-left line in visual order, for players that draw
+    text left to right without bidi support.
+
+    The order of the words is reversed, so the first Persian word ends up
+    on the right. Each Persian word keeps its letters in order (players
+    still shape it), runs of Latin words and numbers stay readable left to
+    right, and neutral characters such as ending punctuation move to the
+    other side, with brackets mirrored. Leading direction marks (e.g. RLE)
+    stay at the start.
+
+    Args:
+        text (str): One line of plain text, without override tags.
+
+    Returns:
+        str: The reordered line.
+    """
+    start, units = _visual_units(text)
+    return text[:start] + ''.join(text[unit_start:unit_end] if replacement is None else replacement
+                                  for unit_start, unit_end, replacement in units)
+
+# ASS override tags, longest names first so '\fscx' is not read as '\fs'.
+_TAG_NAME_PATTERN = re.compile(r'\\(' + '|'.join(sorted((
+    'xbord', 'ybord', 'xshad', 'yshad', 'fscx', 'fscy', 'alpha', 'iclip', 'bord', 'shad', 'blur',
+    'fade', 'move', 'clip', 'pos', 'org', 'fad', 'fsp', 'frx', 'fry', 'frz', 'fax', 'fay', 'pbo',
+    '1c', '2c', '3c', '4c', '1a', '2a', '3a', '4a', 'an', 'be', 'fn', 'fs', 'fe', 'fr',
+    'b', 'i', 'u', 's', 'c', 'a', 'q'), key=len, reverse=True)) + ')')
+_TAG_ALIASES = {'c': '1c', 'fr': 'frz', 'a': 'an', 'fad': 'fade'}
+
+# Tags that apply to the whole line wherever they are written.
+_LINE_TAGS = ('pos', 'move', 'org', 'fade', 'clip', 'iclip', 'an', 'q')
+
+# Tags that do not describe a state which can be moved with its text:
+# animations, karaoke timing, style resets and drawing mode.
+_UNMOVABLE_TAG_PATTERN = re.compile(r'\\(?:t\(|[kK]|r|p\d)')
+
+def _parse_block(block):
+    """
+    Splits an override block into (name, tag) pairs, e.g. '{\\i1\\fs20}' ->
+    [('i', '\\i1'), ('fs', '\\fs20')]. Returns None for blocks whose tags
+    cannot be moved (see _UNMOVABLE_TAG_PATTERN) or that hold a comment.
+    """
+    content = block[1:-1]
+    if _UNMOVABLE_TAG_PATTERN.search(content) or not content.startswith('\\'):
+        return None
+    tags = []
+    for tag in re.findall(r'\\[^\\]*', content):
+        match = _TAG_NAME_PATTERN.match(tag)
+        name = _TAG_ALIASES.get(match.group(1), match.group(1)) if match else tag
+        tags.append((name, tag))
+    return tags
+
+def _has_styled_runs(tokens):
+    """True if an override block sits between two pieces of text of the same visual line."""
+    seen_text = block_after_text = False
+    for kind, value in tokens:
+        if kind == TEXT or value == r'\h':
+            if block_after_text:
+                return True
+            seen_text = True
+        elif kind == BREAK:
+            seen_text = block_after_text = False
+        elif seen_text:
+            block_after_text = True
+    return False
+
+def _visual_groups(text, run_of):
+    """
+    Reorders one visual line and splits it back into runs.
+
+    Args:
+        text (str): The text of the line, without override blocks.
+        run_of (list): The run index of every character of `text`.
+
+    Returns:
+        list: (run index, text) pairs in visual order; consecutive
+              characters of the same run form one pair.
+    """
+    groups = []
+    start, units = _visual_units(text)
+    pieces = [(position, position + 1, None) for position in range(start)] + units
+    for unit_start, unit_end, replacement in pieces:
+        if replacement is not None:
+            characters = [(run_of[unit_start], replacement)]
+        else:
+            characters = [(run_of[position], text[position]) for position in range(unit_start, unit_end)]
+        for run, char in characters:
+            if groups and groups[-1][0] == run:
+                groups[-1][1].append(char)
+            else:
+                groups.append((run, [char]))
+    return [(run, ''.join(chars)) for run, chars in groups]
+
+def _reorder_styled_text(tokens):
+    """
+    Reorders a Text field whose visual lines hold several styled runs, so
+    the runs are reversed together with the words.
+
+    Every character remembers the run it came from, and every run keeps the
+    style it had in the original line: before each run of the output, the
+    tags that differ from the style in effect at that point are written (or
+    reset with their bare name). Tags that apply to the whole line (\\pos,
+    \\an, \\clip, ...) are gathered in the first block.
+
+    Returns:
+        str: The reordered Text field, or None if one of its blocks cannot
+             be moved.
+    """
+    line_tags = []
+    state = {}          # name -> tag in effect at this point of the original line
+    run_states = []     # the state of every run, in original order
+    lines = [(None, [], [])]  # per visual line: (break before it, text pieces, run of every character)
+    for kind, value in tokens:
+        if kind == TEXT or value == r'\h':
+            _, pieces, run_of = lines[-1]
+            if not run_states or run_states[-1] is not state or not run_of:
+                run_states.append(state)
+            piece = _HARD_SPACE if value == r'\h' else value
+            pieces.append(piece)
+            run_of.extend([len(run_states) - 1] * len(piece))
+        elif kind == BREAK:
+            lines.append((value, [], []))
+        else:
+            tags = _parse_block(value)
+            if tags is None:
+                return None
+            state = dict(state)
+            for name, tag in tags:
+                if name in _LINE_TAGS:
+                    line_tags.append(tag)
+                else:
+                    state[name] = tag
+
+    output = ['{' + ''.join(line_tags) + '}'] if line_tags else []
+    current = {}
+    for line_break, pieces, run_of in lines:
+        if line_break:
+            output.append(line_break)
+        for run, text in _visual_groups(''.join(pieces), run_of):
+            target = run_states[run]
+            changes = [target.get(name, '\\' + name) for name in {**current, **target}
+                       if current.get(name) != target.get(name)]
+            if changes:
+                output.append('{' + ''.join(changes) + '}')
+            current = target
+            output.append(text.replace(_HARD_SPACE, r'\h'))
+    return ''.join(output)
+
+def reorder_ass_text(text):
+    """
+    Applies `reorder_words` to the Text field of an ASS Dialogue line.
+
+    Line breaks (\\N, \\n) are kept in place and hard spaces (\\h) count as
+    spaces. When every visual line holds a single run of text, the override
+    blocks stay where they are. When tags change the style in the middle of
+    a line, the styled runs are reversed with the words and each keeps its
+    style (see `_reorder_styled_text`); lines with animations, karaoke
+    timing, \\r or drawings there are reordered run by run instead.
+
+    Args:
+        text (str): The raw Text field.
+
+    Returns:
+        str: The Text field in visual order.
+    """
+    if '{' not in text and '\\' not in text:
+        return reorder_words(text)
+
+    tokens = list(iter_tokens(text))
+    if _has_styled_runs(tokens):
+        reordered = _reorder_styled_text(tokens)
+        if reordered is not None:
+            return reordered
+
+    parts = []
+    segment = []
+    for kind, value in tokens:
+        if kind == TEXT:
+            segment.append(value)
+        elif value == r'\h':
+            segment.append(_HARD_SPACE)
+        else:
+            if segment:
+                parts.append(reorder_words(''.join(segment)).replace(_HARD_SPACE, r'\h'))
+                segment = []
+            parts.append(value)
+    if segment:
+        parts.append(reorder_words(''.join(segment)).replace(_HARD_SPACE, r'\h'))
+    return ''.join(parts)
@@ -3,15 +3,18 @@
 import cmd
 import os
 import shlex 
-from ass_parser import extract_dialogue_text_from_ass
-from srt_parser import extract_dialogue_text_from_srt
-from ass_replacer import replace_ass_dialogues
-from rtl_fixer import process_rtl_file 
-from prefix_remover import remove_line_prefixes 
+import sys
+from functools import partial
+# Subsystem modules are imported inside the commands that use them, so a
+# one-shot 'python cli_tool.py <command> ...' process only pays for its own.
+from profiling import profile_command, set_profile_path
+from results import SubtitleToolError
 
 class SubtitleToolShell(cmd.Cmd):
     
     prompt = 'SubToolCLI> '
+    # Status of the last command, returned by one-shot mode.
+    exit_code = 0
     intro = "\nWelcome to the Subtitle Tool CLI. Type 'help' or '?' for commands.\n"
     
     def do_exit(self, line):
@@ -23,10 +26,13 @@ class SubtitleToolShell(cmd.Cmd):
     def do_extract_ass(self, line):
         """
         Extracts dialogue texts from an ASS file and saves them to a TXT file.
-        Usage: extract_ass "/path/to/your file with spaces.ass" [add_prefix_Y/N]
+        Usage: extract_ass "/path/to/your file with spaces.ass" [add_prefix_Y/N] ["/path/to/memory.db"]
         (add_prefix_Y/N is optional. Use 'Y' to prepend '1-', '2-', ... to all lines.)
+        (memory.db is optional. Lines already stored in the translation memory are not extracted;
+        the '1-', '2-', ... prefixes are then always added, so every line keeps its ID.)
         """
-        self._parse_and_call(line, (1, 2), 'ass', extract_dialogue_text_from_ass, self._process_file)
+        from ass_parser import extract_dialogue_text_from_ass
+        self._parse_and_call(line, (1, 3), 'ass', extract_dialogue_text_from_ass, self._process_file)
 
     # --- Command 2: Extract SRT (Updated Usage) ---
     def do_extract_srt(self, line):
@@ -35,17 +41,135 @@ class SubtitleToolShell(cmd.Cmd):
         Usage: extract_srt "/path/to/your file with spaces.srt" [add_prefix_Y/N]
         (add_prefix_Y/N is optional. Use 'Y' to prepend '1-', '2-', ... to all lines.)
         """
-        self._parse_and_call(line, (1, 2), 'srt', extract_dialogue_text_from_srt, self._process_file)
+        from srt_parser import save_dialogue_text_from_srt
+        self._parse_and_call(line, (1, 2), 'srt', save_dialogue_text_from_srt, self._process_file)
+
+    # --- Command 1b: Deduplicated ASS Extraction ---
+    def do_extract_ass_unique(self, line):
+        """
+        Extracts every unique dialogue text of an ASS file once and writes a sidecar
+        index that maps each Dialogue event to its unique line.
+        Usage: extract_ass_unique "/path/to/your file.ass" [add_prefix_Y/N]
+        (Creates '<name>_extracted.txt' and '<name>_extracted_index.json'.)
+        """
+        from ass_parser import extract_dialogue_text_from_ass
+        self._parse_and_call(line, (1, 2), 'ass_unique', extract_dialogue_text_from_ass, self._extract_unique_handler)
+
+    # --- Command 1c: Incremental ASS Extraction ---
+    def do_extract_ass_incremental(self, line):
+        """
+        Extracts dialogue texts from an ASS file and writes a manifest of per-line content
+        hashes. Given the manifest of a previous release, only changed lines are extracted.
+        Usage: extract_ass_incremental "/path/to/new.ass" ["/path/to/previous_extracted_manifest.json"]
+        (Creates '<name>_extracted.txt' with '<ID>-' prefixes and '<name>_extracted_manifest.json'.)
+        """
+        from ass_parser import extract_dialogue_text_from_ass
+        self._parse_and_call(line, (1, 2), 'ass_incremental', extract_dialogue_text_from_ass, self._extract_incremental_handler)
+
+    # --- Command 2b: Translate an extracted TXT file ---
+    def do_translate(self, line):
+        """
+        Sends an extracted TXT file to a translation backend in concurrent batches
+        (keeping the '1-', '2-', ... prefixes) and saves the translated file.
+
+        Usage: translate "/path/to/name_extracted.txt" "<http://host:port/endpoint | echo>" [concurrency]
+        (Creates 'name_translated.txt'. 'echo' is an offline stand-in that returns the lines unchanged.)
+        """
+        from translator import translate_file
+        self._parse_and_call(line, (2, 3), 'translate', translate_file, self._translate_handler)
 
     # --- Command 3: Replace ASS Dialogues with Persian (ROBUST VERSION) ---
     def do_replace_ass(self, line):
         """
         Replaces English dialogue in an ASS file with Persian translation from a TXT file.
         
-        Usage: replace_ass "<path/to/translations.txt>" "<path/to/original.ass>"
+        Usage: replace_ass "<path/to/translations.txt>" "<path/to/original.ass>" ["<path/to/memory.db>"]
+        (memory.db is optional. Stored translations fill the lines missing from the TXT file,
+        and the new translations are recorded in it.)
         """
-        self._parse_and_call(line, 2, 'ass_replace', replace_ass_dialogues, self._replace_ass_handler)
+        from ass_replacer import replace_ass_dialogues
+        self._parse_and_call(line, (2, 3), 'ass_replace', replace_ass_dialogues, self._replace_ass_handler)
         
+    # --- Command 3b: Replace ASS Dialogues through a deduplication index ---
+    def do_replace_ass_unique(self, line):
+        """
+        Replaces the dialogue of an ASS file with translations of the unique lines
+        created by extract_ass_unique, expanding them to every matching event.
+
+        Usage: replace_ass_unique "<path/to/translations.txt>" "<path/to/original.ass>" ["<path/to/index.json>"]
+        (The index defaults to '<original>_extracted_index.json'.)
+        """
+        from ass_replacer import replace_ass_dialogues
+        self._parse_and_call(line, (2, 3), 'ass_replace_unique', replace_ass_dialogues, self._replace_unique_handler)
+
+    # --- Command 3c: Replace SRT Dialogues with Persian ---
+    def do_replace_srt(self, line):
+        """
+        Replaces the dialogue lines of an SRT file with Persian translation from a TXT file,
+        keeping cue numbers, timings and the number of lines of every cue.
+
+        Usage: replace_srt "<path/to/translations.txt>" "<path/to/original.srt>"
+        """
+        from srt_replacer import replace_srt_dialogues
+        self._parse_and_call(line, 2, 'srt_replace', replace_srt_dialogues, self._replace_srt_handler)
+
+    # --- Command 3d: Incremental Replace ---
+    def do_replace_ass_incremental(self, line):
+        """
+        Replaces the dialogue of a revised ASS file using the translations of the changed
+        lines plus the translations of the previous release for the unchanged ones.
+
+        Usage: replace_ass_incremental "<path/to/new_translations.txt>" "<path/to/new.ass>" "<path/to/previous_extracted_manifest.json>" "<path/to/previous_translations.txt>"
+        (Also creates '<new>_translated_merged.txt' to be used with the next release.)
+        """
+        from ass_replacer import replace_ass_dialogues
+        self._parse_and_call(line, 4, 'ass_replace_incremental', replace_ass_dialogues, self._replace_incremental_handler)
+
+    # --- Command 3f: Event export/import for external tools ---
+    def do_export_events(self, line):
+        """
+        Exports every Dialogue event of an ASS file with its index, layer, start/end
+        time in milliseconds, style, actor name, clean text and raw text.
+
+        Usage: export_events "/path/to/file.ass" [jsonl|csv]
+        (Creates '<name>_events.jsonl' (default) or '<name>_events.csv'.)
+        """
+        from event_export import export_ass_events
+        self._parse_and_call(line, (1, 2), 'export_events', export_ass_events, self._export_events_handler)
+
+    def do_import_events(self, line):
+        """
+        Replaces the event texts of an ASS file with an edited export of export_events.
+        Records are matched by 'index'; an edited 'raw_text' is used verbatim, otherwise
+        an edited 'text' replaces the dialogue and keeps the original tags.
+
+        Usage: import_events "<path/to/name_events.jsonl|csv>" "<path/to/original.ass>"
+        (Creates '<original>_Persian.ass'.)
+        """
+        from event_export import import_ass_events
+        self._parse_and_call(line, 2, 'import_events', import_ass_events, self._import_events_handler)
+
+    # --- Command 3e: Random access to single events (QC) ---
+    def do_show_event(self, line):
+        """
+        Prints one Dialogue event of an ASS file by number, using a cached byte-offset
+        index instead of parsing the whole file.
+
+        Usage: show_event "/path/to/file.ass" <event_number>
+        """
+        from ass_event_index import read_event
+        self._parse_and_call(line, 2, 'show_event', read_event, self._event_handler)
+
+    def do_patch_event(self, line):
+        """
+        Replaces the text (override tags included) of one Dialogue event of an ASS file
+        in place, without re-parsing the rest of the file.
+
+        Usage: patch_event "/path/to/file.ass" <event_number> "<new text>"
+        """
+        from ass_event_index import rewrite_event_text
+        self._parse_and_call(line, 3, 'patch_event', rewrite_event_text, self._event_handler)
+
     # --- Command 4: RTL Fixer (MODIFIED COMMAND) ---
     def do_RTL(self, line): 
         """
@@ -55,6 +179,7 @@ class SubtitleToolShell(cmd.Cmd):
         Usage: RTL "/path/to/your_extracted.txt" [Y/N for word RTL]
         (Y/N is optional. Use 'Y' to enable word order reversal, default is N)
         """
+        from rtl_fixer import process_rtl_file
         # Expected args is now 1 or 2
         self._parse_and_call(line, (1, 2), 'rtl_fix', process_rtl_file, self._rtl_handler)
 
@@ -65,8 +190,67 @@ class SubtitleToolShell(cmd.Cmd):
         
         Usage: remove_prefix "/path/to/your_file_with_prefixes.txt"
         """
+        from prefix_remover import remove_line_prefixes
         self._parse_and_call(line, 1, 'prefix_remove', remove_line_prefixes, self._prefix_remover_handler)
 
+    # --- Command 5c: Archives (ZIP/tar) ---
+    def do_extract_archive(self, line):
+        """
+        Extracts the dialogue of every ASS/SSA/SRT file inside a ZIP or tar archive
+        without unpacking it to disk.
+
+        Usage: extract_archive "/path/to/release.zip|tar.gz" [add_prefix_Y/N]
+        (Creates '<archive>_extracted.zip|tar.gz' with one '<name>_extracted.txt' per subtitle.)
+        """
+        from archive_runner import extract_archive
+        self._parse_and_call(line, (1, 2), 'archive_extract', extract_archive, self._archive_handler)
+
+    def do_RTL_archive(self, line):
+        """
+        Applies the RTL fix to every TXT/SRT/ASS file inside a ZIP or tar archive.
+
+        Usage: RTL_archive "/path/to/archive.zip|tar.gz" [Y/N for word RTL]
+        (Creates '<archive>_RLE_fixed.zip|tar.gz'.)
+        """
+        from archive_runner import rtl_fix_archive
+        self._parse_and_call(line, (1, 2), 'archive_rtl', rtl_fix_archive, self._archive_handler)
+
+    def do_pipeline_archive(self, line):
+        """
+        Runs the replace + RTL pipeline on every ASS/SRT file inside a ZIP or tar
+        archive. '<name>_translated.txt' is looked up next to each subtitle, in the
+        same archive or in a separate translations archive or folder. Fonts and other
+        members are copied unchanged.
+
+        Usage: pipeline_archive "/path/to/release.zip|tar.gz" ["/path/to/translations.zip|folder"]
+        (Creates '<archive>_Persian_RLE_fixed.zip|tar.gz'.)
+        """
+        from archive_runner import pipeline_archive
+        self._parse_and_call(line, (1, 2), 'archive_pipeline', pipeline_archive, self._archive_handler)
+
+    # --- Command 5b: Output Encoding ---
+    def do_utf8_output(self, line):
+        """
+        Chooses the encoding of the files written by replace, RTL, pipeline and remove_prefix.
+
+        Usage: utf8_output Y/N
+        (Y: always write UTF-8. N (default): keep the input's encoding when it is
+        UTF-8/UTF-16/UTF-32; files in legacy code pages such as cp1256 are written as UTF-8.)
+        """
+        from subtitle_io import set_normalize_to_utf8
+        self._parse_and_call(line, 1, 'utf8_output', set_normalize_to_utf8, self._utf8_output_handler)
+
+    # --- Handler for utf8_output ---
+    def _utf8_output_handler(self, args, file_type, setting_function, add_prefix=False):
+        """Handles the utf8_output command."""
+        choice = args[0].upper()
+        if choice not in ('Y', 'N'):
+            print("ERROR: The argument must be 'Y' or 'N'.")
+            print("Usage: utf8_output Y/N")
+            return False
+        setting_function(choice == 'Y')
+        print("Outputs will be written as UTF-8." if choice == 'Y' else "Outputs will keep the input encoding.")
+
     # --- Handler for replace_ass logic (No change) ---
     def _replace_ass_handler(self, args, file_type, extraction_function, add_prefix=False):
         """Handles the specific logic for the replace_ass command."""
@@ -75,14 +259,172 @@ class SubtitleToolShell(cmd.Cmd):
         
         print(f"Loading translations from: {translation_file_path}")
         print(f"Processing ASS file: {ass_file_path}")
+        if len(args) == 3:
+            print(f"Using translation memory: {args[2]}")
         
-        result = extraction_function(ass_file_path, translation_file_path) 
-        
-        if result.startswith("ERROR"):
-            print(f"\n❌ Operation Failed: {result}")
-        else:
-            print("\n✅ Translation replacement successful!")
-            print(f"   New Persian ASS file created at: {result}")
+        result = extraction_function(ass_file_path, translation_file_path, *args[2:])
+        self._print_warnings(result)
+
+        print("\n✅ Translation replacement successful!")
+        print(f"   New Persian ASS file created at: {result.output_path}")
+        self._print_counts(result)
+
+    # --- Command 6: Fused Replace + RTL Pipeline ---
+    def do_pipeline(self, line):
+        """
+        Replaces the dialogue of an ASS or SRT file with the translations of a TXT file
+        and applies the RTL fix in one pass, without writing intermediate files.
+
+        Usage: pipeline "<path/to/translations.txt>" "<path/to/original.ass|srt>" ["<path/to/memory.db>"]
+        (Creates '<original>_Persian_RLE_fixed.ass|srt'. memory.db is supported for ASS only.)
+        """
+        from pipeline import run_pipeline
+        self._parse_and_call(line, (2, 3), 'pipeline', run_pipeline, self._pipeline_handler)
+
+    def _pipeline_handler(self, args, file_type, processing_function, add_prefix=False):
+        """Handles the specific logic for the pipeline command."""
+        translation_file_path = args[0]
+        subtitle_file_path = args[1]
+
+        print(f"Loading translations from: {translation_file_path}")
+        print(f"Processing subtitle file: {subtitle_file_path}")
+
+        result = processing_function(subtitle_file_path, translation_file_path, *args[2:])
+        self._print_warnings(result)
+
+        print("\n✅ Replacement and RTL correction successful!")
+        print(f"   Final file created at: {result.output_path}")
+        self._print_counts(result)
+
+    # --- Handlers for the deduplicated extraction/replacement ---
+    def _extract_unique_handler(self, args, file_type, extraction_function, add_prefix=False):
+        """Runs the ASS extraction in deduplicated mode and writes the sidecar index."""
+        from dedupe_index import default_index_path
+        index_path = default_index_path(args[0])
+        if not self._process_file(args, 'ass', partial(extraction_function, index_path=index_path), add_prefix):
+            return False
+        print(f"   Line index saved to: {index_path}")
+
+    def _replace_unique_handler(self, args, file_type, extraction_function, add_prefix=False):
+        """Runs replace_ass with the sidecar index of a deduplicated extraction."""
+        from dedupe_index import default_index_path
+        index_path = args[2] if len(args) == 3 else default_index_path(args[1])
+        print(f"Using line index: {index_path}")
+        self._replace_ass_handler(args[:2], file_type, partial(extraction_function, index_path=index_path))
+
+    # --- Handlers for the incremental extraction/replacement ---
+    def _extract_incremental_handler(self, args, file_type, extraction_function, add_prefix=False):
+        """Runs the ASS extraction with a manifest, optionally against a previous one."""
+        from event_manifest import default_manifest_path
+        manifest_path = default_manifest_path(args[0])
+        previous_manifest_path = args[1] if len(args) == 2 else None
+
+        if previous_manifest_path and os.path.abspath(previous_manifest_path) == os.path.abspath(manifest_path):
+            print("ERROR: The previous manifest would be overwritten. Rename it or the new subtitle file first.")
+            return False
+
+        function = partial(extraction_function, manifest_path=manifest_path,
+                           previous_manifest_path=previous_manifest_path)
+        if not self._process_file(args[:1], 'ass', function, True):
+            return False
+        print(f"   Manifest saved to: {manifest_path}")
+
+    def _replace_incremental_handler(self, args, file_type, extraction_function, add_prefix=False):
+        """Runs replace_ass merging the previous release's translations."""
+        print(f"Previous manifest: {args[2]}")
+        print(f"Previous translations: {args[3]}")
+        function = partial(extraction_function, previous_manifest_path=args[2], previous_translation_path=args[3])
+        self._replace_ass_handler(args[:2], file_type, function)
+
+    # --- Handler for the translate command ---
+    def _translate_handler(self, args, file_type, processing_function, add_prefix=False):
+        """Handles the specific logic for the translate command."""
+        from translator import check_concurrency, make_backend
+        extracted_file_path = args[0]
+        try:
+            concurrency = int(args[2]) if len(args) == 3 else 4
+        except ValueError:
+            print("ERROR: Concurrency must be a number.")
+            return False
+        check_concurrency(concurrency)
+
+        print(f"Translating file: {extracted_file_path}")
+        print(f"Backend: {args[1]} (up to {concurrency} concurrent batches)")
+
+        result = processing_function(extracted_file_path, make_backend(args[1]), concurrency)
+        self._print_warnings(result)
+
+        print("\n✅ Translation successful!")
+        print(f"   Translated file created at: {result.output_path}")
+        print(f"   {result.replaced} of {result.events_read} lines translated.")
+
+    # --- Handlers for export_events/import_events ---
+    def _export_events_handler(self, args, file_type, processing_function, add_prefix=False):
+        """Handles the specific logic for the export_events command."""
+        output_format = args[1].lower() if len(args) == 2 else 'jsonl'
+        print(f"Exporting events of: {args[0]} ({output_format.upper()})")
+
+        result = processing_function(args[0], output_format)
+        self._print_warnings(result)
+
+        print("\n✅ Export successful!")
+        print(f"   Events file created at: {result.output_path}")
+        print(f"   The file contains {result.events_read} events.")
+
+    def _import_events_handler(self, args, file_type, processing_function, add_prefix=False):
+        """Handles the specific logic for the import_events command."""
+        print(f"Loading event records from: {args[0]}")
+        print(f"Processing ASS file: {args[1]}")
+
+        result = processing_function(args[1], args[0])
+        self._print_warnings(result)
+
+        print("\n✅ Event import successful!")
+        print(f"   New Persian ASS file created at: {result.output_path}")
+        self._print_counts(result)
+
+    # --- Handler for show_event/patch_event ---
+    def _event_handler(self, args, file_type, processing_function, add_prefix=False):
+        """Handles the show_event and patch_event commands."""
+        try:
+            number = int(args[1])
+        except ValueError:
+            print("ERROR: The event number must be a number.")
+            return False
+
+        try:
+            if file_type == 'show_event':
+                event = processing_function(args[0], number)
+                if event is None:
+                    print(f"ERROR: Event {number} is not a complete Dialogue line.")
+                    return False
+                print(f"Event {number}: Start={event.field(1)} End={event.field(2)} Style={event.field(3)}")
+                print(f"   Text: {event.text}")
+            else:
+                processing_function(args[0], number, args[2])
+                print(f"\n✅ Event {number} updated in: {args[0]}")
+        except FileNotFoundError:
+            print(f"ERROR: File not found at {args[0]}")
+            return False
+        except Exception as e:
+            print(f"\n❌ Operation Failed: {e}")
+            return False
+
+    # --- Handler for replace_srt logic ---
+    def _replace_srt_handler(self, args, file_type, processing_function, add_prefix=False):
+        """Handles the specific logic for the replace_srt command."""
+        translation_file_path = args[0]
+        srt_file_path = args[1]
+
+        print(f"Loading translations from: {translation_file_path}")
+        print(f"Processing SRT file: {srt_file_path}")
+
+        result = processing_function(srt_file_path, translation_file_path)
+        self._print_warnings(result)
+
+        print("\n✅ Translation replacement successful!")
+        print(f"   New Persian SRT file created at: {result.output_path}")
+        self._print_counts(result)
 
     # --- Handler for RTL Fixer Logic (MODIFIED HANDLER) ---
     def _rtl_handler(self, args, file_type, processing_function, add_prefix=False):
@@ -98,13 +440,11 @@ class SubtitleToolShell(cmd.Cmd):
         print(f"Word RTL Reversal enabled: {'Yes' if fix_words_flag else 'No'}")
         
         # Pass the new flag to the processing function (rtl_fixer.process_rtl_file)
-        result_path = processing_function(full_path, fix_words_flag=fix_words_flag) 
-        
-        if result_path.startswith("ERROR"):
-            print(f"\n❌ Operation Failed: {result_path}")
-        else:
-            print("\n✅ RTL Correction successful!")
-            print(f"   New RTL-Fixed file created at: {result_path}")
+        result = processing_function(full_path, fix_words_flag=fix_words_flag)
+        self._print_warnings(result)
+
+        print("\n✅ RTL Correction successful!")
+        print(f"   New RTL-Fixed file created at: {result.output_path}")
 
     # --- Handler for Prefix Remover Logic (No change) ---
     def _prefix_remover_handler(self, args, file_type, processing_function, add_prefix=False): 
@@ -113,19 +453,57 @@ class SubtitleToolShell(cmd.Cmd):
         
         print(f"Starting prefix removal on file: {full_path}...")
         
-        result_path = processing_function(full_path) 
-        
-        if result_path.startswith("ERROR"):
-            print(f"\n❌ Operation Failed: {result_path}")
+        result = processing_function(full_path)
+
+        print("\n✅ Prefix removal successful!")
+        print(f"   New file without prefixes created at: {result.output_path}")
+        print(f"   Prefixes removed: {result.replaced} of {result.events_read} lines.")
+
+    # --- Handler for the archive commands ---
+    def _archive_handler(self, args, file_type, processing_function, add_prefix=False):
+        """Handles extract_archive, RTL_archive and pipeline_archive."""
+        archive_path = args[0]
+        print(f"Processing archive: {archive_path}")
+
+        if file_type == 'archive_extract':
+            print(f"Prefix Added: {'Yes' if add_prefix else 'No'}")
+            result = processing_function(archive_path, add_prefix)
+        elif file_type == 'archive_rtl':
+            fix_words_flag = len(args) == 2 and args[1].upper() == 'Y'
+            print(f"Word RTL Reversal enabled: {'Yes' if fix_words_flag else 'No'}")
+            result = processing_function(archive_path, fix_words_flag=fix_words_flag)
         else:
-            print("\n✅ Prefix removal successful!")
-            print(f"   New file without prefixes created at: {result_path}")
+            if len(args) == 2:
+                print(f"Loading translations from: {args[1]}")
+            result = processing_function(archive_path, *args[1:])
+        self._print_warnings(result)
+
+        print("\n✅ Archive processing successful!")
+        print(f"   New archive created at: {result.output_path}")
+        print(f"   The archive contains {len(result.files)} files.")
+        if file_type == 'archive_pipeline':
+            self._print_counts(result)
+
+    # --- Reporting helpers for ProcessResult ---
+    def _print_warnings(self, result):
+        """Prints the non-fatal problems collected while processing a file."""
+        for message in result.warnings:
+            print(f"Warning: {message}")
+
+    def _print_counts(self, result):
+        """Prints the line counters of a replacement."""
+        print(f"   Lines replaced: {result.replaced} (from memory: {result.from_memory})")
+        if result.missing or result.extra:
+            print(f"   Missing translations: {result.missing}, unused translations: {result.extra}")
 
     # --- Centralized Argument Parsing (MODIFIED FOR RTL) ---
     def _parse_and_call(self, line, expected_args, file_type, extraction_function, handler_function):
         """
         Parses the command line using shlex and validates the number of arguments.
+        Sets `exit_code` to 0 if the command succeeded and to 1 otherwise (handlers
+        report a failure by returning False or raising a SubtitleToolError).
         """
+        self.exit_code = 1
         try:
             args = shlex.split(line) 
         except ValueError as e:
@@ -143,70 +521,144 @@ class SubtitleToolShell(cmd.Cmd):
             
         if not is_valid:
             print("ERROR: Invalid number of arguments.")
-            if file_type in ('ass', 'srt'):
-                print(f"Usage: extract_{file_type} \"/path/to/file.{file_type}\" [add_prefix_Y/N]")
+            if file_type == 'ass':
+                print("Usage: extract_ass \"/path/to/file.ass\" [add_prefix_Y/N] [\"/path/to/memory.db\"]")
+            elif file_type == 'ass_unique':
+                print("Usage: extract_ass_unique \"/path/to/file.ass\" [add_prefix_Y/N]")
+            elif file_type == 'ass_incremental':
+                print("Usage: extract_ass_incremental \"/path/to/new.ass\" [\"/path/to/previous_extracted_manifest.json\"]")
+            elif file_type == 'srt':
+                print("Usage: extract_srt \"/path/to/file.srt\" [add_prefix_Y/N]")
             elif file_type == 'rtl_fix':
                 print("Usage: RTL \"/path/to/file.txt\" [Y/N for word RTL]")
             elif file_type == 'ass_replace':
-                print("Usage: replace_ass \"<path/to/translations.txt>\" \"<path/to/original.ass>\"")
+                print("Usage: replace_ass \"<path/to/translations.txt>\" \"<path/to/original.ass>\" [\"<path/to/memory.db>\"]")
+            elif file_type == 'ass_replace_unique':
+                print("Usage: replace_ass_unique \"<path/to/translations.txt>\" \"<path/to/original.ass>\" [\"<path/to/index.json>\"]")
+            elif file_type == 'show_event':
+                print("Usage: show_event \"/path/to/file.ass\" <event_number>")
+            elif file_type == 'patch_event':
+                print("Usage: patch_event \"/path/to/file.ass\" <event_number> \"<new text>\"")
+            elif file_type == 'translate':
+                print("Usage: translate \"/path/to/name_extracted.txt\" \"<http://host:port/endpoint | echo>\" [concurrency]")
+            elif file_type == 'ass_replace_incremental':
+                print("Usage: replace_ass_incremental \"<new_translations.txt>\" \"<new.ass>\" \"<previous_manifest.json>\" \"<previous_translations.txt>\"")
+            elif file_type == 'srt_replace':
+                print("Usage: replace_srt \"<path/to/translations.txt>\" \"<path/to/original.srt>\"")
+            elif file_type == 'pipeline':
+                print("Usage: pipeline \"<path/to/translations.txt>\" \"<path/to/original.ass|srt>\" [\"<path/to/memory.db>\"]")
+            elif file_type == 'export_events':
+                print("Usage: export_events \"/path/to/file.ass\" [jsonl|csv]")
+            elif file_type == 'import_events':
+                print("Usage: import_events \"<path/to/name_events.jsonl|csv>\" \"<path/to/original.ass>\"")
+            elif file_type == 'archive_extract':
+                print("Usage: extract_archive \"/path/to/release.zip|tar.gz\" [add_prefix_Y/N]")
+            elif file_type == 'archive_rtl':
+                print("Usage: RTL_archive \"/path/to/archive.zip|tar.gz\" [Y/N for word RTL]")
+            elif file_type == 'archive_pipeline':
+                print("Usage: pipeline_archive \"/path/to/release.zip|tar.gz\" [\"/path/to/translations.zip|folder\"]")
+            elif file_type == 'utf8_output':
+                print("Usage: utf8_output Y/N")
             elif file_type == 'prefix_remove': 
                 print("Usage: remove_prefix \"/path/to/file.txt\"")
             return
         
         add_prefix = False
-        if file_type in ('ass', 'srt') and num_args == 2:
+        if file_type in ('ass', 'srt', 'ass_unique', 'archive_extract') and num_args >= 2:
             prefix_arg = args[1].upper()
             if prefix_arg == 'Y':
                 add_prefix = True
-                args = args[:1] 
+                args = args[:1] + args[2:]
             elif prefix_arg == 'N':
-                args = args[:1]
+                args = args[:1] + args[2:]
             else:
                 print("ERROR: Optional argument must be 'Y' or 'N' for prefix feature.")
                 return
 
-        if file_type == 'rtl_fix' and num_args == 2:
+        if file_type in ('rtl_fix', 'archive_rtl') and num_args == 2:
             rtl_word_arg = args[1].upper()
             if rtl_word_arg not in ('Y', 'N'):
                 print("ERROR: Optional argument for word RTL must be 'Y' or 'N'.")
                 return
-        handler_function(args, file_type, extraction_function, add_prefix)
+
+        # Opt-in instrumentation (--profile / SUBTOOL_PROFILE); a no-op otherwise.
+        command = self.lastcmd.split(maxsplit=1)[0] if self.lastcmd else file_type
+        with profile_command(command, args):
+            try:
+                if handler_function(args, file_type, extraction_function, add_prefix) is not False:
+                    self.exit_code = 0
+            except SubtitleToolError as e:
+                print(f"\n❌ Operation Failed: ERROR: {e}")
 
 
     # --- Helper Method to handle common logic for extraction (No change) ---
     def _process_file(self, args, file_type, extraction_function, add_prefix=False):
         """
         A general method to handle file processing and saving output for extract_ass/srt.
+        Extraction functions that stream into the output file themselves
+        return a result with `output_path` already set.
         """
         full_path = args[0]
         
         if not full_path:
             print(f"ERROR: Please provide the full path to the {file_type.upper()} file.")
-            return
+            return False
 
         print(f"Processing {file_type.upper()} file: {full_path}...")
         
-        texts = extraction_function(full_path, add_prefix)
+        # Any remaining arguments (e.g., the translation memory path) are passed through.
+        result = extraction_function(full_path, add_prefix, *args[1:])
+        self._print_warnings(result)
 
-        if texts and not texts[0].startswith("ERROR"):
-            base_name, _ = os.path.splitext(full_path)
-            output_filename = base_name + "_extracted.txt"
-            
+        output_filename = result.output_path
+        if output_filename is None:
+            from subtitle_io import save_extracted_texts
             try:
-                with open(output_filename, 'w', encoding='utf-8') as outfile:
-                    outfile.write('\n'.join(texts))
-                
-                print("\n✅ Extraction successful!")
-                print(f"   File Type: {file_type.upper()}")
-                print(f"   Prefix Added: {'Yes' if add_prefix else 'No'}")
-                print(f"   Output saved to: {output_filename}")
-                print(f"   The file contains {len(texts)} lines of dialogue.")
-                
+                output_filename = save_extracted_texts(result.lines, full_path, result)
             except Exception as e:
                 print(f"ERROR saving output file: {e}")
-            
-        else:
-            print(texts[0])
+                return False
+
+        print("\n✅ Extraction successful!")
+        print(f"   File Type: {file_type.upper()}")
+        # A translation memory always adds the prefixes (see extract_dialogue_text_from_ass).
+        print(f"   Prefix Added: {'Yes' if add_prefix or len(args) > 1 else 'No'}")
+        print(f"   Output saved to: {output_filename}")
+        print(f"   The file contains {result.line_count} lines of dialogue.")
+        if result.from_memory:
+            print(f"   Skipped {result.from_memory} lines already in the translation memory.")
+        return True
 
 if __name__ == '__main__':
-    SubtitleToolShell().cmdloop()
\ No newline at end of file
+    # --profile <path> may appear anywhere: '*.prof' writes cProfile dumps,
+    # anything else JSON lines. It is passed on through SUBTOOL_PROFILE.
+    if '--profile' in sys.argv:
+        position = sys.argv.index('--profile')
+        if position + 1 >= len(sys.argv):
+            print("ERROR: --profile needs an output path (e.g. profile.jsonl or profile.prof).")
+            sys.exit(2)
+        set_profile_path(sys.argv[position + 1])
+        del sys.argv[position:position + 2]
+    # Non-interactive batch mode: python cli_tool.py batch <command> [options] <dir|glob|file>...
+    if len(sys.argv) > 1 and sys.argv[1] == 'batch':
+        from batch_runner import run_batch
+        sys.exit(run_batch(sys.argv[2:]))
+    # Long-running inbox watcher: python cli_tool.py watch <dir> [options]
+    if len(sys.argv) > 1 and sys.argv[1] == 'watch':
+        from watch_folder import run_watch
+        sys.exit(run_watch(sys.argv[2:]))
+    # Local HTTP service on in-memory subtitles: python cli_tool.py serve [--port N] [options]
+    if len(sys.argv) > 1 and sys.argv[1] == 'serve':
+        from subtitle_service import run_serve
+        sys.exit(run_serve(sys.argv[2:]))
+    shell = SubtitleToolShell()
+    # One-shot mode: python cli_tool.py <command> [args...] runs a single shell
+    # command and exits with its status (0 on success, 1 on failure).
+    if len(sys.argv) > 1:
+        if not hasattr(shell, 'do_' + sys.argv[1]):
+            print(f"ERROR: Unknown command '{sys.argv[1]}'. Run 'python cli_tool.py help' for the list of commands.")
+            sys.exit(2)
+        # The arguments were already split by the calling shell; quote them again for shlex.
+        shell.onecmd(shlex.join(sys.argv[1:]))
+        sys.exit(shell.exit_code)
+    shell.cmdloop()
\ No newline at end of file
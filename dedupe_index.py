@@ -0,0 +1,78 @@
+# dedupe_index.py
+
+import hashlib
+import json
+import os
+
+# Version 2 records a fingerprint of the source file; older indexes are refused.
+INDEX_VERSION = 2
+
+_HASH_CHUNK_SIZE = 1 << 20
+
+def default_index_path(subtitle_file_path):
+    """
+    Returns the sidecar index path used for a subtitle file
+    (e.g., 'episode.ass' -> 'episode_extracted_index.json').
+    """
+    base_name, _ = os.path.splitext(subtitle_file_path)
+    return base_name + "_extracted_index.json"
+
+def source_fingerprint(source_path):
+    """
+    Returns the size and content hash of a subtitle file, so an index can be
+    checked against the file it was built from (copies keep their hash even
+    when their modification time changes).
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(source_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return {"size": os.path.getsize(source_path), "blake2b": digest.hexdigest()}
+
+def write_dedupe_index(index_path, event_ids, source_path):
+    """
+    Writes the line-to-unique-ID index produced by a deduplicated extraction.
+
+    Args:
+        index_path (str): The path of the JSON sidecar file.
+        event_ids (list): For every extracted Dialogue event, in file order,
+                          the 1-based ID of its unique line.
+        source_path (str): The subtitle file the index belongs to.
+    """
+    index = {
+        "version": INDEX_VERSION,
+        "source": os.path.basename(source_path),
+        "fingerprint": source_fingerprint(source_path),
+        "unique_lines": max(event_ids, default=0),
+        "events": event_ids,
+    }
+    with open(index_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, separators=(',', ':'))
+
+def read_dedupe_index(index_path, source_path=None):
+    """
+    Reads a sidecar index written by `write_dedupe_index`.
+
+    Args:
+        index_path (str): The path of the JSON sidecar file.
+        source_path (str): Optional subtitle file the index is used with. It
+                           must be the file the index was built from.
+
+    Returns:
+        list: The unique line ID of every extracted Dialogue event.
+
+    Raises:
+        ValueError: If the file is not a valid index, or if `source_path`
+                    is not the file it was built from (a stale index would
+                    map the translations onto the wrong events).
+    """
+    with open(index_path, 'r', encoding='utf-8') as f:
+        index = json.load(f)
+    if not isinstance(index, dict) or index.get("version") != INDEX_VERSION:
+        raise ValueError(f"Unsupported index file: {index_path}. Run the deduplicated extraction again.")
+    # A missing subtitle file is reported by the caller when it opens it.
+    if (source_path is not None and os.path.exists(source_path)
+            and index.get("fingerprint") != source_fingerprint(source_path)):
+        raise ValueError(f"The index was built from a different version of {source_path}. "
+                         "Run the deduplicated extraction again.")
+    return index["events"]
\ No newline at end of file
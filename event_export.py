@@ -0,0 +1,349 @@
+# event_export.py
+
+import csv
+import json
+import os
+
+from ass_document import DEFAULT_EVENT_FORMAT, Dialogue, iter_ass_events, parse_format_line
+from profiling import stage
+from results import InvalidInputError, MissingFileError, ProcessingError, ProcessResult, UnsupportedFileError
+from subtitle_io import open_output, open_subtitle, output_encoding, write_joined_lines
+
+# Columns of an exported event record, in CSV column order.
+EXPORT_FIELDS = ('index', 'layer', 'start_ms', 'end_ms', 'style', 'name', 'text', 'raw_text')
+
+EXPORT_FORMATS = ('jsonl', 'csv')
+
+# 'Format:' names of the exported fields; SSA files call them 'Marked' and 'Actor'.
+_FIELD_NAMES = {
+    'layer': ('layer', 'marked'),
+    'start': ('start',),
+    'end': ('end',),
+    'style': ('style',),
+    'name': ('name', 'actor'),
+}
+
+def parse_ass_time(value):
+    """
+    Converts an ASS timestamp ('H:MM:SS.cc') to milliseconds.
+
+    Args:
+        value (str): The timestamp. Fractions of 1 to 3 digits are accepted.
+
+    Returns:
+        int: The time in milliseconds.
+
+    Raises:
+        ValueError: If the timestamp is malformed.
+    """
+    if len(value) == 10 and value[1] == ':' and value[4] == ':' and value[7] == '.':
+        # Fast path for the canonical 'H:MM:SS.cc' layout.
+        return (int(value[0]) * 3600000 + int(value[2:4]) * 60000
+                + int(value[5:7]) * 1000 + int(value[8:10]) * 10)
+    hours, minutes, seconds = value.split(':')
+    whole, _, fraction = seconds.partition('.')
+    return ((int(hours) * 60 + int(minutes)) * 60 + int(whole)) * 1000 + int((fraction + '00')[:3])
+
+def _field_positions(field_names):
+    """
+    Returns the position of the layer, start, end, style and name fields in
+    a 'Format:' layout. Fields missing from the layout get -1.
+    """
+    lowered = [name.lower() for name in field_names]
+    return tuple(next((lowered.index(alias) for alias in aliases if alias in lowered), -1)
+                 for aliases in _FIELD_NAMES.values())
+
+class _TimestampCache:
+    """
+    Converts the timestamps of one file to milliseconds.
+
+    Timestamps are split into their whole second, converted once and kept
+    in a dict (an episode only has a few thousand distinct seconds), and
+    their centiseconds, so most conversions cost a dict lookup and one
+    int(). Other layouts go through `parse_ass_time`.
+    """
+
+    def __init__(self):
+        self._seconds = {}
+
+    def milliseconds(self, value):
+        second, _, fraction = value.rpartition('.')
+        if len(fraction) != 2 or not second or not fraction.isdigit():
+            return parse_ass_time(value)
+        base = self._seconds.get(second)
+        if base is None:
+            base = self._seconds[second] = parse_ass_time(second + '.00')
+        return base + int(fraction) * 10
+
+def iter_event_records(items, result=None):
+    """
+    Turns a parsed ASS stream into one record per Dialogue event.
+
+    Args:
+        items (iterable): Items produced by `ass_document.iter_ass_events`.
+        result (ProcessResult): Optional result that receives the counters
+            and the warnings (malformed timestamps).
+
+    Yields:
+        dict: The fields of EXPORT_FIELDS. `index` is the event number used by
+              show_event/patch_event, `text` the text without override blocks.
+    """
+    if result is None:
+        result = ProcessResult()
+    positions = _field_positions(DEFAULT_EVENT_FORMAT)
+    in_events = False
+    milliseconds = _TimestampCache().milliseconds
+
+    for item in items:
+        if not isinstance(item, Dialogue):
+            stripped = item.lstrip()
+            if stripped.startswith('['):
+                in_events = stripped.lower().startswith('[events]')
+            elif in_events and stripped.startswith('Format:'):
+                positions = _field_positions(parse_format_line(stripped))
+            continue
+
+        result.events_read += 1
+        # Every field but Text with a single split of the header. The extra ''
+        # is what the fields missing from the layout (position -1) read.
+        offsets = item.offsets
+        fields = item.line[offsets[0]:offsets[-1] - 1].split(',')
+        fields.append('')
+        layer, start, end, style, name = [fields[position].strip() for position in positions]
+
+        timing = []
+        for value in (start, end):
+            try:
+                timing.append(milliseconds(value))
+            except ValueError:
+                result.warn(f"Event {item.number} has an invalid timestamp '{value}'.")
+                timing.append(None)
+
+        yield {
+            'index': item.number,
+            'layer': int(layer) if layer.isdigit() else 0,
+            'start_ms': timing[0],
+            'end_ms': timing[1],
+            'style': style,
+            'name': name,
+            'text': item.clean_text(),
+            'raw_text': item.text,
+        }
+
+def iter_jsonl_lines(records):
+    """Yields one JSON line (without the newline) per record."""
+    dumps = json.JSONEncoder(ensure_ascii=False).encode
+    for record in records:
+        yield dumps(record)
+
+def write_csv_records(outfile, records):
+    """Writes the records as CSV with a header row. Returns the number of records."""
+    writer = csv.writer(outfile, lineterminator='\n')
+    writer.writerow(EXPORT_FIELDS)
+    count = 0
+    for record in records:
+        writer.writerow([record[field] for field in EXPORT_FIELDS])
+        count += 1
+    return count
+
+def default_export_path(ass_file_path, output_format):
+    """Returns the '<name>_events.jsonl|csv' path written next to an ASS file."""
+    return os.path.splitext(ass_file_path)[0] + "_events." + output_format
+
+def export_ass_events(ass_file_path, output_format='jsonl'):
+    """
+    Streams every Dialogue event of an ASS/SSA file to a JSON lines or CSV
+    file, with its timing, layer, style and actor, for external tools.
+
+    Args:
+        ass_file_path (str): The full path to the ASS file.
+        output_format (str): 'jsonl' or 'csv'.
+
+    Returns:
+        ProcessResult: The written '<name>_events.jsonl|csv' path and the
+                       number of exported events.
+
+    Raises:
+        InvalidInputError: If the format is not supported.
+        MissingFileError: If the ASS file does not exist.
+        ProcessingError: If the file cannot be read or written.
+    """
+    if output_format not in EXPORT_FORMATS:
+        raise InvalidInputError(f"Unsupported export format: {output_format}. Use 'jsonl' or 'csv'.")
+
+    result = ProcessResult(ass_file_path)
+    output_file_path = default_export_path(ass_file_path, output_format)
+    try:
+        # Records are meant for other tools, so they are always UTF-8.
+        with open_subtitle(ass_file_path) as infile, open_output(output_file_path) as outfile:
+            records = stage('export', iter_event_records(stage('parse', iter_ass_events(infile)), result))
+            if output_format == 'csv':
+                write_csv_records(outfile, records)
+            else:
+                write_joined_lines(outfile, iter_jsonl_lines(records))
+                if result.events_read:
+                    outfile.write('\n')
+    except FileNotFoundError as e:
+        raise MissingFileError(f"File not found at {e.filename or ass_file_path}") from e
+    except Exception as e:
+        raise ProcessingError(f"An unexpected error occurred during export: {e}") from e
+
+    result.output_path = output_file_path
+    return result
+
+def _read_records(records_path):
+    """Yields the records of a JSON lines or CSV export, with their line number."""
+    extension = os.path.splitext(records_path)[1].lower()
+    if extension not in ('.jsonl', '.json', '.csv'):
+        raise UnsupportedFileError(f"Unsupported record file type: {extension}. Use a .jsonl or .csv file.")
+
+    with open_subtitle(records_path) as f:
+        if extension == '.csv':
+            # Line 1 is the header row.
+            for line_number, row in enumerate(csv.DictReader(f), 2):
+                yield line_number, row
+        else:
+            for line_number, line in enumerate(f, 1):
+                if line.strip():
+                    try:
+                        yield line_number, json.loads(line)
+                    except ValueError as e:
+                        raise InvalidInputError(f"Line {line_number} of {records_path} is not valid JSON: {e}") from e
+
+def load_event_records(records_path, result=None):
+    """
+    Reads an edited export back as an event number -> (text, raw_text) mapping.
+
+    Only the `index`, `text` and `raw_text` columns are used; the others may be
+    dropped or left as they are. Either text column may be missing.
+
+    Raises:
+        MissingFileError: If the file does not exist.
+        UnsupportedFileError: If it is neither JSON lines nor CSV.
+        InvalidInputError: If a record has no valid `index`, or a text with a
+                           real line break, which would split its event in two
+                           (ASS line breaks are written '\\N').
+    """
+    if result is None:
+        result = ProcessResult()
+    records = {}
+    try:
+        for line_number, record in _read_records(records_path):
+            try:
+                index = int(record['index'])
+            except (KeyError, TypeError, ValueError) as e:
+                raise InvalidInputError(f"Record on line {line_number} of {records_path} has no valid 'index'.") from e
+            if index in records:
+                result.warn(f"Duplicate record for event {index} (line {line_number}). Keeping the first one.")
+                continue
+            text, raw_text = record.get('text'), record.get('raw_text')
+            for name, value in (('text', text), ('raw_text', raw_text)):
+                if isinstance(value, str) and ('\n' in value or '\r' in value):
+                    raise InvalidInputError(f"Record for event {index} on line {line_number} of {records_path} has a "
+                                            f"line break in '{name}' (use \\N for a new line in ASS).")
+            records[index] = (text, raw_text)
+    except FileNotFoundError as e:
+        raise MissingFileError(f"Record file not found at {records_path}") from e
+    except (OSError, UnicodeError, csv.Error) as e:
+        raise InvalidInputError(f"Could not read record file {records_path}: {e}") from e
+    return records
+
+def iter_imported_lines(items, records, result=None):
+    """
+    Rewrites the Dialogue events of a parsed ASS stream from edited records.
+
+    An event whose `raw_text` was edited takes it verbatim (override blocks
+    included). Otherwise, if its `text` was edited, the new text replaces the
+    dialogue and the original override blocks are placed at its beginning,
+    as replace_ass does. Events whose record is unchanged or missing keep
+    their original line.
+
+    Args:
+        items (iterable): Items produced by `ass_document.iter_ass_events`.
+        records (dict): Event number -> (text, raw_text), see `load_event_records`.
+        result (ProcessResult): Optional result that receives the counters and warnings.
+
+    Yields:
+        str: The output lines, without trailing newlines.
+    """
+    if result is None:
+        result = ProcessResult()
+    unchanged = 0
+    used = 0
+
+    for item in items:
+        if not isinstance(item, Dialogue):
+            yield item
+            continue
+        result.events_read += 1
+
+        record = records.get(item.number)
+        if record is None:
+            if item.is_translatable():
+                result.missing += 1
+                result.warn(f"No record for event {item.number}. Keeping original text.")
+            else:
+                result.skipped += 1
+            yield item.line
+            continue
+        used += 1
+
+        text, raw_text = record
+        if raw_text is not None and raw_text != item.text:
+            result.replaced += 1
+            yield item.header + raw_text
+        elif text is not None and text != item.clean_text():
+            result.replaced += 1
+            yield item.header + "".join(item.tags()) + text
+        else:
+            if item.is_translatable():
+                unchanged += 1
+                result.missing += 1
+            else:
+                result.skipped += 1
+            yield item.line
+
+    if unchanged:
+        result.warn(f"{unchanged} event(s) were not edited and keep their original text.")
+    if used < len(records):
+        result.extra += len(records) - used
+        result.warn(f"{len(records) - used} record(s) matched no Dialogue event and were ignored.")
+
+def import_ass_events(ass_file_path, records_path):
+    """
+    Writes a copy of an ASS/SSA file with the event texts of an edited
+    JSON lines or CSV export (see `export_ass_events`).
+
+    Records are matched to events by `index`, so rows may be filtered,
+    reordered or dropped without shifting the others.
+
+    Args:
+        ass_file_path (str): The full path to the original ASS file.
+        records_path (str): The edited '.jsonl' or '.csv' export.
+
+    Returns:
+        ProcessResult: The '<name>_Persian.ass' path, counters and warnings.
+
+    Raises:
+        MissingFileError: If one of the files does not exist.
+        UnsupportedFileError: If the record file is neither JSON lines nor CSV.
+        InvalidInputError: If the record file is malformed.
+        ProcessingError: If the ASS file cannot be read or written.
+    """
+    result = ProcessResult(ass_file_path)
+    records = load_event_records(records_path, result)
+
+    base_name, extension = os.path.splitext(ass_file_path)
+    output_file_path = base_name + "_Persian" + extension
+    try:
+        with open_subtitle(ass_file_path) as infile, \
+             open_output(output_file_path, output_encoding(infile.encoding)) as outfile:
+            items = stage('parse', iter_ass_events(infile))
+            write_joined_lines(outfile, stage('replace', iter_imported_lines(items, records, result)))
+    except FileNotFoundError as e:
+        raise MissingFileError(f"Original ASS file not found at {ass_file_path}") from e
+    except Exception as e:
+        raise ProcessingError(f"An unexpected error occurred during processing: {e}") from e
+
+    result.output_path = output_file_path
+    return result
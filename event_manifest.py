@@ -0,0 +1,72 @@
+# event_manifest.py
+
+import hashlib
+import json
+import os
+
+from translation_memory import normalize_source_text
+
+MANIFEST_VERSION = 1
+
+def default_manifest_path(subtitle_file_path):
+    """
+    Returns the manifest path used for a subtitle file
+    (e.g., 'episode.ass' -> 'episode_extracted_manifest.json').
+    """
+    base_name, _ = os.path.splitext(subtitle_file_path)
+    return base_name + "_extracted_manifest.json"
+
+def content_hash(text):
+    """
+    Returns a short, stable hash of a dialogue line's normalized clean text.
+    """
+    key = normalize_source_text(text).encode('utf-8')
+    return hashlib.blake2b(key, digest_size=8).hexdigest()
+
+def write_manifest(manifest_path, hashes, source_path):
+    """
+    Writes the per-line content hashes of an extraction.
+
+    Args:
+        manifest_path (str): The path of the JSON manifest.
+        hashes (list): The content hash of every extracted line, in ID order
+                       (hashes[0] belongs to line '1-').
+        source_path (str): The subtitle file the manifest belongs to.
+    """
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "source": os.path.basename(source_path),
+        "hashes": hashes,
+    }
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, separators=(',', ':'))
+
+def read_manifest(manifest_path):
+    """
+    Reads a manifest written by `write_manifest`.
+
+    Returns:
+        list: The content hash of every line, in ID order.
+
+    Raises:
+        ValueError: If the file is not a valid manifest.
+    """
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    if not isinstance(manifest, dict) or manifest.get("version") != MANIFEST_VERSION:
+        raise ValueError(f"Unsupported manifest file: {manifest_path}")
+    return manifest["hashes"]
+
+def map_translations_by_hash(hashes, translations):
+    """
+    Keys the translations of a previous run by the content hash of their source line.
+
+    Args:
+        hashes (list): The previous manifest hashes, in ID order.
+        translations (dict): The previous 1-based line ID -> translation mapping.
+
+    Returns:
+        dict: content hash -> translated text.
+    """
+    return {hashes[line_id - 1]: text for line_id, text in translations.items()
+            if 0 < line_id <= len(hashes)}
\ No newline at end of file
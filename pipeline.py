@@ -0,0 +1,115 @@
+# pipeline.py
+
+import os
+
+from ass_document import Dialogue, iter_ass_events
+from ass_replacer import iter_replaced_events, load_replacement_inputs
+from rtl_fixer import add_rle_to_ass_text, add_rle_to_dialogue, add_rle_to_srt_line
+from srt_parser import iter_srt_blocks
+from srt_replacer import iter_replaced_srt_lines
+from profiling import stage
+from results import InvalidInputError, MissingFileError, ProcessingError, ProcessResult, UnsupportedFileError
+from subtitle_io import open_output, open_subtitle, output_encoding
+from translation_memory import TranslationMemory
+
+def iter_pipeline_ass_lines(events, translations, memory=None, event_ids=None, result=None):
+    """
+    Replaces the dialogue of a parsed ASS stream and applies the RLE fix to
+    every Dialogue line in the same pass.
+
+    The result is identical to running replace_ass_dialogues and then
+    process_rtl_file on its output, without the intermediate file.
+
+    Args:
+        events (iterable): Items produced by `ass_document.iter_ass_events`.
+        translations (dict): 1-based line ID -> translated line.
+        memory (TranslationMemory): Optional translation memory.
+        event_ids (list): Optional line-to-unique-ID index.
+        result (ProcessResult): Optional result that receives the counters and warnings.
+
+    Yields:
+        str: The output lines, without trailing newlines.
+    """
+    for event, tags, translated_text in iter_replaced_events(events, translations, memory, event_ids,
+                                                             result=result):
+        if translated_text is not None:
+            # RLE goes after the first of the original tags, which now
+            # start the new text (see ass_replacer).
+            style_end = len(event.tags()[0]) if tags else 0
+            yield event.header + add_rle_to_ass_text(tags + translated_text, style_end)
+        elif isinstance(event, Dialogue):
+            yield add_rle_to_dialogue(event)
+        else:
+            yield event
+
+def iter_pipeline_srt_lines(items, translations, result=None):
+    """
+    Replaces the dialogue lines of a parsed SRT stream and applies the RLE fix
+    in the same pass (same result as replace_srt followed by RTL).
+
+    Yields:
+        str: The output lines, without trailing newlines.
+    """
+    for line in iter_replaced_srt_lines(items, translations, result):
+        yield add_rle_to_srt_line(line)
+
+def run_pipeline(subtitle_file_path, translation_file_path, memory_path=None, index_path=None):
+    """
+    Runs extract -> replace -> RTL fix without intermediate files: reads the
+    original subtitle and the translation file once and writes the final
+    RLE-fixed file once.
+
+    Args:
+        subtitle_file_path (str): The full path to the original ASS or SRT file.
+        translation_file_path (str): The full path to the TXT file containing the translations.
+        memory_path (str): Optional path to a translation memory database (ASS only).
+        index_path (str): Optional sidecar index of a deduplicated extraction (ASS only).
+
+    Returns:
+        ProcessResult: `output_path` is the final '_Persian_RLE_fixed' file; the
+                       counters and warnings describe the replacement.
+
+    Raises:
+        UnsupportedFileError: If the file is not an ASS, SSA or SRT file.
+        InvalidInputError: If an option does not apply to SRT or an input cannot be read.
+        MissingFileError: If an input file does not exist.
+        ProcessingError: If the subtitle file cannot be processed or written.
+    """
+    base_name, ext = os.path.splitext(subtitle_file_path)
+    is_srt = ext.lower() == '.srt'
+    if not is_srt and ext.lower() not in ('.ass', '.ssa'):
+        raise UnsupportedFileError(f"Unsupported file type: {ext}. Only .ass, .ssa and .srt are supported.")
+    if is_srt and (memory_path or index_path):
+        raise InvalidInputError("Translation memory and line index are only supported for ASS files.")
+
+    result = ProcessResult(subtitle_file_path)
+    translations, event_ids = load_replacement_inputs(translation_file_path, index_path,
+                                                      report_gaps=not memory_path, result=result,
+                                                      source_path=subtitle_file_path, require_ids=bool(memory_path))
+
+    output_file_path = base_name + "_Persian_RLE_fixed" + ext
+    memory = None
+    try:
+        if memory_path:
+            memory = TranslationMemory(memory_path)
+
+        with open_subtitle(subtitle_file_path) as infile, \
+             open_output(output_file_path, output_encoding(infile.encoding)) as outfile:
+            if is_srt:
+                output_lines = iter_pipeline_srt_lines(stage('parse', iter_srt_blocks(infile)), translations, result)
+            else:
+                output_lines = iter_pipeline_ass_lines(stage('parse', iter_ass_events(infile)), translations, memory,
+                                                       event_ids, result)
+            for line in stage('pipeline', output_lines):
+                outfile.write(line + '\n')
+
+        result.output_path = output_file_path
+        return result
+
+    except FileNotFoundError as e:
+        raise MissingFileError(f"Original subtitle file not found at {subtitle_file_path}") from e
+    except Exception as e:
+        raise ProcessingError(f"An error occurred during processing: {e}") from e
+    finally:
+        if memory is not None:
+            memory.close()
\ No newline at end of file
@@ -3,6 +3,48 @@
 import re
 import os
 
+from results import MissingFileError, ProcessingError, ProcessResult, UnsupportedFileError
+from subtitle_io import format_output_data, open_output, open_subtitle, output_encoding, read_subtitle_data
+
+# Regular expression to match one or more digits at the start of a line, 
+# followed by a hyphen ('-') and optional spaces.
+# The pattern is: ^(RLE?)(\d+)- *
+# ^ : start of the line
+# (\u202b?) : an optional RLE character added by the RTL fixer before the prefix
+# (\d+) : one or more digits (the line ID)
+# - : a literal hyphen
+# * : zero or more spaces (in case of '1- text' or '1-  text')
+PREFIX_PATTERN = re.compile(r'^(\u202b?)(\d+)- *')
+
+def split_line_prefix(line):
+    """
+    Splits a sequential prefix (e.g., '12-') from a line.
+
+    Args:
+        line (str): A line of an extracted or translated TXT file.
+
+    Returns:
+        tuple: (line ID as int, text without the prefix), or (None, line)
+               if the line has no prefix. A leading RLE character is kept.
+    """
+    match = PREFIX_PATTERN.match(line)
+    if match is None:
+        return None, line
+    return int(match.group(2)), match.group(1) + line[match.end():]
+
+def iter_prefix_removed_lines(lines, result):
+    """
+    Removes the sequential prefix of every line, keeping a leading RLE
+    character and the line endings. Counts the lines read and the prefixes
+    removed in `result`.
+    """
+    for line in lines:
+        # Use the regex pattern to substitute the prefix, keeping a leading RLE
+        new_line, count = PREFIX_PATTERN.subn(r'\1', line)
+        result.events_read += 1
+        result.replaced += count
+        yield new_line
+
 def remove_line_prefixes(input_file_path):
     """
     Removes sequential prefixes (e.g., '1-', '10-', '100-') from the beginning 
@@ -12,44 +54,56 @@ def remove_line_prefixes(input_file_path):
         input_file_path (str): The full path to the input TXT file.
 
     Returns:
-        str: The path to the newly created output file or an ERROR message.
+        ProcessResult: The output path, with `replaced` counting the lines
+                       whose prefix was removed.
+
+    Raises:
+        UnsupportedFileError: If the file is not a .txt file.
+        MissingFileError: If the file does not exist.
+        ProcessingError: If the file cannot be processed or written.
     """
     
-    # Regular expression to match one or more digits at the start of a line, 
-    # followed by a hyphen ('-') and optional spaces.
-    # The pattern is: ^\d+- *
-    # ^ : start of the line
-    # \d+ : one or more digits
-    # - : a literal hyphen
-    # * : zero or more spaces (in case of '1- text' or '1-  text')
-    PREFIX_PATTERN = re.compile(r'^\d+- *')
-    
     # 1. Determine output file path
     base_name, ext = os.path.splitext(input_file_path)
     if ext.lower() != '.txt':
-        return f"ERROR: Input file must be a .txt file. Received extension: {ext}"
+        raise UnsupportedFileError(f"Input file must be a .txt file. Received extension: {ext}")
     
     output_file_path = base_name + "_no_prefix.txt"
+    result = ProcessResult(input_file_path, output_file_path)
     
     try:
-        # Read the entire content
-        with open(input_file_path, 'r', encoding='utf-8') as infile:
-            lines = infile.readlines()
-        
-        # 2. Process lines and remove prefixes
-        processed_lines = []
-        for line in lines:
-            # Use the regex pattern to substitute the prefix with an empty string
-            clean_line = PREFIX_PATTERN.sub('', line)
-            processed_lines.append(clean_line)
-            
-        # 3. Write the cleaned content to the new output file
-        with open(output_file_path, 'w', encoding='utf-8') as outfile:
-            outfile.writelines(processed_lines)
+        # Stream the file line by line; the input is opened first, so a
+        # missing file does not leave an empty output behind.
+        with open_subtitle(input_file_path) as infile, \
+             open_output(output_file_path, output_encoding(infile.encoding)) as outfile:
+            # 2. Process lines and remove prefixes
+            for new_line in iter_prefix_removed_lines(infile, result):
+                outfile.write(new_line)
         
-        return output_file_path
+        return result
 
-    except FileNotFoundError:
-        return f"ERROR: File not found at {input_file_path}"
+    except FileNotFoundError as e:
+        raise MissingFileError(f"File not found at {input_file_path}") from e
     except Exception as e:
-        return f"ERROR processing file: {e}"
\ No newline at end of file
+        raise ProcessingError(f"Error processing file {input_file_path}: {e}") from e
+
+def remove_line_prefixes_data(data):
+    """
+    Removes sequential prefixes from in-memory text, without touching the disk.
+
+    Args:
+        data (str, bytes or iterable): The text, raw bytes (the encoding is
+                                       detected as for files) or lines.
+
+    Returns:
+        ProcessResult: `output` holds the text without prefixes in the shape
+                       of `data` (lines keep their own endings); `replaced`
+                       counts the lines whose prefix was removed.
+
+    Raises:
+        InvalidInputError: If the bytes cannot be decoded.
+    """
+    result = ProcessResult()
+    lines, encoding = read_subtitle_data(data)
+    result.output = format_output_data(iter_prefix_removed_lines(lines, result), data, encoding, separator='')
+    return result
@@ -0,0 +1,298 @@
+# profiling.py
+
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+# Path of the profile output. '*.prof' / '*.pstats' writes cProfile dumps,
+# anything else appends one JSON line per command.
+PROFILE_ENV_VAR = 'SUBTOOL_PROFILE'
+CPROFILE_EXTENSIONS = ('.prof', '.pstats')
+
+# Time spent in the command itself, outside every named stage.
+ROOT_STAGE = 'command'
+
+# The profile of the command running in each thread (`profile` attribute,
+# unset when profiling is off), so the service threads never share one.
+_local = threading.local()
+_dump_counter = 0
+
+def current_profile():
+    """Returns the profile of the command running in this thread, or None."""
+    return getattr(_local, 'profile', None)
+
+def profile_path():
+    """Returns the configured profile output path, or None if profiling is off."""
+    return os.environ.get(PROFILE_ENV_VAR) or None
+
+def set_profile_path(path):
+    """Turns profiling on for this process and its workers (None turns it off)."""
+    if path:
+        os.environ[PROFILE_ENV_VAR] = path
+    else:
+        os.environ.pop(PROFILE_ENV_VAR, None)
+
+def peak_rss_kb():
+    """
+    Returns the peak resident set size of the whole process in KiB (None if
+    unknown). It is a high-water mark: it never goes down, and it counts the
+    memory of every thread and of the stages that ran before.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KiB on Linux.
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+class StageStats:
+    """
+    Counters of one stage: exclusive wall time, items, bytes and the process
+    peak RSS when the stage finished (not the memory used by the stage).
+    """
+
+    __slots__ = ('wall', 'items', 'bytes', 'process_peak_rss_kb')
+
+    def __init__(self):
+        self.wall = 0.0
+        self.items = 0
+        self.bytes = 0
+        self.process_peak_rss_kb = None
+
+    def to_dict(self):
+        return {
+            'wall_s': round(self.wall, 6),
+            'items': self.items,
+            'bytes': self.bytes,
+            'process_peak_rss_kb': self.process_peak_rss_kb,
+        }
+
+class CommandProfile:
+    """
+    Collects the stage timings of one command.
+
+    Stages nest the way the streaming generators do (write pulls from rtl,
+    which pulls from parse, which pulls from read), so every stage records
+    its exclusive time: the time spent inside it minus the time spent in
+    the stages it called.
+    """
+
+    def __init__(self, command, args=()):
+        self.command = command
+        self.args = [str(arg) for arg in args]
+        self.stages = {}
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self._stack = [[ROOT_STAGE, time.perf_counter(), 0.0]]
+
+    def stage_stats(self, name):
+        stats = self.stages.get(name)
+        if stats is None:
+            stats = self.stages[name] = StageStats()
+        return stats
+
+    def enter(self, name):
+        self._stack.append([name, time.perf_counter(), 0.0])
+
+    def exit(self):
+        name, start, child_time = self._stack.pop()
+        elapsed = time.perf_counter() - start
+        self.stage_stats(name).wall += elapsed - child_time
+        self._stack[-1][2] += elapsed
+
+    def finish(self):
+        """Closes the root stage and returns the JSON record of the command."""
+        _, start, child_time = self._stack[0]
+        wall = time.perf_counter() - start
+        root = self.stage_stats(ROOT_STAGE)
+        root.wall = wall - child_time
+        root.process_peak_rss_kb = peak_rss_kb()
+        for stats in self.stages.values():
+            # Stages timed call by call (tokenize) have no end of their own.
+            if stats.process_peak_rss_kb is None:
+                stats.process_peak_rss_kb = root.process_peak_rss_kb
+        return {
+            'command': self.command,
+            'args': self.args,
+            'pid': os.getpid(),
+            'wall_s': round(wall, 6),
+            'bytes_read': self.bytes_read,
+            'bytes_written': self.bytes_written,
+            'peak_rss_kb': root.process_peak_rss_kb,
+            'stages': {name: stats.to_dict() for name, stats in self.stages.items()},
+        }
+
+def _timed_iter(profile, name, iterable):
+    stats = profile.stage_stats(name)
+    iterator = iter(iterable)
+    try:
+        while True:
+            profile.enter(name)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                profile.exit()
+            stats.items += 1
+            yield item
+    finally:
+        stats.process_peak_rss_kb = peak_rss_kb()
+
+def stage(name, iterable):
+    """
+    Times a streaming stage of the running command.
+
+    Returns `iterable` itself when profiling is off, so the hot path pays a
+    single lookup per call, not per item.
+    """
+    profile = current_profile()
+    if profile is None:
+        return iterable
+    return _timed_iter(profile, name, iterable)
+
+def timed_call(name, function, *args):
+    """
+    Calls `function(*args)` and times it as stage `name` of the running
+    command, e.g. the lazy tokenization of one Dialogue record.
+    """
+    # Inlined current_profile(): this runs once per Dialogue record.
+    profile = getattr(_local, 'profile', None)
+    if profile is None:
+        return function(*args)
+    profile.enter(name)
+    try:
+        return function(*args)
+    finally:
+        profile.exit()
+        profile.stage_stats(name).items += 1
+
+class ProfiledReader:
+    """Wraps an input file: iterating it is timed as the 'read' stage."""
+
+    def __init__(self, file, profile):
+        self._file = file
+        self._profile = profile
+        size = os.path.getsize(file.name)
+        profile.bytes_read += size
+        profile.stage_stats('read').bytes += size
+
+    def __iter__(self):
+        return _timed_iter(self._profile, 'read', self._file)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self._file.close()
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+class ProfiledWriter:
+    """Wraps an output file: every write is timed as the 'write' stage."""
+
+    def __init__(self, file, profile):
+        self._file = file
+        self._profile = profile
+        self._stats = profile.stage_stats('write')
+
+    def write(self, text):
+        self._profile.enter('write')
+        try:
+            return self._file.write(text)
+        finally:
+            self._profile.exit()
+            self._stats.items += 1
+
+    def close(self):
+        if self._file.closed:
+            return
+        self._profile.enter('write')
+        try:
+            self._file.close()
+        finally:
+            self._profile.exit()
+        size = os.path.getsize(self._file.name)
+        self._profile.bytes_written += size
+        self._stats.bytes += size
+        self._stats.process_peak_rss_kb = peak_rss_kb()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+def wrap_reader(file):
+    """Returns `file`, wrapped for timing when a command is being profiled."""
+    profile = current_profile()
+    return file if profile is None else ProfiledReader(file, profile)
+
+def wrap_writer(file):
+    """Returns `file`, wrapped for timing when a command is being profiled."""
+    profile = current_profile()
+    return file if profile is None else ProfiledWriter(file, profile)
+
+def _dump_path(path, command):
+    global _dump_counter
+    _dump_counter += 1
+    base, ext = os.path.splitext(path)
+    return f"{base}-{command}-{os.getpid()}-{_dump_counter}{ext}"
+
+@contextlib.contextmanager
+def profile_command(command, args=()):
+    """
+    Profiles one command when SUBTOOL_PROFILE is set; does nothing otherwise.
+
+    JSON lines mode appends one record per command with the wall time,
+    bytes read and written, peak RSS and the per-stage counters (read,
+    parse, tokenize, replace, rtl, pipeline, export, write and the remaining
+    'command' time). cProfile mode ('*.prof') writes one dump per command
+    next to the configured path, e.g. 'out-replace_ass-<pid>-1.prof'.
+
+    Args:
+        command (str): The command name.
+        args (iterable): The command arguments, recorded as strings.
+
+    Yields:
+        CommandProfile or None: The profile being collected (JSON lines mode).
+    """
+    path = profile_path()
+    if not path or current_profile() is not None:
+        # Off, or already inside a profiled command.
+        yield None
+        return
+
+    if path.lower().endswith(CPROFILE_EXTENSIONS):
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield None
+        finally:
+            profiler.disable()
+            profiler.dump_stats(_dump_path(path, command))
+        return
+
+    profile = CommandProfile(command, args)
+    _local.profile = profile
+    try:
+        yield profile
+    finally:
+        _local.profile = None
+        record = profile.finish()
+        # One write per record, so processes appending to the same file do not interleave.
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
@@ -0,0 +1,84 @@
+# results.py
+
+
+class SubtitleToolError(Exception):
+    """Base class of the errors raised by the subtitle tools."""
+
+class MissingFileError(SubtitleToolError, FileNotFoundError):
+    """An input file (subtitle, translation, index, manifest) does not exist."""
+
+class UnsupportedFileError(SubtitleToolError, ValueError):
+    """The file type is not supported by the command."""
+
+class InvalidInputError(SubtitleToolError, ValueError):
+    """An input file or option is malformed or cannot be used with the others."""
+
+class ProcessingError(SubtitleToolError):
+    """An unexpected failure while reading, processing or writing a file."""
+
+
+class ProcessResult:
+    """
+    The outcome of one command on one file.
+
+    Problems that do not stop the command (missing or extra translations,
+    duplicate IDs, ...) are collected in `warnings` instead of being printed,
+    so results of many files can be aggregated.
+
+    Attributes:
+        source_path (str): The processed file.
+        output_path (str): The file that was written (None for extractors).
+        lines (list): The extracted lines (extractors only).
+        line_count (int): The number of lines written by the extractors that
+                          stream into their output file instead of `lines`.
+        files (list): The members written into the output archive (archive commands only).
+        output: The output content of the in-memory '*_data' variants: str, bytes
+                or a lazy iterator of lines, in the shape of their input.
+        events_read (int): Dialogue events, SRT cues or lines read.
+        replaced (int): Lines replaced with a translation (including those from the memory).
+        from_memory (int): Lines filled from the translation memory (replacers) or
+                           not extracted because the memory knows them (extractors).
+        skipped (int): Events without translatable text, left untouched.
+        missing (int): Lines without a translation, kept in the original language.
+        extra (int): Translation lines that matched no dialogue line.
+        warnings (list): Human-readable warning messages.
+    """
+
+    COUNTERS = ('events_read', 'replaced', 'from_memory', 'skipped', 'missing', 'extra')
+
+    def __init__(self, source_path=None, output_path=None, lines=None):
+        self.source_path = source_path
+        self.output_path = output_path
+        self.lines = lines
+        self.line_count = None
+        self.files = None
+        self.output = None
+        self.events_read = 0
+        self.replaced = 0
+        self.from_memory = 0
+        self.skipped = 0
+        self.missing = 0
+        self.extra = 0
+        self.warnings = []
+
+    def warn(self, message):
+        """Records a warning."""
+        self.warnings.append(message)
+
+    def to_dict(self):
+        """Returns the result as a JSON-serializable dict (without the extracted lines or the output)."""
+        data = {'source_path': self.source_path, 'output_path': self.output_path}
+        if self.lines is not None:
+            data['lines'] = len(self.lines)
+        elif self.line_count is not None:
+            data['lines'] = self.line_count
+        if self.files is not None:
+            data['files'] = list(self.files)
+        for name in self.COUNTERS:
+            data[name] = getattr(self, name)
+        data['warnings'] = list(self.warnings)
+        return data
+
+    def __repr__(self):
+        counts = ", ".join(f"{name}={getattr(self, name)}" for name in self.COUNTERS if getattr(self, name))
+        return f"ProcessResult({self.output_path or self.source_path!r}{', ' + counts if counts else ''})"
@@ -1,8 +1,19 @@
 import os
 import re
 
+from ass_document import Dialogue, iter_ass_events
+from ass_tokenizer import LINE_BREAK, leading_override_block
+from bidi_reorder import reorder_ass_text, reorder_words
+from prefix_remover import PREFIX_PATTERN
+from profiling import stage
+from results import MissingFileError, ProcessingError, ProcessResult, UnsupportedFileError
+from subtitle_io import format_output_data, open_output, open_subtitle, output_encoding, read_subtitle_data
+
 RLE_CHAR = '\u202b'
 
+# File types the RTL fixer supports.
+RTL_EXTENSIONS = ('.txt', '.srt', '.ass')
+
 def add_rle_to_text(text: str) -> str:
     """
     Adds the RLE (Right-to-Left Embedding) character to the beginning of the text.
@@ -15,6 +26,22 @@ def add_rle_to_text(text: str) -> str:
             return RLE_CHAR + text
     return text
 
+def reorder_text_line(line: str) -> str:
+    """
+    Reverses the word order of a TXT or SRT text line for players without
+    bidi support (see `bidi_reorder.reorder_words`).
+
+    An extraction prefix such as '12- ' stays at the start of the line.
+    """
+    match = PREFIX_PATTERN.match(line)
+    if match:
+        return line[:match.end()] + reorder_words(line[match.end():])
+    return reorder_words(line)
+
+def is_srt_dialogue_line(line: str) -> bool:
+    """True for SRT lines that carry dialogue (not empty, not a number or timestamp)."""
+    return bool(line.strip()) and not re.match(r'^\s*\d+$', line) and not re.match(r'^\s*\d{2}:\d{2}:\d{2}', line)
+
 def add_rle_to_srt_line(line: str) -> str:
     """
     Adds the RLE character to the beginning of dialogue lines in an SRT file.
@@ -22,12 +49,51 @@ def add_rle_to_srt_line(line: str) -> str:
     It ignores timestamp lines, sequence number lines, and empty lines.
     """
     # Skip empty lines, timestamp lines, and sequence number lines
-    if not line.strip() or re.match(r'^\s*\d+$', line) or re.match(r'^\s*\d{2}:\d{2}:\d{2}', line):
+    if not is_srt_dialogue_line(line):
         return line
     
     # Add RLE to the beginning of dialogue lines
     return add_rle_to_text(line)
 
+def add_rle_to_ass_text(text_content: str, style_end: int = 0) -> str:
+    """
+    Adds the RLE character to the Text field of an ASS Dialogue line.
+
+    RLE is placed immediately after the leading styling code, which ends at
+    `style_end` (0 if the text does not start with one), and after every
+    line break separator (\\N).
+    """
+    if style_end:
+        # 2. If a style code exists, place RLE after it
+        style_code = text_content[:style_end]
+        remaining_text = text_content[style_end:]
+
+        # 3. Add RLE after the style codes and also after every \N
+        return style_code + RLE_CHAR + remaining_text.replace(LINE_BREAK, LINE_BREAK + RLE_CHAR)
+
+    # 3. Add RLE at the very beginning and also after every \N
+    return RLE_CHAR + text_content.replace(LINE_BREAK, LINE_BREAK + RLE_CHAR)
+
+def add_rle_to_dialogue(event: Dialogue, fix_words: bool = False) -> str:
+    """
+    Adds the RLE character to the text of an already parsed ASS Dialogue event.
+
+    The leading styling code comes from the event's tokenized Text field, so
+    the text is not scanned again. With `fix_words`, the word order of every
+    text segment is reversed first; override tags stay where they are.
+
+    Events without dialogue text (vector drawings, empty karaoke carriers,
+    templater effects) are returned unchanged: an RLE inside drawing
+    commands corrupts the shape.
+    """
+    if not event.is_translatable():
+        return event.line
+    if fix_words:
+        # Reordering may move the styled runs, so the leading block is read again.
+        text = reorder_ass_text(event.text)
+        return event.header + add_rle_to_ass_text(text, len(leading_override_block(text)))
+    return event.header + add_rle_to_ass_text(event.text, len(event.leading_tag()))
+
 def add_rle_to_ass_dialogue(line: str) -> str:
     """
     Intelligently adds the RLE character to the dialogue text section of an ASS line.
@@ -36,85 +102,121 @@ def add_rle_to_ass_dialogue(line: str) -> str:
     1. Locates the dialogue text section (after the 9th comma).
     2. Places RLE immediately after any styling codes (e.g., {\i1}, {\b1}, etc.).
     3. Places RLE after every line break separator (\ N).
+    Lines without dialogue text (drawings, karaoke carriers) are left untouched.
     """
     
-    # 1. Split the line by comma to isolate the dialogue text
-    parts = line.split(',', 9)
-    if len(parts) < 10 or not parts[0].strip().lower().startswith('dialogue'):
+    # 1. Parse the line to isolate the dialogue text
+    event = Dialogue.from_line(line)
+    if event is None:
         return line # Return non-dialogue or incomplete lines untouched
 
-    prefix = ','.join(parts[:9]) + ','
-    text_content = parts[9]
-    
-    # Pattern to find styling codes at the start of the text (like {\i1})
-    # Uses non-greedy matching to capture only the first style block
-    style_match = re.match(r'^(\{.*?\})', text_content)
-    
-    if style_match:
-        # 2. If a style code exists, place RLE after it
-        style_code = style_match.group(1)
-        remaining_text = text_content[len(style_code):]
-        
-        # 3. Add RLE after the style codes and also after every \N
-        processed_text = style_code + RLE_CHAR + remaining_text.replace(r'\N', r'\N' + RLE_CHAR)
+    return add_rle_to_dialogue(event)
+
+
+def iter_rtl_fixed_lines(lines, ext: str, fix_words_flag: bool = False):
+    """
+    Applies the RLE fix (and optionally the word order fix) to a TXT, SRT or
+    ASS stream.
+
+    :param lines: Any iterable of lines, e.g. an open file object.
+    :param ext: The extension of the file the lines come from ('.txt', '.srt' or '.ass').
+    :param fix_words_flag: Flag to enable/disable word order fixing.
+    :return: A generator of the fixed lines, without trailing newlines.
+    :raises UnsupportedFileError: If the extension is not supported (raised at once).
+    """
+    ext = ext.lower()
+    if ext == '.ass':
+        # ASS files go through the shared streaming parser, which
+        # follows the 'Format:' line of the [Events] section.
+        events = stage('parse', iter_ass_events(lines))
+        return (add_rle_to_dialogue(event, fix_words_flag) if isinstance(event, Dialogue) else event
+                for event in events)
+
+    if ext == '.txt':
+        process_line_func = add_rle_to_text
+    elif ext == '.srt':
+        process_line_func = add_rle_to_srt_line
     else:
-        # 3. Add RLE at the very beginning and also after every \N
-        processed_text = RLE_CHAR + text_content.replace(r'\N', r'\N' + RLE_CHAR)
-        
-    return prefix + processed_text
+        raise UnsupportedFileError(f"Unsupported file type: {ext}. Only .txt, .srt, and .ass are supported.")
+
+    # Word order fixing runs before the RLE fix, on the same lines it applies to
+    if fix_words_flag:
+        if ext == '.txt':
+            process_line_func = lambda line: add_rle_to_text(reorder_text_line(line))
+        else:
+            process_line_func = lambda line: (add_rle_to_text(reorder_text_line(line))
+                                              if is_srt_dialogue_line(line) else line)
+
+    # Apply the RLE fix only to lines that require it: every line of a
+    # TXT file, only dialogue lines (not empty lines/timestamps) of an SRT.
+    return (process_line_func(line.rstrip('\n')) for line in lines)
 
 
 # The main function process_rtl_file, called in cli_tool.py
-def process_rtl_file(file_path: str, fix_words_flag: bool = False) -> str:
+def process_rtl_file(file_path: str, fix_words_flag: bool = False) -> ProcessResult:
     """
     Opens the input file and fixes RTL texts (using RLE).
     This function supports TXT, SRT, and ASS file formats.
     
     :param file_path: The full path to the input file.
-    :param fix_words_flag: Flag to enable/disable word order fixing.
-      (This feature is currently not implemented in this function, but the parameter is kept for CLI compatibility)
-    :return: The path to the output file or an error string.
+    :param fix_words_flag: Flag to enable/disable word order fixing. When enabled,
+      the words of every dialogue line are also reordered for players without
+      bidi support (override tags, SRT numbers/timestamps and line prefixes are kept).
+    :return: A ProcessResult with the output path and the number of lines processed.
+    :raises MissingFileError: If the file does not exist.
+    :raises UnsupportedFileError: If the file is not a TXT, SRT or ASS file.
+    :raises ProcessingError: If the file cannot be processed or written.
     """
     
     if not os.path.exists(file_path):
-        return f"ERROR: File not found at {file_path}"
+        raise MissingFileError(f"File not found at {file_path}")
 
     base, ext = os.path.splitext(file_path)
     output_path = base + "_RLE_fixed" + ext
-    
-    # Determine file type and the corresponding processing function
-    ext = ext.lower()
-    
-    if ext == '.txt':
-        process_line_func = add_rle_to_text
-    elif ext == '.srt':
-        process_line_func = add_rle_to_srt_line
-    elif ext == '.ass':
-        process_line_func = add_rle_to_ass_dialogue
-    else:
-        return f"ERROR: Unsupported file type: {ext}. Only .txt, .srt, and .ass are supported."
-
-    # Simple implementation logic for fix_words_flag (in case new logic needs to be added)
-    if fix_words_flag:
-
-        pass
+    if ext.lower() not in RTL_EXTENSIONS:
+        raise UnsupportedFileError(f"Unsupported file type: {ext.lower()}. Only .txt, .srt, and .ass are supported.")
 
+    result = ProcessResult(file_path, output_path)
     try:
-        with open(file_path, 'r', encoding='utf-8') as infile, \
-             open(output_path, 'w', encoding='utf-8') as outfile:
-            
-            for line in infile:
-                # Apply the RLE fix only to lines that require it
-                if ext == '.txt':
-                    # In TXT files, all lines are processed
-                    new_line = process_line_func(line.rstrip('\n')) + '\n'
-                else:
-                    # For SRT and ASS, only dialogue lines (and not empty lines/timestamps in SRT) are processed
-                    new_line = process_line_func(line.rstrip('\n')) + '\n'
-                
-                outfile.write(new_line)
+        with open_subtitle(file_path) as infile, \
+             open_output(output_path, output_encoding(infile.encoding)) as outfile:
+            for line in stage('rtl', iter_rtl_fixed_lines(infile, ext, fix_words_flag)):
+                outfile.write(line + '\n')
+                result.events_read += 1
                 
-        return output_path
+        return result
 
     except Exception as e:
-        return f"ERROR: An error occurred during file processing: {e}"
\ No newline at end of file
+        raise ProcessingError(f"An error occurred during file processing: {e}") from e
+
+
+def process_rtl_data(data, ext: str, fix_words_flag: bool = False) -> ProcessResult:
+    """
+    Fixes RTL texts (using RLE) of in-memory TXT, SRT or ASS content,
+    without touching the disk.
+
+    :param data: The content as str, raw bytes (the encoding is detected as for files) or lines.
+    :param ext: The type of the content: '.txt', '.srt' or '.ass'.
+    :param fix_words_flag: Flag to enable/disable word order fixing.
+    :return: A ProcessResult whose `output` holds the fixed content in the shape of
+      `data` (str, bytes, or a lazy iterator of lines without trailing newlines).
+    :raises UnsupportedFileError: If the type is not TXT, SRT or ASS.
+    :raises InvalidInputError: If the bytes cannot be decoded.
+    :raises ProcessingError: If the content cannot be processed.
+    """
+    if ext.lower() not in RTL_EXTENSIONS:
+        raise UnsupportedFileError(f"Unsupported file type: {ext.lower()}. Only .txt, .srt, and .ass are supported.")
+
+    result = ProcessResult()
+    lines, encoding = read_subtitle_data(data)
+
+    def fixed_lines():
+        for line in stage('rtl', iter_rtl_fixed_lines(lines, ext, fix_words_flag)):
+            result.events_read += 1
+            yield line
+
+    try:
+        result.output = format_output_data(fixed_lines(), data, encoding, final_separator=True)
+    except Exception as e:
+        raise ProcessingError(f"An error occurred during processing: {e}") from e
+    return result
@@ -1,8 +1,128 @@
 # srt_parser.py
 
-def extract_dialogue_text_from_srt(srt_file_path):
+import itertools
+
+from profiling import stage
+from results import MissingFileError, ProcessingError, ProcessResult
+from subtitle_io import open_subtitle, save_extracted_texts
+
+class SrtCue:
+    """
+    A single SRT block (cue) with its structure preserved.
+
+    Attributes:
+        number (int): 1-based position of the cue in the file.
+        head (list): The raw lines up to and including the timing line
+                     (usually the cue index and the timestamp).
+        lines (list): The raw text lines that follow the timing line.
+    """
+
+    __slots__ = ('number', 'head', 'lines')
+
+    def __init__(self, number, head, lines):
+        self.number = number
+        self.head = head
+        self.lines = lines
+
+    @property
+    def index(self):
+        """The cue index as written in the file (e.g., '12'), or ''."""
+        return self.head[-2].strip() if len(self.head) > 1 else ''
+
+    @property
+    def timing(self):
+        """The timing line (e.g., '00:00:04,509 --> 00:00:09,731')."""
+        return self.head[-1].strip()
+
+    def text_lines(self):
+        """
+        Returns the positions (in `lines`) of the dialogue lines of the cue.
+
+        The same rules as the extractor apply: lines that are empty, only
+        digits or contain '-->' are not dialogue.
+        """
+        return [position for position, line in enumerate(self.lines) if is_srt_text_line(line.strip())]
+
+    def to_lines(self):
+        """Returns all raw lines of the cue."""
+        return self.head + self.lines
+
+def is_srt_text_line(line):
+    """True if a stripped line inside a cue is dialogue text."""
+    # Timestamps contain "-->" and block numbers are only digits.
+    return bool(line) and "-->" not in line and not line.isdigit()
+
+def iter_srt_blocks(lines):
+    """
+    Streams an SRT file as a sequence of cues and raw lines.
+
+    Consecutive non-empty lines form a block. A block containing a timing
+    line ('-->') is yielded as an `SrtCue`; empty lines and blocks without
+    timing are yielded as plain strings (without trailing newlines).
+
+    Args:
+        lines (iterable): Any iterable of lines, e.g. an open file object.
+
+    Yields:
+        SrtCue or str: The file items in order.
+    """
+    block = []
+    number = 0
+
+    # A final None flushes the last block when the file has no trailing empty line.
+    for line in itertools.chain(lines, [None]):
+        if line is not None:
+            line = line.rstrip('\r\n')
+            if line.strip():
+                block.append(line)
+                continue
+
+        # An empty line marks the end of a block
+        if block:
+            timing_position = next((i for i, text in enumerate(block) if "-->" in text), None)
+            if timing_position is None:
+                yield from block
+            else:
+                number += 1
+                yield SrtCue(number, block[:timing_position + 1], block[timing_position + 1:])
+            block = []
+
+        if line is not None:
+            yield line
+
+def iter_dialogue_text_from_srt(lines, add_prefix=False, result=None):
     """
-    Extracts dialogue texts from an SRT file and returns them as a list.
+    Streams the dialogue lines of an SRT file.
+
+    Args:
+        lines (iterable): Any iterable of lines, e.g. an open file object.
+        add_prefix (bool): If True, prepends the line number followed by '-'
+                           (e.g., '1-', '2-') to every extracted line.
+        result (ProcessResult): Optional result whose `events_read` counts the cues.
+
+    Yields:
+        str: One dialogue line at a time.
+    """
+    line_counter = 0
+    
+    for cue in stage('parse', iter_srt_blocks(lines)):
+        # Lines outside of a cue (no timing line) are not dialogue.
+        if not isinstance(cue, SrtCue):
+            continue
+        if result is not None:
+            result.events_read += 1
+
+        for position in cue.text_lines():
+            line_counter += 1
+            line = cue.lines[position].strip()
+            if add_prefix:
+                yield f"{line_counter}-{line}"
+            else:
+                yield line
+
+def extract_dialogue_text_from_srt(srt_file_path, add_prefix=False):
+    """
+    Extracts dialogue texts from an SRT file.
 
     SRT format blocks:
     1
@@ -12,46 +132,56 @@ def extract_dialogue_text_from_srt(srt_file_path):
 
     Args:
         srt_file_path (str): The full path to the SRT file.
+        add_prefix (bool): If True, prepends the line number followed by '-'
+                           (e.g., '1-', '2-') to every extracted line.
 
     Returns:
-        list: A list of strings, where each string is a dialogue line.
+        ProcessResult: `lines` holds the dialogue lines, `events_read` the number of cues.
+
+    Raises:
+        MissingFileError: If the SRT file does not exist.
+        ProcessingError: If the file cannot be processed.
     """
-    dialogue_texts = []
-    
+    result = ProcessResult(srt_file_path)
+    try:
+        # The file is iterated line by line instead of being read with readlines().
+        with open_subtitle(srt_file_path) as f:
+            result.lines = list(iter_dialogue_text_from_srt(f, add_prefix, result))
+        return result
+
+    except FileNotFoundError as e:
+        raise MissingFileError(f"File not found at {srt_file_path}") from e
+    except Exception as e:
+        raise ProcessingError(f"Error processing file {srt_file_path}: {e}") from e
+
+def save_dialogue_text_from_srt(srt_file_path, add_prefix=False):
+    """
+    Extracts the dialogue of an SRT file straight into '<name>_extracted.txt'.
+
+    Unlike extract_dialogue_text_from_srt, the lines are written as they are
+    read and never collected, so memory use does not depend on the file size.
+
+    Args:
+        srt_file_path (str): The full path to the SRT file.
+        add_prefix (bool): If True, prepends the line number followed by '-'.
+
+    Returns:
+        ProcessResult: `output_path` is the '_extracted.txt' file, `line_count`
+                       the number of lines written and `events_read` the number of cues.
+
+    Raises:
+        MissingFileError: If the SRT file does not exist.
+        ProcessingError: If the file cannot be processed or written.
+    """
+    result = ProcessResult(srt_file_path)
     try:
-        with open(srt_file_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-            
-            # Flags and variables
-            is_dialogue_block = False
-            
-            for line in lines:
-                line = line.strip()
-                
-                # Check for empty line, which marks the end of a block
-                if not line:
-                    is_dialogue_block = False
-                    continue
-                
-                # Check if line is a timestamp (e.g., 00:00:04,509 --> 00:00:09,731)
-                # Timestamps contain "-->"
-                if "-->" in line:
-                    # Next line(s) will be dialogue text
-                    is_dialogue_block = True
-                    continue
-                
-                # Check if line is a block number (e.g., "1", "2")
-                # This check is basic, assuming block numbers are only digits.
-                if line.isdigit():
-                    continue
-
-                # If it's not empty, not a timestamp, and not a block number, it must be the dialogue text.
-                if is_dialogue_block:
-                    dialogue_texts.append(line)
-        
-        return dialogue_texts
-
-    except FileNotFoundError:
-        return [f"ERROR: File not found at {srt_file_path}"]
+        # The input is opened first, so a missing file creates no output.
+        with open_subtitle(srt_file_path) as f:
+            result.output_path = save_extracted_texts(iter_dialogue_text_from_srt(f, add_prefix, result),
+                                                      srt_file_path, result)
+        return result
+
+    except FileNotFoundError as e:
+        raise MissingFileError(f"File not found at {srt_file_path}") from e
     except Exception as e:
-        return [f"ERROR processing file: {e}"]
\ No newline at end of file
+        raise ProcessingError(f"Error processing file {srt_file_path}: {e}") from e
\ No newline at end of file
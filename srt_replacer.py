@@ -0,0 +1,105 @@
+# srt_replacer.py
+
+import os
+
+from ass_replacer import load_replacement_inputs
+from srt_parser import SrtCue, iter_srt_blocks
+from profiling import stage
+from results import MissingFileError, ProcessingError, ProcessResult
+from subtitle_io import open_output, open_subtitle, output_encoding
+
+def iter_replaced_srt_lines(items, translations, result=None):
+    """
+    Replaces the dialogue lines of a parsed SRT stream with `translations`.
+
+    Translations are matched per dialogue line, in the same order and with
+    the same IDs as `extract_dialogue_text_from_srt` produces, so every cue
+    keeps its index, timing and number of lines.
+
+    Args:
+        items (iterable): Items produced by `srt_parser.iter_srt_blocks`.
+        translations (dict): 1-based line ID -> translated line, as returned by
+            `ass_replacer.parse_translation_lines`.
+        result (ProcessResult): Optional result that receives the counters
+            and the warnings (missing and extra translations).
+
+    Yields:
+        str: The output lines, without trailing newlines.
+    """
+    if result is None:
+        result = ProcessResult()
+    line_id = 0
+    used_ids = 0
+
+    for item in items:
+        if not isinstance(item, SrtCue):
+            yield item
+            continue
+        result.events_read += 1
+
+        yield from item.head
+        text_positions = set(item.text_lines())
+        for position, line in enumerate(item.lines):
+            if position not in text_positions:
+                yield line
+                continue
+
+            line_id += 1
+            translated_text = translations.get(line_id)
+            if translated_text is not None:
+                used_ids += 1
+                yield translated_text
+            else:
+                # If a translation is missing, keep the original line.
+                result.missing += 1
+                result.warn(f"Missing translation for line {line_id} (cue {item.index or item.number}). Keeping original text.")
+                yield line
+
+    result.replaced += used_ids
+    if used_ids < len(translations):
+        result.extra += len(translations) - used_ids
+        result.warn(f"{len(translations) - used_ids} extra translation line(s) were ignored.")
+
+def replace_srt_dialogues(srt_file_path, translation_file_path):
+    """
+    Reads Persian translations from a TXT file and replaces the dialogue lines
+    of an SRT file, preserving cue indexes, timings and line layout.
+
+    Args:
+        srt_file_path (str): The full path to the original SRT file.
+        translation_file_path (str): The full path to the TXT file containing the translations
+                                     (one dialogue line per line, optionally with '1-', '2-', ...
+                                     prefixes, which are then used as IDs).
+
+    Returns:
+        ProcessResult: `output_path` is the newly created SRT file; the
+                       counters and warnings describe the replacement.
+
+    Raises:
+        MissingFileError: If an input file does not exist.
+        InvalidInputError: If the translation file cannot be read.
+        ProcessingError: If the SRT file cannot be processed or written.
+    """
+    result = ProcessResult(srt_file_path)
+
+    # 1. Read Translation Texts (Persian)
+    translations, _ = load_replacement_inputs(translation_file_path, result=result)
+
+    # 2. Stream the SRT file and replace the dialogue lines
+    base_name, ext = os.path.splitext(srt_file_path)
+    output_file_path = base_name + "_Persian" + ext
+
+    try:
+        with open_subtitle(srt_file_path) as infile, \
+             open_output(output_file_path, output_encoding(infile.encoding)) as outfile:
+            items = stage('parse', iter_srt_blocks(infile))
+            for line in stage('replace', iter_replaced_srt_lines(items, translations, result)):
+                outfile.write(line + '\n')
+
+        result.output_path = output_file_path
+        return result
+
+    except FileNotFoundError as e:
+        raise MissingFileError(f"Original SRT file not found at {srt_file_path}") from e
+    except Exception as e:
+        raise ProcessingError(f"An error occurred during processing: {e}") from e
\ No newline at end of file
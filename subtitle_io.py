@@ -0,0 +1,235 @@
+# subtitle_io.py
+
+import codecs
+import io
+import os
+
+from profiling import wrap_reader, wrap_writer
+from results import InvalidInputError
+
+# Size of the write buffer used for output files. Lines are written one by one
+# through it, so memory use does not grow with the size of the file.
+WRITE_BUFFER_SIZE = 1 << 20
+
+# Only this many bytes from the start of a file are used to guess its encoding.
+SNIFF_SIZE = 64 * 1024
+
+# Checked longest first: the UTF-32 LE BOM starts with the UTF-16 LE one.
+_BOMS = (
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+# Encodings that can hold any text the tool writes (Persian letters, RLE).
+UNICODE_ENCODINGS = ('utf-8', 'utf-8-sig', 'utf-16', 'utf-16-le', 'utf-16-be', 'utf-32')
+
+# Set to '1' to write every output file as UTF-8, whatever the input encoding.
+NORMALIZE_ENV_VAR = 'SUBTOOL_NORMALIZE_UTF8'
+
+# Name suffixes of the files written by the tool itself. Directory scans
+# (batch, watch) skip them, so a second run does not process its own output.
+OUTPUT_SUFFIXES = ('_Persian', '_RLE_fixed', '_extracted', '_no_prefix', '_translated_merged')
+
+def is_tool_output(file_path):
+    """Returns True if the name of `file_path` ends with one of OUTPUT_SUFFIXES."""
+    return os.path.splitext(os.path.basename(file_path))[0].endswith(OUTPUT_SUFFIXES)
+
+def detect_encoding(file_path, sniff_size=SNIFF_SIZE):
+    """
+    Guesses the encoding of a subtitle or text file from its first bytes
+    (see `sniff_encoding`).
+
+    Args:
+        file_path (str): The full path to the file.
+        sniff_size (int): Number of bytes to inspect.
+
+    Returns:
+        str: A Python codec name usable with open().
+    """
+    with open(file_path, 'rb') as f:
+        sample = f.read(sniff_size)
+    return sniff_encoding(sample, complete=len(sample) < sniff_size)
+
+def sniff_encoding(sample, complete=True):
+    """
+    Guesses the encoding of a subtitle or text from a sample of its bytes.
+
+    Order of checks:
+    1. A byte order mark (UTF-8, UTF-16, UTF-32).
+    2. UTF-16 without BOM (many NUL bytes on the same side of each pair).
+    3. Valid UTF-8.
+    4. Legacy code pages: cp1256 (Persian/Arabic) when most non-ASCII
+       characters decode to Arabic-script letters, otherwise cp1252.
+
+    Args:
+        sample (bytes): The first bytes of the file or stream.
+        complete (bool): False if the sample was cut off, so a multi-byte
+                         character may be incomplete at its end.
+
+    Returns:
+        str: A Python codec name usable with open().
+    """
+    for bom, encoding in _BOMS:
+        if sample.startswith(bom):
+            return encoding
+
+    if len(sample) >= 2:
+        pairs = len(sample) // 2
+        even_nuls = sample[0:pairs * 2:2].count(0)
+        odd_nuls = sample[1:pairs * 2:2].count(0)
+        if odd_nuls > pairs * 0.3 and even_nuls < pairs * 0.05:
+            return 'utf-16-le'
+        if even_nuls > pairs * 0.3 and odd_nuls < pairs * 0.05:
+            return 'utf-16-be'
+
+    try:
+        # Incremental decoding tolerates a multi-byte character cut off by the sample.
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=complete)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+
+    non_ascii = [char for char in sample.decode('cp1256', errors='replace') if ord(char) > 127]
+    arabic = sum(1 for char in non_ascii if '؀' <= char <= 'ۿ')
+    if non_ascii and arabic * 2 >= len(non_ascii):
+        return 'cp1256'
+    return 'cp1252'
+
+def open_subtitle(file_path, encoding=None):
+    """
+    Opens a subtitle or text file for streaming reads in its detected encoding.
+
+    The returned file's `encoding` attribute records the encoding that was
+    used, so writers can round-trip it (see `output_encoding`).
+
+    Args:
+        file_path (str): The full path to the file.
+        encoding (str): Skip detection and use this encoding.
+
+    Returns:
+        A text file object.
+    """
+    return wrap_reader(open(file_path, 'r', encoding=encoding or detect_encoding(file_path)))
+
+def output_encoding(source_encoding):
+    """
+    Returns the encoding to write an output file derived from a source file.
+
+    Unicode encodings (including their BOM) are kept. Legacy code pages
+    cannot hold the RLE character or, for cp1252, Persian text, so their
+    output is written as UTF-8. Setting SUBTOOL_NORMALIZE_UTF8=1 writes
+    every output as UTF-8 without BOM.
+    """
+    if os.environ.get(NORMALIZE_ENV_VAR) == '1':
+        return 'utf-8'
+    if source_encoding and source_encoding.lower() in UNICODE_ENCODINGS:
+        return source_encoding
+    return 'utf-8'
+
+def set_normalize_to_utf8(enabled):
+    """Turns UTF-8 output normalization on or off for this process and its workers."""
+    os.environ[NORMALIZE_ENV_VAR] = '1' if enabled else '0'
+
+def read_subtitle_data(data):
+    """
+    Prepares in-memory subtitle content for the streaming parsers, the way
+    `open_subtitle` prepares a file.
+
+    Args:
+        data (str, bytes or iterable): The whole content as text, the raw
+            bytes of an upload (their encoding is detected as for files), or
+            any iterable of lines, with or without trailing newlines.
+
+    Returns:
+        tuple: (iterable of lines, encoding). `encoding` is the detected
+               encoding of bytes input and None otherwise.
+
+    Raises:
+        InvalidInputError: If the bytes are not valid in the detected encoding.
+    """
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        data = bytes(data)
+        encoding = sniff_encoding(data)
+        try:
+            text = data.decode(encoding)
+        except UnicodeDecodeError as e:
+            raise InvalidInputError(f"Could not decode the content as {encoding}: {e}") from e
+        # newline=None translates '\r\n' and '\r' as text files opened by open() do.
+        return io.StringIO(text, newline=None), encoding
+    if isinstance(data, str):
+        return io.StringIO(data, newline=None), None
+    return data, None
+
+def format_output_data(lines, data, encoding=None, separator='\n', final_separator=False):
+    """
+    Returns output lines in the shape of the in-memory input they came from.
+
+    Args:
+        lines (iterable): The output lines.
+        data: The input given to `read_subtitle_data`.
+        encoding (str): The encoding detected for bytes input.
+        separator (str): Written between the lines ('' if they keep their newlines).
+        final_separator (bool): Also end non-empty output with `separator`.
+
+    Returns:
+        str for str input, bytes (in `output_encoding(encoding)`) for bytes
+        input, and `lines` itself, still lazy, for any other iterable.
+    """
+    if not isinstance(data, (str, bytes, bytearray, memoryview)):
+        return lines
+    lines = list(lines)
+    text = separator.join(lines)
+    if final_separator and lines:
+        text += separator
+    if isinstance(data, str):
+        return text
+    return text.encode(output_encoding(encoding))
+
+def open_output(file_path, encoding='utf-8'):
+    """Opens an output text file with a large write buffer."""
+    return wrap_writer(open(file_path, 'w', encoding=encoding, buffering=WRITE_BUFFER_SIZE))
+
+def write_joined_lines(outfile, lines):
+    """
+    Writes `lines` separated by '\\n' (like '\\n'.join(lines)) without building
+    the joined string in memory.
+
+    Args:
+        outfile: An open text file.
+        lines (iterable): The lines to write, without trailing newlines.
+
+    Returns:
+        int: The number of lines written.
+    """
+    count = 0
+    for line in lines:
+        if count:
+            outfile.write('\n')
+        outfile.write(line)
+        count += 1
+    return count
+
+def save_extracted_texts(texts, source_path, result=None):
+    """
+    Saves extracted dialogue lines next to the source file.
+
+    Args:
+        texts (iterable): The extracted dialogue lines. An iterator is written
+                          as it is consumed, without being held in memory.
+        source_path (str): The path of the subtitle file they came from.
+        result (ProcessResult): Optional result whose `line_count` receives
+                                the number of lines written.
+
+    Returns:
+        str: The path of the created '_extracted.txt' file.
+    """
+    base_name, _ = os.path.splitext(source_path)
+    output_filename = base_name + "_extracted.txt"
+    with open_output(output_filename) as outfile:
+        count = write_joined_lines(outfile, texts)
+    if result is not None:
+        result.line_count = count
+    return output_filename
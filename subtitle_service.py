@@ -0,0 +1,234 @@
+# subtitle_service.py
+
+import argparse
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import urlsplit
+
+from ass_parser import extract_dialogue_text_from_ass_data
+from ass_replacer import replace_ass_dialogues_data
+from prefix_remover import remove_line_prefixes_data
+from results import InvalidInputError, SubtitleToolError, UnsupportedFileError
+from rtl_fixer import process_rtl_data
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+# Larger request bodies are refused with 413 before being read.
+DEFAULT_MAX_BODY_MB = 64
+
+def _text_field(request, name):
+    """Returns a required string field of a request."""
+    value = request.get(name)
+    if not isinstance(value, str):
+        raise InvalidInputError(f"'{name}' must be a string.")
+    return value
+
+def _flag_field(request, name):
+    """Returns an optional boolean field of a request (default False)."""
+    value = request.get(name, False)
+    if not isinstance(value, bool):
+        raise InvalidInputError(f"'{name}' must be true or false.")
+    return value
+
+def _extract_ass(request):
+    result = extract_dialogue_text_from_ass_data(_text_field(request, 'subtitle'),
+                                                 _flag_field(request, 'add_prefix'))
+    return result, result.lines
+
+def _replace_ass(request):
+    translations = request.get('translations')
+    if isinstance(translations, list):
+        if not all(isinstance(line, str) for line in translations):
+            raise InvalidInputError("'translations' must be a string or a list of strings.")
+    elif not isinstance(translations, str):
+        raise InvalidInputError("'translations' must be a string or a list of strings.")
+    result = replace_ass_dialogues_data(_text_field(request, 'subtitle'), translations)
+    return result, result.output
+
+def _rtl(request):
+    subtitle_type = _text_field(request, 'type').lower().lstrip('.')
+    result = process_rtl_data(_text_field(request, 'subtitle'), '.' + subtitle_type,
+                              _flag_field(request, 'fix_words'))
+    return result, result.output
+
+def _remove_prefix(request):
+    result = remove_line_prefixes_data(_text_field(request, 'subtitle'))
+    return result, result.output
+
+# Path -> function taking the decoded request and returning (ProcessResult, output).
+ENDPOINTS = {
+    '/extract_ass': _extract_ass,
+    '/replace_ass': _replace_ass,
+    '/rtl': _rtl,
+    '/remove_prefix': _remove_prefix,
+}
+
+class SubtitleRequestHandler(BaseHTTPRequestHandler):
+    """
+    Serves one request of the subtitle service. Every endpoint takes a JSON
+    object and answers with a JSON object; nothing is written to disk.
+
+        POST /extract_ass    {"subtitle": "...", "add_prefix": false}
+        POST /replace_ass    {"subtitle": "...", "translations": "..." | ["...", ...]}
+        POST /rtl            {"subtitle": "...", "type": "ass" | "srt" | "txt", "fix_words": false}
+        POST /remove_prefix  {"subtitle": "..."}
+        GET  /health
+
+    Answers are {"output": ..., "result": {...counters and warnings...}}, where
+    `output` is the new content (the list of lines for extract_ass), or
+    {"error": "..."} with status 400 (bad request), 404, 411, 413 (too large) or 500.
+    """
+
+    server_version = 'SubtitleToolService/1.0'
+
+    def do_GET(self):
+        if urlsplit(self.path).path == '/health':
+            self._send_json(200, {'status': 'ok', 'endpoints': sorted(ENDPOINTS)})
+        else:
+            self._send_json(404, {'error': f"Unknown endpoint: {self.path}"})
+
+    def do_POST(self):
+        endpoint = ENDPOINTS.get(urlsplit(self.path).path)
+        if endpoint is None:
+            self._send_json(404, {'error': f"Unknown endpoint: {self.path}"})
+            return
+
+        try:
+            length = int(self.headers.get('Content-Length', ''))
+            if length < 0:
+                raise ValueError(length)
+        except ValueError:
+            self._send_json(411, {'error': "A Content-Length header is required."})
+            return
+        if length > self.server.max_body:
+            self._send_json(413, {'error': f"Request body is larger than {self.server.max_body} bytes."})
+            return
+
+        try:
+            request = json.loads(self.rfile.read(length))
+            if not isinstance(request, dict):
+                raise InvalidInputError("The request body must be a JSON object.")
+            result, output = endpoint(request)
+        except json.JSONDecodeError as e:
+            self._send_json(400, {'error': f"The request body is not valid JSON: {e}"})
+        except UnicodeDecodeError as e:
+            self._send_json(400, {'error': f"The request body is not valid UTF-8: {e}"})
+        except (InvalidInputError, UnsupportedFileError, ValueError) as e:
+            self._send_json(400, {'error': str(e)})
+        except SubtitleToolError as e:
+            self._send_json(500, {'error': str(e)})
+        except Exception as e:
+            # Any other failure still gets an answer instead of a dropped connection.
+            self.log_error("Unexpected error on %s: %r", self.path, e)
+            self._send_json(500, {'error': f"Unexpected error: {e}"})
+        else:
+            self._send_json(200, {'output': output, 'result': result.to_dict()})
+
+    def _send_json(self, status, body):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+class PooledHTTPServer(HTTPServer):
+    """
+    An HTTPServer that hands every accepted connection to a fixed pool of
+    worker threads, so a burst of clients cannot spawn unbounded threads.
+    Connections beyond the pool size wait in the pool's queue.
+
+    The '*_data' functions keep no shared state (no files, no translation
+    memory, profiling is off), so the workers need no locking.
+    """
+
+    def __init__(self, address, handler_class, jobs, max_body, quiet=False):
+        super().__init__(address, handler_class)
+        self.jobs = jobs
+        self.max_body = max_body
+        self.quiet = quiet
+        self._executor = ThreadPoolExecutor(max_workers=jobs, thread_name_prefix='subtool-service')
+
+    def process_request(self, request, client_address):
+        self._executor.submit(self._process_request_worker, request, client_address)
+
+    def _process_request_worker(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self._executor.shutdown(wait=True)
+
+def make_server(host=DEFAULT_HOST, port=DEFAULT_PORT, jobs=None, max_body_mb=DEFAULT_MAX_BODY_MB, quiet=False):
+    """
+    Creates the subtitle service (call `serve_forever()` to run it).
+
+    Args:
+        host (str): The address to listen on. Keep the default (localhost)
+                    unless the service sits behind an authenticating proxy.
+        port (int): The port to listen on (0 picks a free one, see `server_port`).
+        jobs (int): Number of worker threads (default: the number of cores).
+        max_body_mb (float): Largest accepted request body, in MiB.
+        quiet (bool): If True, requests are not logged to stderr.
+
+    Returns:
+        PooledHTTPServer: The bound server.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    return PooledHTTPServer((host, port), SubtitleRequestHandler, jobs, int(max_body_mb * 1024 * 1024), quiet)
+
+def build_serve_parser():
+    """Builds the argument parser of the 'serve' command."""
+    parser = argparse.ArgumentParser(
+        prog="cli_tool.py serve",
+        description="Runs a local HTTP service for extract_ass, replace_ass, RTL and remove_prefix "
+                    "on subtitles sent as JSON, without temporary files.")
+    parser.add_argument('--host', default=DEFAULT_HOST, help=f"Address to listen on (default: {DEFAULT_HOST}).")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f"Port to listen on (default: {DEFAULT_PORT}).")
+    parser.add_argument('--jobs', '-j', type=int, default=os.cpu_count() or 1,
+                        help="Number of worker threads (default: all cores).")
+    parser.add_argument('--max-body', type=float, default=DEFAULT_MAX_BODY_MB,
+                        help=f"Largest accepted request body in MiB (default: {DEFAULT_MAX_BODY_MB}).")
+    parser.add_argument('--quiet', action='store_true', help="Do not log every request.")
+    return parser
+
+def run_serve(argv):
+    """
+    Entry point of 'python cli_tool.py serve ...'.
+
+    Args:
+        argv (list): The arguments following 'serve'.
+
+    Returns:
+        int: The process exit code.
+    """
+    args = build_serve_parser().parse_args(argv)
+    try:
+        server = make_server(args.host, args.port, args.jobs, args.max_body, args.quiet)
+    except OSError as e:
+        print(f"ERROR: Could not listen on {args.host}:{args.port}: {e}")
+        return 1
+
+    host, port = server.server_address[:2]
+    # Flushed, so a parent process (e.g. the benchmark) can read the port.
+    print(f"Serving on http://{host}:{port} ({server.jobs} worker thread(s)). Press Ctrl+C to stop.", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    print("\nService stopped.")
+    return 0
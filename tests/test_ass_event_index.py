@@ -0,0 +1,71 @@
+# tests/test_ass_event_index.py
+
+"""
+Checks the random-access event rewrites of ass_event_index: a rewrite may
+only touch the Text field of a well-formed event, and must leave the file
+unchanged when it is refused.
+
+Usage:
+    python -m unittest tests.test_ass_event_index
+    python -m pytest tests/test_ass_event_index.py
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from ass_event_index import build_event_index, read_event, rewrite_event_text  # noqa: E402
+from results import InvalidInputError  # noqa: E402
+
+ASS_CONTENT = """[Script Info]
+ScriptType: v4.00+
+
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+Dialogue: 0,0:00:01.00,0:00:02.00,Default,,0,0,0,,Hello
+Dialogue: 0,0:00:02.00,0:00:03.00,Default
+Dialogue: 0,0:00:03.00,0:00:04.00,Default,,0,0,0,,{\\i1}Bye
+"""
+
+class RewriteEventTextTest(unittest.TestCase):
+
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix="subtool_event_index_")
+        self.ass_path = os.path.join(self.work_dir, "episode.ass")
+        with open(self.ass_path, 'w', encoding='utf-8', newline='\n') as f:
+            f.write(ASS_CONTENT)
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def read(self):
+        with open(self.ass_path, encoding='utf-8', newline='') as f:
+            return f.read()
+
+    def test_malformed_event_is_refused(self):
+        with self.assertRaises(InvalidInputError):
+            rewrite_event_text(self.ass_path, 2, "سلام")
+        self.assertEqual(self.read(), ASS_CONTENT)
+
+    def test_line_breaks_are_refused(self):
+        with self.assertRaises(InvalidInputError):
+            rewrite_event_text(self.ass_path, 1, "سلام\nدنیا")
+        self.assertEqual(self.read(), ASS_CONTENT)
+
+    def test_rewrite_keeps_the_other_events(self):
+        rewrite_event_text(self.ass_path, 1, "سلام دنیا")
+        index = rewrite_event_text(self.ass_path, 3, r"{\i1}خداحافظ")
+        self.assertEqual(self.read(), ASS_CONTENT.replace(",Hello\n", ",سلام دنیا\n")
+                                                 .replace("}Bye\n", "}خداحافظ\n"))
+        # The cached index was shifted, not rebuilt: it must match a fresh one.
+        self.assertEqual(list(index.offsets), list(build_event_index(self.ass_path).offsets))
+        self.assertEqual(read_event(self.ass_path, 3).text, r"{\i1}خداحافظ")
+        self.assertIsNone(read_event(self.ass_path, 2))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+# tests/test_ass_replacer.py
+
+"""
+Checks how replace_ass_dialogues matches translations with events when
+the extraction left lines out (translation memory, incremental releases):
+translations are only matched by their '<ID>-' prefix, never by position.
+
+Usage:
+    python -m unittest tests.test_ass_replacer
+    python -m pytest tests/test_ass_replacer.py
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from ass_parser import extract_dialogue_text_from_ass  # noqa: E402
+from ass_replacer import parse_translation_lines, replace_ass_dialogues  # noqa: E402
+from results import InvalidInputError  # noqa: E402
+from translation_memory import TranslationMemory  # noqa: E402
+
+ASS_HEADER = """[Script Info]
+ScriptType: v4.00+
+
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+"""
+
+def dialogue(text):
+    return f"Dialogue: 0,0:00:01.00,0:00:02.00,Default,,0,0,0,,{text}"
+
+class ReplacerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix="subtool_replacer_")
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def write(self, name, content):
+        path = os.path.join(self.work_dir, name)
+        with open(path, 'w', encoding='utf-8', newline='\n') as f:
+            f.write(content)
+        return path
+
+    def read_lines(self, path):
+        with open(path, encoding='utf-8') as f:
+            return f.read().splitlines()
+
+class ParseTranslationLinesTest(unittest.TestCase):
+
+    def test_positional_text_starting_with_a_number_is_kept(self):
+        translations = parse_translation_lines(["سلام\n", "چی؟\n", "2-3 روز\n", "3-4 نفر\n"])
+        self.assertEqual(translations, {1: "سلام", 2: "چی؟", 3: "2-3 روز", 4: "3-4 نفر"})
+
+    def test_positional_prefix_of_the_line_itself_is_removed(self):
+        translations = parse_translation_lines(["1-سلام\n", "چی؟\n", "خوب\n"])
+        self.assertEqual(translations, {1: "سلام", 2: "چی؟", 3: "خوب"})
+
+    def test_prefixed_lines_are_matched_by_id(self):
+        translations = parse_translation_lines(["2-3 روز\n", "1-سلام\n", "3-چی؟\n"])
+        self.assertEqual(translations, {1: "سلام", 2: "3 روز", 3: "چی؟"})
+
+class TranslationMemoryTest(ReplacerTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.ass_path = self.write("episode.ass", ASS_HEADER + "\n".join((
+            dialogue("Hello world"), dialogue("Yeah."), dialogue("What?"))) + "\n")
+        self.memory_path = os.path.join(self.work_dir, "memory.db")
+        with TranslationMemory(self.memory_path) as memory:
+            memory.record_many([("Yeah.", "آره.")])
+
+    def stored(self, source):
+        with TranslationMemory(self.memory_path) as memory:
+            return memory.lookup(source)
+
+    def test_unprefixed_translations_are_refused(self):
+        translation_path = self.write("episode_translated.txt", "سلام دنیا\nچی؟\n")
+        with self.assertRaises(InvalidInputError):
+            replace_ass_dialogues(self.ass_path, translation_path, self.memory_path)
+        self.assertEqual(self.stored("Yeah."), "آره.")
+        self.assertIsNone(self.stored("What?"))
+
+    def test_memory_fills_the_missing_ids(self):
+        translation_path = self.write("episode_translated.txt", "1-سلام دنیا\n3-چی؟\n")
+        result = replace_ass_dialogues(self.ass_path, translation_path, self.memory_path)
+        self.assertEqual((result.replaced, result.from_memory, result.missing), (3, 1, 0))
+        output = self.read_lines(result.output_path)
+        self.assertIn(dialogue("آره."), output)
+        self.assertIn(dialogue("چی؟"), output)
+        self.assertEqual(self.stored("What?"), "چی؟")
+
+    def test_stored_translation_is_not_overwritten(self):
+        translation_path = self.write("episode_translated.txt", "1-سلام دنیا\n2-نه.\n3-چی؟\n")
+        result = replace_ass_dialogues(self.ass_path, translation_path, self.memory_path)
+        self.assertIn(dialogue("نه."), self.read_lines(result.output_path))
+        self.assertEqual(self.stored("Yeah."), "آره.")
+        self.assertTrue(any("line 2" in warning for warning in result.warnings))
+
+class IncrementalReplaceTest(ReplacerTestCase):
+
+    def setUp(self):
+        super().setUp()
+        v1_path = self.write("episode_v1.ass", ASS_HEADER + "\n".join((
+            dialogue(r"{\an8}Hello"), dialogue("What now?"))) + "\n")
+        self.manifest_path = os.path.join(self.work_dir, "episode_v1_extracted_manifest.json")
+        extract_dialogue_text_from_ass(v1_path, manifest_path=self.manifest_path)
+        self.previous_path = self.write("episode_v1_translated.txt", "1-سلام\n2-حالا چی؟\n")
+        self.v2_path = self.write("episode_v2.ass", ASS_HEADER + "\n".join((
+            dialogue(r"{\an8}Hello"), dialogue("What now, captain?"))) + "\n")
+        self.merged_path = os.path.join(self.work_dir, "episode_v2_translated_merged.txt")
+
+    def replace(self, translations):
+        translation_path = self.write("episode_v2_translated.txt", translations)
+        return replace_ass_dialogues(self.v2_path, translation_path, previous_manifest_path=self.manifest_path,
+                                     previous_translation_path=self.previous_path)
+
+    def test_unprefixed_translations_are_refused(self):
+        with self.assertRaises(InvalidInputError):
+            self.replace("حالا چی، کاپیتان؟\n")
+        self.assertFalse(os.path.exists(self.merged_path))
+
+    def test_changed_lines_are_matched_by_id(self):
+        result = self.replace("2-حالا چی، کاپیتان؟\n")
+        self.assertEqual((result.replaced, result.missing), (2, 0))
+        output = self.read_lines(result.output_path)
+        self.assertIn(dialogue(r"{\an8}سلام"), output)
+        self.assertIn(dialogue("حالا چی، کاپیتان؟"), output)
+        self.assertEqual(self.read_lines(self.merged_path), ["1-سلام", "2-حالا چی، کاپیتان؟"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+# tests/test_bidi_reorder.py
+
+"""
+Checks the ASS word-order fixing of bidi_reorder against the plain-text
+path: once the override blocks are removed, every visual line reordered by
+`reorder_ass_text` must read exactly like the same line reordered by
+`reorder_words`, wherever the tags were, and every run must keep its style.
+
+Usage:
+    python -m unittest tests.test_bidi_reorder
+    python -m pytest tests/test_bidi_reorder.py
+"""
+
+import os
+import random
+import re
+import sys
+import unittest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from bidi_reorder import reorder_ass_text, reorder_words  # noqa: E402
+
+_BLOCK_PATTERN = re.compile(r'\{[^}]*\}')
+_HARD_SPACE = '\ue000'
+
+WORDS = ("سلام", "دنیا", "خوب", "است", "کاپیتان", "کشتی", "iPhone", "15", "10:30", "۵۰٪", "(آره)", "«نه»")
+PUNCTUATION = ("", "!", "؟", ".", "...", "،")
+STYLE_BLOCKS = (r"{\i1}", r"{\i0}", r"{\b1}", r"{\c&H00FF00&}", r"{\fs40\bord2}", r"{\fscx120}")
+
+def reorder_plain(text):
+    """The old fix_words path: the visual lines of the text without its tags, reordered one by one."""
+    plain = _BLOCK_PATTERN.sub('', text)
+    return [reorder_words(line.replace(r'\h', _HARD_SPACE)).replace(_HARD_SPACE, r'\h')
+            for line in re.split(r'\\[Nn]', plain)]
+
+def visible_lines(text):
+    return re.split(r'\\[Nn]', _BLOCK_PATTERN.sub('', text))
+
+# Brackets are mirrored by the reordering; they count as the same character.
+_UNMIRROR = str.maketrans(')]>»›', '([<«‹')
+
+def styled_characters(text):
+    """The (character, italic) pairs of the visible text of a Text field, following \\i tags."""
+    italic = False
+    characters = []
+    for block, plain in re.findall(r'(\{[^}]*\})|([^{]+)', text):
+        if block:
+            for value in re.findall(r'\\i(\d?)(?![a-z])', block):
+                italic = value == '1'
+        else:
+            plain = re.sub(r'\\[Nnh]', '', plain).translate(_UNMIRROR)
+            characters.extend((char, italic) for char in plain)
+    return characters
+
+class ReorderAssTextTest(unittest.TestCase):
+
+    def test_mid_line_tag_reverses_the_runs(self):
+        self.assertEqual(reorder_ass_text(r"{\i1}سلام{\i0} دنیا خوب"), r"{\i0}خوب دنیا {\i1}سلام")
+
+    def test_moved_run_is_reset_to_its_own_style(self):
+        self.assertEqual(reorder_ass_text(r"سلام{\b1} دنیا"), r"{\b1}دنیا {\b}سلام")
+
+    def test_line_tags_stay_first(self):
+        self.assertEqual(reorder_ass_text(r"{\an8\pos(10,20)}سلام{\i1} دنیا"), r"{\an8\pos(10,20)}{\i1}دنیا {\i}سلام")
+
+    def test_single_run_lines_keep_their_blocks(self):
+        self.assertEqual(reorder_ass_text(r"{\an8\fs20}سلام دنیا!\N{\i1}خوب است"), r"{\an8\fs20}!دنیا سلام\N{\i1}است خوب")
+
+    def test_matches_the_plain_text_path(self):
+        rng = random.Random(0)
+        for _ in range(2000):
+            pieces = []
+            for _ in range(rng.randint(1, 8)):
+                if rng.random() < 0.4:
+                    pieces.append(rng.choice(STYLE_BLOCKS))
+                pieces.append(rng.choice(WORDS) + rng.choice(PUNCTUATION))
+                pieces.append(rng.choice((" ", " ", r"\h", r"\N")))
+            text = "".join(pieces).rstrip()
+            if rng.random() < 0.5:
+                text = r"{\an8}" + text
+            with self.subTest(text=text):
+                reordered = reorder_ass_text(text)
+                self.assertEqual(visible_lines(reordered), reorder_plain(text))
+                # Every character keeps its style: the same multiset of
+                # (character, italic) pairs before and after.
+                self.assertEqual(sorted(styled_characters(reordered)), sorted(styled_characters(text)))
+
+if __name__ == '__main__':
+    unittest.main()
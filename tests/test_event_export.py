@@ -0,0 +1,86 @@
+# tests/test_event_export.py
+
+"""
+Checks the import of edited event exports (import_ass_events): every
+record must stay one Dialogue line, so texts with real line breaks are
+refused before anything is written.
+
+Usage:
+    python -m unittest tests.test_event_export
+    python -m pytest tests/test_event_export.py
+"""
+
+import csv
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from event_export import import_ass_events  # noqa: E402
+from results import InvalidInputError  # noqa: E402
+
+ASS_CONTENT = """[Script Info]
+ScriptType: v4.00+
+
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+Dialogue: 0,0:00:01.00,0:00:02.00,Default,,0,0,0,,{\\i1}Hello
+Dialogue: 0,0:00:02.00,0:00:03.00,Default,,0,0,0,,Bye
+"""
+
+class ImportEventsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix="subtool_event_export_")
+        self.ass_path = os.path.join(self.work_dir, "episode.ass")
+        with open(self.ass_path, 'w', encoding='utf-8', newline='\n') as f:
+            f.write(ASS_CONTENT)
+        self.output_path = os.path.join(self.work_dir, "episode_Persian.ass")
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def write_jsonl(self, records):
+        path = os.path.join(self.work_dir, "episode_events.jsonl")
+        with open(path, 'w', encoding='utf-8', newline='\n') as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        return path
+
+    def write_csv(self, records):
+        path = os.path.join(self.work_dir, "episode_events.csv")
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=('index', 'text'))
+            writer.writeheader()
+            writer.writerows(records)
+        return path
+
+    def test_line_break_in_raw_text_is_refused(self):
+        records_path = self.write_jsonl([{"index": 1, "raw_text": "{\\i1}سلام"},
+                                         {"index": 2, "raw_text": "خداحافظ\nDialogue: 0,0:00:09.00,0:00:10.00,Default,,0,0,0,,x"}])
+        with self.assertRaisesRegex(InvalidInputError, "event 2"):
+            import_ass_events(self.ass_path, records_path)
+        self.assertFalse(os.path.exists(self.output_path))
+
+    def test_line_break_in_csv_text_is_refused(self):
+        records_path = self.write_csv([{"index": 1, "text": "سلام\r\nدنیا"}])
+        with self.assertRaisesRegex(InvalidInputError, "event 1"):
+            import_ass_events(self.ass_path, records_path)
+        self.assertFalse(os.path.exists(self.output_path))
+
+    def test_single_line_texts_are_imported(self):
+        records_path = self.write_jsonl([{"index": 1, "text": "سلام\\Nدنیا"}, {"index": 2, "raw_text": "خداحافظ"}])
+        result = import_ass_events(self.ass_path, records_path)
+        self.assertEqual(result.replaced, 2)
+        with open(result.output_path, encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        self.assertEqual(lines[-2:], ["Dialogue: 0,0:00:01.00,0:00:02.00,Default,,0,0,0,,{\\i1}سلام\\Nدنیا",
+                                      "Dialogue: 0,0:00:02.00,0:00:03.00,Default,,0,0,0,,خداحافظ"])
+
+if __name__ == '__main__':
+    unittest.main()
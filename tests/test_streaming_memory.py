@@ -0,0 +1,164 @@
+# tests/test_streaming_memory.py
+
+"""
+Memory-regression tests of the streaming writers: replace_ass_dialogues,
+remove_line_prefixes and save_dialogue_text_from_srt (the SRT extraction
+of the CLI and of batch mode) must run in constant memory. Every path is
+run on a small and on a large synthetic input (20 MB by default) under
+tracemalloc, and the peak of the large run may not grow with the input.
+
+Larger inputs are opt-in, e.g. SUBTOOL_MEMORY_TEST_MB=100 (about a minute).
+
+Usage:
+    python -m unittest tests.test_streaming_memory
+    python -m pytest tests/test_streaming_memory.py
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import tracemalloc
+import unittest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from ass_replacer import replace_ass_dialogues  # noqa: E402
+from prefix_remover import remove_line_prefixes  # noqa: E402
+from srt_parser import save_dialogue_text_from_srt  # noqa: E402
+
+LARGE_INPUT_MB = float(os.environ.get('SUBTOOL_MEMORY_TEST_MB', 20))
+SMALL_INPUT_MB = LARGE_INPUT_MB / 10
+
+# The large run may use this much more than the small one (tracemalloc noise,
+# interned strings, the growing counters of the result).
+PEAK_SLACK = 1 << 20
+
+# Dialogue events of every generated ASS file. It does not change with the
+# size, so the translation table (which replace_ass_dialogues keeps in
+# memory by design) is the same for both runs; the rest is drawings.
+ASS_DIALOGUE_EVENTS = 2000
+
+ASS_HEADER = """[Script Info]
+ScriptType: v4.00+
+
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+"""
+
+def _target_bytes(megabytes):
+    return int(megabytes * 1024 * 1024)
+
+def generate_ass(path, megabytes):
+    """Writes a typeset ASS file of about `megabytes` with ASS_DIALOGUE_EVENTS dialogue lines."""
+    drawing = r"{\an7\pos(0,0)\p1}m 0 0 l " + " ".join(f"{x} {x * 7 % 1080}" for x in range(300)) + r"{\p0}"
+    dialogue = r"{\i1}Captain, the ship is sinking{\i0}\Nrun now!"
+    drawing_line = f"Dialogue: 1,0:00:01.00,0:00:02.00,Sign,,0,0,0,,{drawing}\n"
+    drawings = max(0, _target_bytes(megabytes) // len(drawing_line) - ASS_DIALOGUE_EVENTS // 20)
+    with open(path, 'w', encoding='utf-8', newline='\n') as f:
+        f.write(ASS_HEADER)
+        for number in range(ASS_DIALOGUE_EVENTS):
+            f.write(f"Dialogue: 0,0:00:01.00,0:00:02.00,Default,,0,0,0,,{dialogue} {number}\n")
+            # The drawings are spread evenly between the dialogue lines.
+            f.write(drawing_line * (drawings * (number + 1) // ASS_DIALOGUE_EVENTS
+                                    - drawings * number // ASS_DIALOGUE_EVENTS))
+
+def generate_translations(path):
+    with open(path, 'w', encoding='utf-8', newline='\n') as f:
+        for number in range(1, ASS_DIALOGUE_EVENTS + 1):
+            f.write(f"{number}-کاپیتان، کشتی دارد غرق می‌شود {number}\n")
+
+def generate_prefixed_text(path, megabytes):
+    """Writes a prefixed TXT file of about `megabytes`."""
+    line = "کاپیتان، کشتی دارد غرق می‌شود! فردا شاید دوباره صبر کن. " * 4
+    target = _target_bytes(megabytes)
+    written = number = 0
+    with open(path, 'w', encoding='utf-8', newline='\n') as f:
+        while written < target:
+            number += 1
+            text = f"{number}-{line}\n"
+            f.write(text)
+            written += len(text.encode('utf-8'))
+
+def generate_srt(path, megabytes):
+    """Writes an SRT file of about `megabytes`."""
+    target = _target_bytes(megabytes)
+    written = number = 0
+    with open(path, 'w', encoding='utf-8', newline='\n') as f:
+        while written < target:
+            number += 1
+            block = (f"{number}\n00:00:01,000 --> 00:00:02,500\n"
+                     f"Captain, the ship is sinking!\n<i>Run now, {number}.</i>\n\n")
+            f.write(block)
+            written += len(block)
+
+def traced_peak(function):
+    """Runs `function` and returns the peak of the memory it allocated."""
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+class StreamingMemoryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix="subtool_memory_")
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def assertConstantPeak(self, generate, run):
+        """Compares the peaks of `run` on a small and on a large generated input."""
+        peaks = {}
+        for name, megabytes in (('small', SMALL_INPUT_MB), ('large', LARGE_INPUT_MB)):
+            path = generate(name, megabytes)
+            size = os.path.getsize(path)
+            peaks[name] = traced_peak(lambda: run(path))
+            # Drops the input before the next one is generated.
+            os.remove(path)
+        self.assertLessEqual(peaks['large'], peaks['small'] + PEAK_SLACK,
+                             f"Peak memory grew from {peaks['small']} to {peaks['large']} bytes "
+                             f"for a {size} byte input.")
+
+    def test_replace_ass_dialogues(self):
+        translation_path = os.path.join(self.work_dir, "episode_translated.txt")
+        generate_translations(translation_path)
+
+        def generate(name, megabytes):
+            path = os.path.join(self.work_dir, f"{name}.ass")
+            generate_ass(path, megabytes)
+            return path
+
+        def run(path):
+            result = replace_ass_dialogues(path, translation_path)
+            self.assertEqual(result.replaced, ASS_DIALOGUE_EVENTS)
+
+        self.assertConstantPeak(generate, run)
+
+    def test_remove_line_prefixes(self):
+        def generate(name, megabytes):
+            path = os.path.join(self.work_dir, f"{name}.txt")
+            generate_prefixed_text(path, megabytes)
+            return path
+
+        def run(path):
+            self.assertGreater(remove_line_prefixes(path).replaced, 0)
+
+        self.assertConstantPeak(generate, run)
+
+    def test_srt_extraction(self):
+        def generate(name, megabytes):
+            path = os.path.join(self.work_dir, f"{name}.srt")
+            generate_srt(path, megabytes)
+            return path
+
+        def run(path):
+            self.assertGreater(save_dialogue_text_from_srt(path, True).line_count, 0)
+
+        self.assertConstantPeak(generate, run)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+# translation_memory.py
+
+import unicodedata
+
+def normalize_source_text(text):
+    """
+    Normalizes a dialogue line into a translation-memory key.
+
+    Unicode is normalized to NFC and runs of whitespace are collapsed, so
+    lines that only differ in spacing share the same translation.
+
+    Args:
+        text (str): The clean (tag-free) dialogue text.
+
+    Returns:
+        str: The normalized key.
+    """
+    return ' '.join(unicodedata.normalize('NFC', text).split())
+
+class TranslationMemory:
+    """
+    A persistent source -> translation store backed by a local SQLite file.
+
+    Lookups are cached in memory for the lifetime of the object. New pairs are
+    written in a single transaction by `record_many`.
+
+    Usage:
+        with TranslationMemory("/path/to/series_memory.db") as memory:
+            memory.lookup("Yeah.")
+    """
+
+    def __init__(self, db_path):
+        # Imported here: most commands run without a translation memory.
+        import sqlite3
+
+        self.db_path = db_path
+        self._connection = sqlite3.connect(db_path, timeout=30)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS translations ("
+            " source TEXT PRIMARY KEY,"
+            " translation TEXT NOT NULL)"
+        )
+        self._connection.commit()
+        self._cache = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Closes the underlying database connection."""
+        self._connection.close()
+
+    def lookup(self, source_text):
+        """
+        Returns the stored translation of `source_text`, or None if unknown.
+        """
+        key = normalize_source_text(source_text)
+        if key not in self._cache:
+            row = self._connection.execute(
+                "SELECT translation FROM translations WHERE source = ?", (key,)
+            ).fetchone()
+            self._cache[key] = row[0] if row else None
+        return self._cache[key]
+
+    def __contains__(self, source_text):
+        return self.lookup(source_text) is not None
+
+    def record_many(self, pairs):
+        """
+        Stores new (source, translation) pairs. A source that is already in
+        the memory keeps its stored translation; so does the first pair of a
+        source repeated in `pairs`.
+
+        Args:
+            pairs (iterable): (source text, translated text) tuples.
+
+        Returns:
+            int: The number of pairs written.
+        """
+        rows = {}
+        for source_text, translation in pairs:
+            if translation:
+                rows.setdefault(normalize_source_text(source_text), translation)
+        with self._connection:
+            written = self._connection.executemany(
+                "INSERT OR IGNORE INTO translations (source, translation) VALUES (?, ?)",
+                rows.items(),
+            ).rowcount
+        # Looked up again: the stored translation may not be the one given here.
+        for key in rows:
+            self._cache.pop(key, None)
+        return written
+
+    def __len__(self):
+        return self._connection.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
\ No newline at end of file
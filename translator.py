@@ -0,0 +1,234 @@
+# translator.py
+
+import abc
+import asyncio
+import json
+import os
+import urllib.request
+
+from prefix_remover import split_line_prefix
+from results import InvalidInputError, MissingFileError, ProcessingError, ProcessResult, SubtitleToolError
+from subtitle_io import open_output, open_subtitle, write_joined_lines
+
+DEFAULT_MAX_CHARS = 4000
+DEFAULT_MAX_LINES = 100
+DEFAULT_CONCURRENCY = 4
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 1.0
+
+class TranslationError(SubtitleToolError):
+    """Raised when a batch cannot be translated after all retries."""
+
+class TranslatorBackend(abc.ABC):
+    """
+    Interface of a translation backend.
+
+    A backend receives one batch of lines (with their '<ID>-' prefixes, if
+    the extraction added them) and must return exactly one translated line
+    per input line, in the same order. A subclass that does not implement
+    `translate_batch` cannot be instantiated.
+    """
+
+    @abc.abstractmethod
+    async def translate_batch(self, lines):
+        """Returns the translations of `lines` (a list of str), in the same order."""
+
+class EchoBackend(TranslatorBackend):
+    """
+    In-process fake backend: returns every line unchanged (optionally with a
+    marker). Useful for dry runs and for testing the dispatch logic.
+    """
+
+    def __init__(self, marker=''):
+        self.marker = marker
+        self.calls = 0
+
+    async def translate_batch(self, lines):
+        self.calls += 1
+        return [self.marker + line for line in lines]
+
+class HttpBackend(TranslatorBackend):
+    """
+    Sends batches to an HTTP endpoint as JSON.
+
+    Request body:  {"lines": [...], "source": "en", "target": "fa"}
+    Response body: {"lines": [...]}
+
+    The blocking request runs in a worker thread, so many batches can be in
+    flight at once.
+    """
+
+    def __init__(self, url, source='en', target='fa', timeout=120):
+        self.url = url
+        self.source = source
+        self.target = target
+        self.timeout = timeout
+
+    def _post(self, lines):
+        body = json.dumps({"lines": lines, "source": self.source, "target": self.target}).encode('utf-8')
+        request = urllib.request.Request(self.url, data=body, headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read().decode('utf-8'))["lines"]
+
+    async def translate_batch(self, lines):
+        return await asyncio.to_thread(self._post, lines)
+
+def pack_batches(lines, max_chars=DEFAULT_MAX_CHARS, max_lines=DEFAULT_MAX_LINES):
+    """
+    Packs lines into consecutive batches bounded by size and line count.
+
+    A single line longer than `max_chars` gets a batch of its own.
+
+    Args:
+        lines (list): The lines to translate (prefixes included).
+        max_chars (int): Maximum number of characters per batch.
+        max_lines (int): Maximum number of lines per batch.
+
+    Returns:
+        list: (start position, list of lines) tuples, in order.
+    """
+    batches = []
+    start = 0
+    current = []
+    size = 0
+    for position, line in enumerate(lines):
+        if current and (size + len(line) > max_chars or len(current) >= max_lines):
+            batches.append((start, current))
+            start, current, size = position, [], 0
+        current.append(line)
+        size += len(line)
+    if current:
+        batches.append((start, current))
+    return batches
+
+def _restore_prefixes(source_lines, translated_lines):
+    """Puts back '<ID>-' prefixes that a backend dropped from its output."""
+    restored = []
+    for source_line, translated_line in zip(source_lines, translated_lines):
+        translated_line = translated_line.strip()
+        line_id, _ = split_line_prefix(source_line)
+        if line_id is not None and split_line_prefix(translated_line)[0] != line_id:
+            translated_line = f"{line_id}-{split_line_prefix(translated_line)[1]}"
+        restored.append(translated_line)
+    return restored
+
+def check_concurrency(concurrency):
+    """
+    Raises InvalidInputError unless `concurrency` is a whole number of at
+    least 1 (a semaphore of 0 would never let a batch through).
+    """
+    if isinstance(concurrency, bool) or not isinstance(concurrency, int) or concurrency < 1:
+        raise InvalidInputError(f"Concurrency must be at least 1 (got {concurrency!r}).")
+
+async def translate_lines(lines, backend, concurrency=DEFAULT_CONCURRENCY, retries=DEFAULT_RETRIES,
+                          backoff=DEFAULT_BACKOFF, max_chars=DEFAULT_MAX_CHARS, max_lines=DEFAULT_MAX_LINES):
+    """
+    Translates lines in size-bounded batches sent concurrently to `backend`.
+
+    At most `concurrency` batches are in flight at once. A failing batch (an
+    exception or a wrong number of lines) is retried with exponential backoff.
+
+    Args:
+        lines (list): The extracted lines, optionally with '<ID>-' prefixes.
+        backend (TranslatorBackend): The translation backend.
+        concurrency (int): Maximum number of concurrent batches.
+        retries (int): Number of retries per batch after the first attempt.
+        backoff (float): Delay before the first retry, doubled on every retry.
+
+    Returns:
+        list: The translated lines, in the original order, prefixes kept.
+
+    Raises:
+        InvalidInputError: If `concurrency` is less than 1.
+        TranslationError: If a batch still fails after all retries.
+    """
+    check_concurrency(concurrency)
+    semaphore = asyncio.Semaphore(concurrency)
+    results = [None] * len(lines)
+
+    async def run_batch(start, batch):
+        delay = backoff
+        for attempt in range(retries + 1):
+            try:
+                async with semaphore:
+                    translated = await backend.translate_batch(batch)
+                if len(translated) != len(batch):
+                    raise TranslationError(
+                        f"backend returned {len(translated)} line(s) for a batch of {len(batch)}")
+                results[start:start + len(batch)] = _restore_prefixes(batch, translated)
+                return
+            except Exception as e:
+                if attempt == retries:
+                    raise TranslationError(f"batch starting at line {start + 1} failed: {e}") from e
+                await asyncio.sleep(delay)
+                delay *= 2
+
+    await asyncio.gather(*(run_batch(start, batch) for start, batch in pack_batches(lines, max_chars, max_lines)))
+    return results
+
+def default_translation_path(extracted_file_path):
+    """
+    Returns the output path of a translated file
+    (e.g., 'episode_extracted.txt' -> 'episode_translated.txt', the name
+    batch replace_ass looks for next to 'episode.ass').
+    """
+    base_name, ext = os.path.splitext(extracted_file_path)
+    if base_name.endswith("_extracted"):
+        base_name = base_name[:-len("_extracted")]
+    return base_name + "_translated" + ext
+
+def translate_file(extracted_file_path, backend, concurrency=DEFAULT_CONCURRENCY, **options):
+    """
+    Translates an extracted TXT file (from extract_ass/extract_srt) and saves
+    the result, ready for replace_ass_dialogues/replace_srt_dialogues.
+
+    Args:
+        extracted_file_path (str): The full path to the extracted TXT file.
+        backend (TranslatorBackend): The translation backend.
+        concurrency (int): Maximum number of concurrent batches.
+        **options: Passed to `translate_lines` (retries, backoff, max_chars, max_lines).
+
+    Returns:
+        ProcessResult: The path of the translated file, with `replaced`
+                       counting the translated lines.
+
+    Raises:
+        MissingFileError: If the extracted file does not exist.
+        InvalidInputError: If it cannot be read, or if `concurrency` is less than 1.
+        TranslationError: If a batch still fails after all retries.
+        ProcessingError: If the translated file cannot be written.
+    """
+    check_concurrency(concurrency)
+    try:
+        with open_subtitle(extracted_file_path) as f:
+            lines = [line.rstrip('\n') for line in f if line.strip()]
+    except FileNotFoundError as e:
+        raise MissingFileError(f"File not found at {extracted_file_path}") from e
+    except Exception as e:
+        raise InvalidInputError(f"Could not read file {extracted_file_path}: {e}") from e
+
+    try:
+        translated = asyncio.run(translate_lines(lines, backend, concurrency, **options))
+    except TranslationError as e:
+        raise TranslationError(f"Translation failed: {e}") from e
+
+    output_file_path = default_translation_path(extracted_file_path)
+    try:
+        with open_output(output_file_path) as outfile:
+            write_joined_lines(outfile, translated)
+    except Exception as e:
+        raise ProcessingError(f"Could not save output file {output_file_path}: {e}") from e
+
+    result = ProcessResult(extracted_file_path, output_file_path)
+    result.events_read = len(lines)
+    result.replaced = len(translated)
+    return result
+
+def make_backend(endpoint):
+    """
+    Builds a backend from a command-line endpoint: 'echo' for the in-process
+    fake, otherwise an HTTP(S) URL.
+    """
+    if endpoint.lower() == 'echo':
+        return EchoBackend()
+    return HttpBackend(endpoint)
\ No newline at end of file
@@ -0,0 +1,437 @@
+# watch_folder.py
+
+import argparse
+import ctypes
+import ctypes.util
+import json
+import os
+import queue
+import select
+import struct
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from batch_runner import DEFAULT_TRANSLATION_SUFFIX, run_batch_job
+from subtitle_io import is_tool_output, set_normalize_to_utf8
+
+SUBTITLE_EXTENSIONS = ('.ass', '.ssa', '.srt')
+
+# inotify(7) event bits.
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_Q_OVERFLOW = 0x00004000
+_INOTIFY_EVENT = struct.Struct('iIII')
+
+class InotifySource:
+    """
+    Reports changed files of one directory through Linux inotify (via ctypes).
+
+    Raises:
+        OSError: If inotify is not available on this system.
+    """
+
+    def __init__(self, directory):
+        libc_name = ctypes.util.find_library('c')
+        if sys.platform != 'linux' or not libc_name:
+            raise OSError("inotify is not available on this platform")
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            raise OSError("inotify is not available on this platform")
+
+        self.directory = directory
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch failed for {directory}")
+
+    def poll(self, timeout):
+        """Waits up to `timeout` seconds and returns the paths that changed."""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        paths = []
+        position = 0
+        while position + _INOTIFY_EVENT.size <= len(data):
+            _, mask, _, name_length = _INOTIFY_EVENT.unpack_from(data, position)
+            position += _INOTIFY_EVENT.size
+            name = data[position:position + name_length].rstrip(b'\0')
+            position += name_length
+            if mask & IN_Q_OVERFLOW:
+                # Events were dropped: report every file so nothing is missed.
+                paths.extend(list_directory(self.directory))
+            elif name:
+                paths.append(os.path.join(self.directory, os.fsdecode(name)))
+        return paths
+
+    def close(self):
+        os.close(self.fd)
+
+class PollingSource:
+    """Reports changed files of one directory by comparing (size, mtime) snapshots."""
+
+    def __init__(self, directory, interval=1.0):
+        self.directory = directory
+        self.interval = interval
+        self.snapshot = self._scan()
+
+    def _scan(self):
+        snapshot = {}
+        for path in list_directory(self.directory):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            snapshot[path] = (stat.st_size, stat.st_mtime_ns)
+        return snapshot
+
+    def poll(self, timeout):
+        """Waits up to `timeout` seconds and returns the paths that changed."""
+        time.sleep(min(timeout, self.interval))
+        snapshot = self._scan()
+        changed = [path for path, state in snapshot.items() if self.snapshot.get(path) != state]
+        self.snapshot = snapshot
+        return changed
+
+    def close(self):
+        pass
+
+def open_change_source(directory, poll_interval=1.0, force_polling=False):
+    """Returns an inotify source when possible, otherwise a polling source."""
+    if not force_polling:
+        try:
+            return InotifySource(directory)
+        except OSError:
+            pass
+    return PollingSource(directory, poll_interval)
+
+def list_directory(directory):
+    """Returns the regular files directly inside `directory`."""
+    with os.scandir(directory) as entries:
+        return [entry.path for entry in entries if entry.is_file()]
+
+class Debouncer:
+    """
+    Holds changed files until they stop changing.
+
+    A file is ready once `settle` seconds have passed since its last change
+    event and its size and modification time are still the same, so files
+    that are still being copied into the folder are not picked up half-written.
+    """
+
+    def __init__(self, settle=2.0):
+        self.settle = settle
+        self.pending = {}  # path -> [first seen, last change, (size, mtime)]
+
+    def touch(self, path, now):
+        entry = self.pending.get(path)
+        if entry is None:
+            self.pending[path] = [now, now, None]
+        else:
+            entry[1] = now
+
+    def pop_ready(self, now):
+        """Returns (path, first seen) for every file that has settled."""
+        ready = []
+        for path, entry in list(self.pending.items()):
+            if now - entry[1] < self.settle:
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                # Deleted or renamed away before it settled.
+                del self.pending[path]
+                continue
+            state = (stat.st_size, stat.st_mtime_ns)
+            if entry[2] != state:
+                # Still changing (or not checked yet): look again after `settle`.
+                entry[1] = now
+                entry[2] = state
+                continue
+            del self.pending[path]
+            ready.append((path, entry[0]))
+        return ready
+
+    def __len__(self):
+        return len(self.pending)
+
+def plan_job(path, translation_suffix=DEFAULT_TRANSLATION_SUFFIX):
+    """
+    Decides what to run for a file that appeared or changed in the inbox.
+
+    - '<name><suffix>' (a translation) next to '<name>.ass|ssa|srt': pipeline
+      (replace + RTL fix) on the subtitle file.
+    - A subtitle file with a translation next to it: pipeline.
+    - A subtitle file without one: extract_ass/extract_srt.
+
+    Returns:
+        tuple or None: (command, subtitle path), or None if there is nothing to do.
+    """
+    if path.endswith(translation_suffix):
+        base_name = path[:-len(translation_suffix)]
+        for ext in SUBTITLE_EXTENSIONS:
+            if os.path.isfile(base_name + ext):
+                return 'pipeline', base_name + ext
+        return None
+
+    base_name, ext = os.path.splitext(path)
+    ext = ext.lower()
+    if ext not in SUBTITLE_EXTENSIONS or is_tool_output(path):
+        # Files written by the tool itself: the daemon does not react to its own output.
+        return None
+    if os.path.isfile(base_name + translation_suffix):
+        return 'pipeline', path
+    return ('extract_srt' if ext == '.srt' else 'extract_ass'), path
+
+class WatchStats:
+    """Queue depth and latency counters of the watch daemon."""
+
+    def __init__(self):
+        self.started = time.time()
+        self.debouncing = 0
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.warnings = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.latency_last = 0.0
+
+    def record(self, ok, latency):
+        if ok:
+            self.completed += 1
+        else:
+            self.failed += 1
+        self.latency_last = latency
+        self.latency_total += latency
+        self.latency_max = max(self.latency_max, latency)
+
+    def snapshot(self):
+        finished = self.completed + self.failed
+        return {
+            'uptime_s': round(time.time() - self.started, 3),
+            'debouncing': self.debouncing,
+            'queue_depth': self.queued,
+            'running': self.running,
+            'completed': self.completed,
+            'failed': self.failed,
+            'warnings': self.warnings,
+            'latency_last_s': round(self.latency_last, 3),
+            'latency_avg_s': round(self.latency_total / finished, 3) if finished else 0.0,
+            'latency_max_s': round(self.latency_max, 3),
+        }
+
+class FolderWatcher:
+    """
+    Watches an inbox directory and runs the matching command on every file
+    that lands in it, on a bounded pool of worker processes.
+
+    Jobs wait in a backlog and at most `jobs` of them run at a time. A job
+    for a file that is already queued or running is coalesced with it: the
+    file is processed once more after the running job finishes.
+    """
+
+    def __init__(self, directory, options, jobs=1, settle=2.0, poll_interval=1.0,
+                 force_polling=False, status_path=None):
+        self.directory = directory
+        self.options = options
+        self.jobs = max(1, jobs)
+        self.poll_interval = poll_interval
+        self.status_path = status_path
+        self.source = open_change_source(directory, poll_interval, force_polling)
+        self.debouncer = Debouncer(settle)
+        self.stats = WatchStats()
+        self.backlog = deque()     # (command, path, first seen)
+        self.active = set()        # subtitle paths queued or running
+        self.rerun = {}            # path -> (command, first seen) to run again
+        self.finished = queue.Queue()
+
+    @property
+    def backend(self):
+        return 'inotify' if isinstance(self.source, InotifySource) else 'polling'
+
+    def enqueue(self, path, first_seen):
+        job = plan_job(path, self.options['translation_suffix'])
+        if job is None:
+            return
+        command, target = job
+        if target in self.active:
+            self.rerun[target] = (command, first_seen)
+            return
+        self.active.add(target)
+        self.backlog.append((command, target, first_seen))
+
+    def _submit(self, executor):
+        """Starts queued jobs while workers are free. Returns True if any started."""
+        started = False
+        while self.backlog and self.stats.running < self.jobs:
+            command, path, first_seen = self.backlog.popleft()
+            self.stats.running += 1
+            future = executor.submit(run_batch_job, command, path, self.options)
+            future.add_done_callback(
+                lambda done, job=(command, path, first_seen): self.finished.put(job + (done,)))
+            started = True
+        return started
+
+    def _collect(self):
+        changed = False
+        while True:
+            try:
+                command, path, first_seen, future = self.finished.get_nowait()
+            except queue.Empty:
+                return changed
+            try:
+                _, ok, message, result = future.result()
+            except Exception as e:
+                # The worker process died.
+                ok, message = False, f"ERROR: Worker failed: {e}"
+            latency = time.time() - first_seen
+            self.stats.running -= 1
+            self.stats.record(ok, latency)
+            if ok:
+                print(f"✅ {command} {path} -> {message} ({latency:.2f}s)")
+                self.stats.warnings += len(result.warnings)
+                for warning in result.warnings:
+                    print(f"   Warning: {warning}")
+            else:
+                print(f"❌ {command} {path}: {message}")
+
+            self.active.discard(path)
+            if path in self.rerun:
+                rerun_command, rerun_seen = self.rerun.pop(path)
+                self.active.add(path)
+                self.backlog.append((rerun_command, path, rerun_seen))
+            changed = True
+
+    def _update_stats(self):
+        self.stats.debouncing = len(self.debouncer)
+        self.stats.queued = len(self.backlog)
+
+    def write_status(self):
+        """Writes the current counters to the status file (atomically)."""
+        if not self.status_path:
+            return
+        temp_path = self.status_path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.stats.snapshot(), f, indent=2)
+        os.replace(temp_path, self.status_path)
+
+    def run(self, initial_scan=False, stop_after=None):
+        """
+        Runs the watch loop until interrupted (or for `stop_after` seconds).
+
+        Args:
+            initial_scan (bool): Also process the files already in the folder.
+            stop_after (float): Stop after this many seconds (mainly for scripts).
+        """
+        deadline = time.time() + stop_after if stop_after else None
+        if initial_scan:
+            now = time.time()
+            for path in list_directory(self.directory):
+                self.debouncer.touch(path, now)
+
+        self.write_status()
+        with ProcessPoolExecutor(max_workers=self.jobs) as executor:
+            try:
+                while deadline is None or time.time() < deadline:
+                    timeout = min(self.poll_interval, self.debouncer.settle / 2)
+                    now = time.time()
+                    for path in self.source.poll(timeout):
+                        self.debouncer.touch(path, now)
+                    for path, first_seen in self.debouncer.pop_ready(time.time()):
+                        self.enqueue(path, first_seen)
+
+                    started = self._submit(executor)
+                    changed = self._collect()
+                    started = self._submit(executor) or started
+                    self._update_stats()
+                    # Written when a job starts as well as when one ends, so
+                    # the file shows a long job as running while it runs.
+                    if changed or started:
+                        self.write_status()
+            except KeyboardInterrupt:
+                print("\nStopping: waiting for running jobs to finish...")
+            finally:
+                self.backlog.clear()
+                self.source.close()
+
+        self._collect()
+        self._update_stats()
+        self.write_status()
+
+def build_watch_parser():
+    """Builds the argument parser of the 'watch' command."""
+    parser = argparse.ArgumentParser(
+        prog="cli_tool.py watch",
+        description="Watches an inbox folder: new subtitle files are extracted and a "
+                    "'<name>_translated.txt' next to '<name>.ass|srt' triggers replace + RTL fix.")
+    parser.add_argument('directory', help="The folder to watch.")
+    parser.add_argument('--jobs', '-j', type=int, default=os.cpu_count() or 1,
+                        help="Number of worker processes (default: all cores).")
+    parser.add_argument('--settle', type=float, default=2.0,
+                        help="Seconds a file must stay unchanged before it is processed (default: 2).")
+    parser.add_argument('--poll-interval', type=float, default=1.0,
+                        help="Seconds between directory scans when polling (default: 1).")
+    parser.add_argument('--polling', action='store_true',
+                        help="Use polling even where inotify is available.")
+    parser.add_argument('--initial-scan', action='store_true',
+                        help="Also process the files already in the folder at startup.")
+    parser.add_argument('--status-file', default=None,
+                        help="Keep queue depth and latency counters in this JSON file.")
+    parser.add_argument('--prefix', action='store_true',
+                        help="Extraction: prepend '1-', '2-', ... to all lines.")
+    parser.add_argument('--memory', default=None,
+                        help="ASS: path to a translation memory database.")
+    parser.add_argument('--dedupe', action='store_true',
+                        help="ASS: extract unique lines once (with a '<name>_extracted_index.json' sidecar).")
+    parser.add_argument('--translation-suffix', default=DEFAULT_TRANSLATION_SUFFIX,
+                        help=f"Translation file name suffix (default: '{DEFAULT_TRANSLATION_SUFFIX}').")
+    parser.add_argument('--utf8', action='store_true',
+                        help="Write every output as UTF-8 instead of keeping the input's Unicode encoding.")
+    return parser
+
+def run_watch(argv):
+    """
+    Entry point of 'python cli_tool.py watch ...'.
+
+    Args:
+        argv (list): The arguments following 'watch'.
+
+    Returns:
+        int: The process exit code.
+    """
+    args = build_watch_parser().parse_args(argv)
+    if not os.path.isdir(args.directory):
+        print(f"ERROR: Directory not found at {args.directory}")
+        return 1
+    if args.utf8:
+        set_normalize_to_utf8(True)
+
+    options = {
+        'prefix': args.prefix,
+        'memory': args.memory,
+        'dedupe': args.dedupe,
+        'fix_words': False,
+        'translation_suffix': args.translation_suffix,
+    }
+    watcher = FolderWatcher(args.directory, options, args.jobs, args.settle, args.poll_interval,
+                            args.polling, args.status_file)
+    print(f"Watching {args.directory} ({watcher.backend}, {watcher.jobs} worker(s)). Press Ctrl+C to stop.")
+    watcher.run(args.initial_scan)
+
+    stats = watcher.stats.snapshot()
+    print(f"\nSummary: {stats['completed']} succeeded, {stats['failed']} failed, "
+          f"average latency {stats['latency_avg_s']}s.")
+    return 1 if stats['failed'] else 0